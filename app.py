@@ -4,14 +4,51 @@
 # Usage: python app.py
 import threading
 import os
+import math
 import tempfile
 import traceback
-from datetime import date
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import flet as ft
-from config import OUTPUT_DIR, DEFAULT_MAX_WORKERS, MAX_RETRIES, VERBOSE_LOGGING
-from downloader import fetch_playlist_info, download_as_mp3, sanitize_for_fs, describe_error
-
+from config import (
+    OUTPUT_DIR,
+    DEFAULT_MAX_WORKERS,
+    MAX_RETRIES,
+    VERBOSE_LOGGING,
+    FLAT_PLAYLIST_FETCH,
+    FETCH_RENDER_BATCH,
+    LIST_PAGE_SIZE,
+    DEFAULT_TRANSCODE_WORKERS,
+    ADAPTIVE_CONCURRENCY,
+    ADAPTIVE_MIN_WORKERS,
+    ADAPTIVE_MAX_WORKERS,
+    BANDWIDTH_LIMIT,
+    SYNC_MODE,
+    SYNC_REMOVE_DELETED,
+    OUTPUT_FORMAT,
+    DOWNLOAD_ENGINE,
+)
+from bandwidth import get_bandwidth_limiter, parse_rate
+from entry_store import EntryStore
+from downloader import (
+    fetch_playlist_info,
+    playlist_output_dir,
+    playlist_sync_dir,
+    describe_error,
+    FORMAT_MP3,
+    FORMAT_M4A,
+    FORMAT_OPUS,
+    FORMAT_ORIGINAL,
+)
+from manifest import get_manifest
+from metrics import start_metrics_server
+import jobs
+from jobs import get_job_store
+import runner
+from runner import DownloadRun, ENGINE_THREADS, ENGINE_ASYNCIO, run_class
+from playlist_queue import PlaylistQueue, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+import playlist_queue
+from ui_dispatcher import UIDispatcher
+from progress import format_bytes
+from sync import plan_sync, apply_sync
 
 def main(page: ft.Page):
     page.title = "YouTube Playlist → MP3 (Flet + yt-dlp)"
@@ -27,8 +64,29 @@ def main(page: ft.Page):
     txt_playlist = ft.TextField(label="YouTube playlist URL veya paylaşım linki", width=700)
     btn_fetch = ft.ElevatedButton("Listeyi Getir", icon=ft.Icons.LIST, disabled=False)
 
-    list_view = ft.ListView(expand=True, spacing=5, padding=10)
-    chk_all = ft.Checkbox(label="Tümünü seç", value=False)
+    # Video listesi: girdiler EntryStore'da tutulur; sadece görünen sayfanın satırları için
+    # kontrol vardır ve sayfa/arama değiştikçe aynı kontroller yeniden bağlanır
+    row_boxes = [ft.Checkbox(value=False, visible=False) for _ in range(LIST_PAGE_SIZE)]
+    list_view = ft.ListView(controls=row_boxes, expand=True, spacing=5, padding=10)
+    chk_all = ft.Checkbox(label="Tümünü seç", value=False, tooltip="Arama/süzgeç varsa sadece eşleşenler")
+    txt_search = ft.TextField(label="Ara (başlık veya video id)", width=300)
+    # Durum süzgeci: anahtar -> (etiket, runner durumları; None = bekleyen, süzgeç yoksa None)
+    state_filters = {
+        "all": ("Tümü", None),
+        "pending": ("Bekleyen", {None}),
+        "active": ("Sürüyor", {runner.DOWNLOADING, runner.WAITING_TRANSCODE, runner.TRANSCODING, runner.RETRYING}),
+        "done": ("Tamamlanan", {runner.DONE, runner.SKIPPED, runner.LINKED}),
+        "failed": ("Hatalı / iptal", {runner.FAILED, runner.CANCELLED}),
+    }
+    ddl_state_filter = ft.Dropdown(
+        label="Durum",
+        width=180,
+        value="all",
+        options=[ft.dropdown.Option(key, text) for key, (text, _states) in state_filters.items()],
+    )
+    btn_prev_page = ft.IconButton(icon=ft.Icons.CHEVRON_LEFT, tooltip="Önceki sayfa", disabled=True)
+    btn_next_page = ft.IconButton(icon=ft.Icons.CHEVRON_RIGHT, tooltip="Sonraki sayfa", disabled=True)
+    lbl_page = ft.Text("", size=12)
 
     btn_download_selected = ft.ElevatedButton("Seçileni MP3 indir", icon=ft.Icons.DOWNLOAD, disabled=True)
     btn_download_all = ft.ElevatedButton("Hepsini MP3 indir", icon=ft.Icons.DOWNLOAD, disabled=True)
@@ -39,37 +97,189 @@ def main(page: ft.Page):
         value=str(DEFAULT_MAX_WORKERS),
         options=[ft.dropdown.Option(str(i)) for i in range(1, 6)],
     )
+    ddl_transcode_workers = ft.Dropdown(
+        label="Paralel dönüştürme (CPU)",
+        width=180,
+        value=str(DEFAULT_TRANSCODE_WORKERS),
+        options=[ft.dropdown.Option(str(i)) for i in range(1, max(DEFAULT_TRANSCODE_WORKERS, 8) + 1)],
+    )
 
     txt_max_retries = ft.TextField(
         label="Maksimum tekrar (retry)",
         width=160,
         value=str(MAX_RETRIES),
     )
+    sw_sync = ft.Switch(
+        label="Senkron modu (kalıcı klasör)",
+        value=SYNC_MODE,
+        tooltip="Hepsini indir: playlist kendi kalıcı klasörüyle karşılaştırılır, sadece yeni videolar indirilir, sırası değişenler yeniden adlandırılır.",
+    )
+    chk_sync_remove = ft.Checkbox(label="Listeden çıkanları sil", value=SYNC_REMOVE_DELETED)
+    txt_rate_limit = ft.TextField(
+        label="Hız sınırı (ör. 2M, boş = sınırsız)",
+        width=220,
+        value=str(BANDWIDTH_LIMIT or ""),
+        tooltip="Tüm paralel indirmelerin toplam hızı (bayt/sn). İndirme sürerken de değiştirilebilir.",
+    )
+    # Çıktı biçimleri: mp3 dışındakiler mümkünse akışı yeniden kodlamadan saklar
+    format_labels = {
+        FORMAT_MP3: ("MP3 (yeniden kodla)", "MP3"),
+        FORMAT_M4A: ("M4A / AAC (remux)", "M4A"),
+        FORMAT_OPUS: ("Opus (remux)", "Opus"),
+        FORMAT_ORIGINAL: ("Orijinal akış (dönüştürmesiz)", None),
+    }
+    ddl_output_format = ft.Dropdown(
+        label="Çıktı biçimi",
+        width=240,
+        value=OUTPUT_FORMAT,
+        options=[ft.dropdown.Option(key, text) for key, (text, _short) in format_labels.items()],
+        tooltip="M4A/Opus: kaynak akış aynı kodekteyse sadece kap değiştirilir (kayıpsız, CPU harcamaz). "
+        "Orijinal: indirilen akış ffmpeg'e hiç girmeden saklanır.",
+    )
+    # İndirme motoru: aynı playlist'i iki motorla indirip karşılaştırmak için (özette 'engine' alanı)
+    ddl_engine = ft.Dropdown(
+        label="İndirme motoru",
+        width=200,
+        value=DOWNLOAD_ENGINE,
+        options=[
+            ft.dropdown.Option(ENGINE_THREADS, "Thread havuzu"),
+            ft.dropdown.Option(ENGINE_ASYNCIO, "asyncio (async HTTP)"),
+        ],
+        tooltip="asyncio: indirmeler ve ffmpeg beklemeleri tek event loop'ta görev olarak çalışır (httpx gerekir). "
+        "Kuyruk her zaman thread havuzunu kullanır.",
+    )
     sw_verbose = ft.Switch(label="Ayrıntılı log (konsola)", value=VERBOSE_LOGGING)
+    sw_adaptive = ft.Switch(
+        label=f"Uyarlanabilir paralellik ({ADAPTIVE_MIN_WORKERS}–{ADAPTIVE_MAX_WORKERS})",
+        value=ADAPTIVE_CONCURRENCY,
+        tooltip="İndirme sayısı hız, hata/throttle oranı ve CPU yüküne göre otomatik ayarlanır; seçili değer başlangıçtır.",
+    )
     btn_reset_defaults = ft.TextButton("Varsayılanları geri yükle", icon=ft.Icons.RESTORE)
+    btn_rebuild_manifest = ft.TextButton("Klasörü yeniden tara", icon=ft.Icons.REFRESH)
+
+    lbl_resume = ft.Text("", size=13, color=ft.Colors.ORANGE_800)
+    btn_resume = ft.ElevatedButton("Sürdür", icon=ft.Icons.PLAY_ARROW)
+    btn_resume_dismiss = ft.TextButton("Yoksay", icon=ft.Icons.CLOSE)
+    resume_row = ft.Row([lbl_resume, btn_resume, btn_resume_dismiss], visible=False)
 
     progress_bar = ft.ProgressBar(width=700, visible=False)
     progress_text = ft.Text("")
     lbl_failed = ft.Text("", size=12)
+    btn_retry_failed = ft.TextButton("Hatalıları tekrar dene", icon=ft.Icons.REPLAY, visible=False)
+
+    # Playlist kuyruğu: birden çok playlist tek paylaşılan havuzda, öncelik + round-robin ile
+    priority_labels = {PRIORITY_HIGH: "Yüksek", PRIORITY_NORMAL: "Normal", PRIORITY_LOW: "Düşük"}
+    txt_queue_urls = ft.TextField(
+        label="Kuyruğa eklenecek playlist URL'leri (satır başına bir)",
+        multiline=True,
+        min_lines=2,
+        max_lines=5,
+        width=700,
+    )
+    ddl_queue_priority = ft.Dropdown(
+        label="Öncelik",
+        width=140,
+        value=str(PRIORITY_NORMAL),
+        options=[ft.dropdown.Option(str(k), v) for k, v in priority_labels.items()],
+    )
+    btn_enqueue_urls = ft.ElevatedButton("URL'leri kuyruğa ekle", icon=ft.Icons.PLAYLIST_ADD)
+    btn_enqueue_current = ft.ElevatedButton("Bu listeyi kuyruğa ekle", icon=ft.Icons.QUEUE, disabled=True)
+    btn_cancel_queue = ft.TextButton("Kuyruğu iptal et", icon=ft.Icons.CANCEL)
+    queue_view = ft.Column(spacing=4)
 
-    # store entries and checkboxes
+    # store: playlist girdileri ve satır durumları; view: arama/süzgeçle eşleşen indeksler;
+    # visible: görünen sayfadaki indeks -> satır kontrolü
     app_state = {
-        "entries": [],
-        "boxes": [],
+        "store": EntryStore(),
+        "view": [],
+        "page": 0,
+        "visible": {},
         "playlist_title": "",
         "cancel_requested": False,
+        "run": None,
         "output_dir": OUTPUT_DIR,
         "max_workers": DEFAULT_MAX_WORKERS,
+        "transcode_workers": DEFAULT_TRANSCODE_WORKERS,
         "max_retries": MAX_RETRIES,
         "verbose_logging": VERBOSE_LOGGING,
+        "adaptive": ADAPTIVE_CONCURRENCY,
+        "sync": SYNC_MODE,
+        "sync_remove": SYNC_REMOVE_DELETED,
+        "output_format": OUTPUT_FORMAT,
+        "engine": DOWNLOAD_ENGINE,
         "failed": [],
+        "queue": None,
     }
 
+    def log_ui_error(ex):
+        if app_state.get("verbose_logging", VERBOSE_LOGGING):
+            print("UI update error:", ex)
+
+    # Worker thread'leri page.update() çağırmaz; değişiklikler bu dağıtıcıda toplanıp
+    # UI_FLUSH_HZ hızında toplu olarak uygulanır (aynı kontrole gelenler birleştirilir)
+    ui = UIDispatcher(page, on_error=log_ui_error).start()
+    page.on_close = lambda e: ui.stop()
+
     def set_status(text, color=None):
-        lbl_status.value = text
-        if color:
-            lbl_status.color = color
-        page.update()
+        def apply():
+            lbl_status.value = text
+            if color:
+                lbl_status.color = color
+
+        ui.submit("status", apply)
+
+    # --- Video listesi (sayfalı) ---------------------------------------------------
+
+    def bind_row(box, idx):
+        store = app_state["store"]
+        status = store.status(idx)
+        box.data = idx
+        box.label = f"{idx + 1}. {store.title(idx)} [{status[1] if status else 'bekliyor'}]"
+        box.label_style = ft.TextStyle(color=(status[2] if status and status[2] else ft.Colors.GREY_600))
+        box.value = store.is_checked(idx)
+        box.visible = True
+
+    def render_page():
+        """Görünen sayfanın satırlarını depodan yeniden bağla; playlist boyutundan bağımsız."""
+        view = app_state["view"]
+        pages = max(1, math.ceil(len(view) / LIST_PAGE_SIZE))
+        page_no = min(app_state["page"], pages - 1)
+        app_state["page"] = page_no
+        start = page_no * LIST_PAGE_SIZE
+        visible = view[start : start + LIST_PAGE_SIZE]
+        for slot, box in enumerate(row_boxes):
+            if slot < len(visible):
+                bind_row(box, visible[slot])
+            else:
+                box.data = None
+                box.visible = False
+        app_state["visible"] = dict(zip(visible, row_boxes))
+        total = len(app_state["store"])
+        lbl_page.value = f"Sayfa {page_no + 1}/{pages} ({len(view)}/{total} video)" if total else ""
+        btn_prev_page.disabled = page_no == 0
+        btn_next_page.disabled = page_no >= pages - 1
+
+    def filter_active():
+        return bool((txt_search.value or "").strip()) or state_filters[ddl_state_filter.value or "all"][1] is not None
+
+    def refresh_view(reset_page=True):
+        """Arama ve durum süzgecini depoya uygula, sayfayı yeniden çiz."""
+        states = state_filters[ddl_state_filter.value or "all"][1]
+        app_state["view"] = app_state["store"].search(txt_search.value, states)
+        if reset_page:
+            app_state["page"] = 0
+        render_page()
+
+    def reset_list(store):
+        app_state["store"] = store
+        app_state["page"] = 0
+        refresh_view()
+
+    def current_playlist_dir():
+        """Senkron modunda playlist'e ait kalıcı klasör, aksi halde tarihli yeni klasör."""
+        if app_state.get("sync"):
+            return playlist_sync_dir(app_state["playlist_title"], app_state.get("playlist_id"))
+        return playlist_output_dir(app_state["playlist_title"], len(app_state["store"]))
 
     def on_fetch_click(e):
         url = txt_playlist.value.strip()
@@ -81,45 +291,47 @@ def main(page: ft.Page):
         btn_fetch.disabled = True
         btn_download_all.disabled = True
         btn_download_selected.disabled = True
-        list_view.controls.clear()
+        btn_enqueue_current.disabled = True
+        reset_list(EntryStore())
         lbl_playlist_info.value = ""
         page.update()
 
         def worker():
             try:
-                result = fetch_playlist_info(url, verbose=app_state.get("verbose_logging", VERBOSE_LOGGING))
-                entries = result["entries"]
+                result = fetch_playlist_info(
+                    url,
+                    verbose=app_state.get("verbose_logging", VERBOSE_LOGGING),
+                    flat=FLAT_PLAYLIST_FETCH,
+                )
                 playlist_title = result.get("title") or ""
-                if not entries:
+                store = EntryStore()
+                app_state["store"] = store
+                app_state["playlist_title"] = playlist_title
+                app_state["playlist_id"] = result.get("id")
+                lbl_playlist_info.value = f"Oynatma listesi: {playlist_title}"
+
+                # Girdiler (flat modda) sayfa sayfa gelir; görünen sayfa parti parti yenilenir
+                for ent in result["entries"]:
+                    store.append(ent)
+                    if len(store) % FETCH_RENDER_BATCH == 0:
+                        ui.submit("list", lambda: refresh_view(reset_page=False))
+                        set_status(f"Oynatma listesi alınıyor... {len(store)} video", None)
+                ui.submit("list", lambda: refresh_view(reset_page=False))
+
+                if not len(store):
                     set_status("Oynatma listesi bulunamadı veya boş.", "red")
                     btn_fetch.disabled = False
-                    page.update()
+                    ui.request_update()
                     return
-                app_state["entries"] = entries
-                app_state["boxes"] = []
-                app_state["playlist_title"] = playlist_title
                 # playlist için alt klasör oluştur
-                safe_title = sanitize_for_fs(playlist_title)
-                count = len(entries)
-                today_str = date.today().isoformat()
-                folder_name = f"{safe_title}_{count}_video_{today_str}"
-                playlist_dir = os.path.join(OUTPUT_DIR, folder_name)
+                playlist_dir = current_playlist_dir()
                 os.makedirs(playlist_dir, exist_ok=True)
                 app_state["output_dir"] = playlist_dir
-                def build_list():
-                    list_view.controls.clear()
-                    app_state["boxes"].clear()
-                    for idx, ent in enumerate(entries):
-                        box = ft.Checkbox(label=f"{idx+1}. {ent['title']} [bekliyor]", value=False)
-                        box.label_style = ft.TextStyle(color=ft.Colors.GREY_600)
-                        app_state["boxes"].append(box)
-                        list_view.controls.append(box)
-                    btn_download_all.disabled = False
-                    btn_download_selected.disabled = False
-                    page.update()
-                build_list()
-                lbl_playlist_info.value = f"Oynatma listesi: {playlist_title} ({len(entries)} video)"
-                set_status(f"{len(entries)} video bulundu.", "green")
+                btn_download_all.disabled = False
+                btn_download_selected.disabled = False
+                btn_enqueue_current.disabled = False
+                lbl_playlist_info.value = f"Oynatma listesi: {playlist_title} ({len(store)} video)"
+                set_status(f"{len(store)} video bulundu.", "green")
             except Exception as ex:
                 tb = traceback.format_exc()
                 print(tb)
@@ -127,165 +339,147 @@ def main(page: ft.Page):
                 set_status(friendly, "red")
             finally:
                 btn_fetch.disabled = False
-                page.update()
+                ui.request_update()
 
         threading.Thread(target=worker, daemon=True).start()
 
-    def download_worker(items, single_mode=False):
-        """items: list of (orig_index, video_id, title, url)  — paralel indirme + retry"""
+    # runner.DownloadRun durumlarının satır etiketleri ve renkleri
+    state_labels = {
+        runner.DOWNLOADING: ("indiriliyor", ft.Colors.BLUE),
+        runner.WAITING_TRANSCODE: ("dönüştürme bekliyor", ft.Colors.INDIGO),
+        runner.TRANSCODING: ("dönüştürülüyor", ft.Colors.INDIGO),
+        runner.DONE: ("başarılı", ft.Colors.GREEN),
+        runner.SKIPPED: ("zaten indirildi", ft.Colors.GREEN),
+        runner.LINKED: ("kütüphaneden", ft.Colors.GREEN),
+        runner.RETRYING: ("tekrar deneniyor", ft.Colors.RED),
+        runner.FAILED: ("hata", ft.Colors.RED),
+        runner.CANCELLED: ("iptal edildi", ft.Colors.GREY_600),
+    }
+    status_colors = {"info": None, "success": "green", "error": "red"}
+
+    def apply_row_status(orig_index, state, status_tag, color=None):
+        """Öğenin durumunu depoya yaz; satır görünen sayfadaysa kontrolünü güncelle."""
+        store = app_state["store"]
+        if orig_index >= len(store):
+            return
+        store.set_status(orig_index, state, status_tag, color)
+        box = app_state["visible"].get(orig_index)
+        if box is not None and box.data == orig_index:
+            bind_row(box, orig_index)
+        if state_filters[ddl_state_filter.value or "all"][1] is not None:
+            # Durum süzgeci açıksa eşleşen küme değişmiş olabilir (karede en fazla bir kez)
+            ui.submit("list", lambda: refresh_view(reset_page=False))
+
+    def download_worker(items, single_mode=False, order_indices=None):
+        """items: list of (orig_index, video_id, title, url)  — iki aşamalı pipeline (indirme -> dönüştürme) + retry
+
+        order_indices verilirse dosya adlarındaki sıra numarası (N.) için kullanılır
+        (ör. yarım kalan bir işi sürdürürken); verilmezse items içindeki sıra kullanılır.
+        """
         total = len(items)
         if total == 0:
             return
+        if order_indices is None:
+            order_indices = list(range(total))
 
-        max_workers = min(app_state.get("max_workers", DEFAULT_MAX_WORKERS), total)
         app_state["cancel_requested"] = False
         app_state["failed"] = []
         progress_bar.visible = True
         progress_bar.value = 0.0
         progress_text.value = ""
         btn_cancel.disabled = False
-        page.update()
-
-        completed = 0
-
-        def update_box_label(orig_index, status_tag, color=None):
-            try:
-                box = app_state["boxes"][orig_index]
-                title_part = box.label
-                # strip eski köşeli etiket
-                if "[" in title_part:
-                    title_part = title_part.split("[")[0].strip()
-                box.label = f"{title_part} [{status_tag}]"
-                # Varsayılan renkleri status_tag'e göre seç
-                if color is None:
-                    if status_tag == "bekliyor":
-                        color = ft.Colors.GREY_600
-                    elif status_tag == "indiriliyor":
-                        color = ft.Colors.BLUE
-                    elif status_tag == "başarılı":
-                        color = ft.Colors.GREEN
-                    elif status_tag == "tekrar deneniyor":
-                        color = ft.Colors.AMBER
-                    elif status_tag == "hata":
-                        color = ft.Colors.RED
-                    elif status_tag == "zaten indirildi":
-                        color = ft.Colors.GREEN_700
-                if color:
-                    box.label_style = ft.TextStyle(color=color)
-            except Exception:
-                pass
-
-        def download_task(orig_index, display_index, video_id, title, url):
-            if app_state["cancel_requested"]:
-                return False
-
-            target_dir = app_state.get("output_dir", OUTPUT_DIR)
-
-            # Önce aynı sıra numarasıyla (1., 2., 3. ...) başlayan bir mp3 zaten var mı kontrol et
-            try:
-                already_exists = False
-                order_prefix = f"{display_index + 1}.".lower()
-                for f in os.listdir(target_dir):
-                    lower = f.lower()
-                    if lower.endswith(".mp3") and lower.startswith(order_prefix):
-                        already_exists = True
-                        break
-                if already_exists:
-                    update_box_label(orig_index, "zaten indirildi", ft.Colors.GREEN)
-                    set_status(f"Atlandı (zaten mevcut): {title}", "green")
-                    return True
-            except Exception:
-                # Eğer burada bir hata olursa normal indirme akışına devam et
-                pass
-
-            attempts = 0
-            last_error = None
-
-            current_max_retries = app_state.get("max_retries", MAX_RETRIES)
-
-            while attempts < current_max_retries and not app_state["cancel_requested"]:
-                attempts += 1
-                try:
-                    update_box_label(orig_index, "indiriliyor")
-                    set_status(f"{display_index + 1}/{total} indiriliyor (deneme {attempts}): {title}")
-                    filepath = download_as_mp3(
-                        url,
-                        target_dir,
-                        progress_callback=None,
-                        verbose=app_state.get("verbose_logging", VERBOSE_LOGGING),
-                        order_index=display_index,
-                        title_override=title,
-                    )
-                    update_box_label(orig_index, "başarılı", ft.Colors.GREEN)
-                    set_status(f"Tamamlandı: {os.path.basename(filepath)}", "green")
-                    return True
-                except Exception as ex:
-                    last_error = ex
-                    if app_state.get("verbose_logging", VERBOSE_LOGGING):
-                        print("Download error:", ex)
-                    if attempts < current_max_retries:
-                        update_box_label(orig_index, "tekrar deneniyor", ft.Colors.RED)
-                        friendly = describe_error(ex)
-                        set_status(
-                            f"İndirme hatası, tekrar denenecek (deneme {attempts}): {title}\n{friendly}",
-                            "red",
-                        )
-                    else:
-                        update_box_label(orig_index, "hata", ft.Colors.RED)
-                        friendly = describe_error(ex)
-                        set_status(
-                            f"İndirme başarısız ({attempts} deneme): {title}\n{friendly}",
-                            "red",
-                        )
-                        app_state["failed"].append((orig_index, title, ex))
-            return False
-
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_item = {
-                executor.submit(download_task, orig_idx, idx, video_id, title, url): (orig_idx, video_id, title, url)
-                for idx, (orig_idx, video_id, title, url) in enumerate(items)
-            }
-
-            for future in as_completed(future_to_item):
-                if app_state["cancel_requested"]:
-                    set_status("İndirme iptal edildi.", "red")
-                    break
-
-                _orig_idx, _vid, _title, _url = future_to_item[future]
-                try:
-                    _ = future.result()
-                except Exception as ex:
-                    if app_state.get("verbose_logging", VERBOSE_LOGGING):
-                        print("Unexpected worker error:", ex)
-
-                completed += 1
-                progress_bar.value = completed / total
-                progress_text.value = f"{completed}/{total} tamamlandı"
-                page.update()
+        ui.request_update()
+
+        def on_item_state(item, state, detail):
+            orig_index = item[0]
+            status_tag, color = state_labels.get(state, (state, None))
+            if state == runner.DOWNLOADING:
+                parts = []
+                total_bytes = detail.get("total_bytes")
+                if total_bytes:
+                    parts.append(f"%{100.0 * (detail.get('downloaded_bytes') or 0) / total_bytes:.0f}")
+                if detail.get("speed"):
+                    parts.append(f"{format_bytes(detail['speed'])}/sn")
+                status_tag = " ".join([status_tag] + parts)
+            elif state == runner.RETRYING and detail.get("delay") is not None:
+                status_tag = f"{status_tag} ({detail['delay']:.0f} sn)"
+            ui.submit(("box", orig_index), lambda: apply_row_status(orig_index, state, status_tag, color))
+
+        def on_status(text, level):
+            set_status(text, status_colors.get(level))
+
+        def on_progress(tracker):
+            def apply():
+                snap = tracker.snapshot()
+                progress_bar.value = snap["items_finished"] / total
+                progress_text.value = tracker.summary_text()
+
+            ui.submit("progress", apply)
+
+        run = run_class(app_state.get("engine", DOWNLOAD_ENGINE))(
+            [
+                (orig_idx, order_idx, video_id, title, url)
+                for order_idx, (orig_idx, video_id, title, url) in zip(order_indices, items)
+            ],
+            app_state.get("output_dir", OUTPUT_DIR),
+            playlist_title=app_state.get("playlist_title"),
+            max_workers=app_state.get("max_workers", DEFAULT_MAX_WORKERS),
+            transcode_workers=app_state.get("transcode_workers", DEFAULT_TRANSCODE_WORKERS),
+            max_retries=app_state.get("max_retries", MAX_RETRIES),
+            verbose=app_state.get("verbose_logging", VERBOSE_LOGGING),
+            adaptive=app_state.get("adaptive", ADAPTIVE_CONCURRENCY),
+            output_format=app_state.get("output_format", OUTPUT_FORMAT),
+            durations=app_state["store"].durations(
+                [orig_idx for orig_idx, *_ in items if orig_idx < len(app_state["store"])]
+            ),
+            on_item_state=on_item_state,
+            on_status=on_status,
+            on_progress=on_progress,
+        )
+        app_state["run"] = run
+        if app_state["cancel_requested"]:
+            run.cancel()
+        summary = run.run()
+        app_state["run"] = None
+        app_state["failed"] = run.failed
 
         btn_cancel.disabled = True
         progress_bar.visible = False
+        cancelled = app_state["cancel_requested"]
         app_state["cancel_requested"] = False
-        target_dir = app_state.get("output_dir", OUTPUT_DIR)
+        target_dir = summary["output_dir"]
 
         if app_state["failed"]:
             failed_titles = [title for (_i, title, _e) in app_state["failed"]]
-            summary = f"{len(failed_titles)} videoda hata oluştu:\n" + "\n".join(
+            summary_text = f"{len(failed_titles)} videoda hata oluştu:\n" + "\n".join(
                 f"- {t}" for t in failed_titles
             )
-            lbl_failed.value = summary
+            lbl_failed.value = summary_text
+            app_state["retry_dir"] = target_dir
+            btn_retry_failed.visible = True
         else:
             lbl_failed.value = ""
+            btn_retry_failed.visible = False
+
+        if app_state.get("verbose_logging", VERBOSE_LOGGING):
+            print(f"Motor: {summary['engine']}, {summary['elapsed_seconds']:.1f} sn")
+            stats = ui.stats()
+            print(
+                "UI dispatcher: {submitted} güncelleme, {applied} uygulandı, {coalesced} birleştirildi, "
+                "{flushes} page.update ({flush_seconds:.2f} sn)".format(**stats)
+            )
 
-        set_status(f"İndirme işlemi bitti. Dosyalar: {target_dir}", "green")
-        page.update()
+        if cancelled:
+            quiesce = summary["quiesce_seconds"] or 0.0
+            set_status(f"İndirme iptal edildi ({quiesce:.1f} sn içinde durdu). Dosyalar: {target_dir}", "red")
+        else:
+            set_status(f"İndirme işlemi bitti. Dosyalar: {target_dir}", "green")
+        ui.request_update()
 
     def on_download_selected(e):
         # collect checked
-        checked = []
-        for idx, (box, ent) in enumerate(zip(app_state["boxes"], app_state["entries"])):
-            if box.value:
-                checked.append((idx, ent.get("id"), ent["title"], ent["url"]))
+        store = app_state["store"]
+        checked = [store.item(idx) for idx in store.checked_indices()]
         if not checked:
             set_status("Seçili video yok.", "red")
             return
@@ -296,15 +490,49 @@ def main(page: ft.Page):
             download_worker(checked)
             btn_download_selected.disabled = False
             btn_download_all.disabled = False
-            page.update()
+            ui.request_update()
 
         threading.Thread(target=run_download_selected, daemon=True).start()
 
+    def run_sync():
+        """Kalıcı klasörü playlist'in güncel haliyle karşılaştır; sadece farkı indir."""
+        output_dir = current_playlist_dir()
+        app_state["output_dir"] = output_dir
+        verbose = app_state.get("verbose_logging", VERBOSE_LOGGING)
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            manifest = get_manifest(output_dir)
+            plan = plan_sync(manifest, app_state["store"].entries(), output_dir)
+            result = apply_sync(manifest, plan, remove_deleted=app_state.get("sync_remove", SYNC_REMOVE_DELETED), verbose=verbose)
+        except Exception as ex:
+            if verbose:
+                traceback.print_exc()
+            set_status(describe_error(ex), "red")
+            return
+        for order_index, _ent, _path in plan.unchanged:
+            ui.submit(
+                ("box", order_index),
+                lambda i=order_index: apply_row_status(i, runner.SKIPPED, "zaten indirildi", ft.Colors.GREEN),
+            )
+        for _vid, _old, _new, order_index, _title in plan.renames:
+            ui.submit(
+                ("box", order_index),
+                lambda i=order_index: apply_row_status(i, runner.SKIPPED, "yeniden adlandırıldı", ft.Colors.GREEN),
+            )
+        set_status(
+            f"Senkronizasyon: {len(plan.downloads)} yeni, {result['renamed']} yeniden adlandırıldı, "
+            f"{result['removed']} silindi, {len(plan.unchanged)} değişmedi.",
+            "green",
+        )
+        if plan.downloads:
+            download_worker(
+                [(idx, ent.get("id"), ent["title"], ent["url"]) for idx, ent in plan.downloads],
+                order_indices=[idx for idx, _ent in plan.downloads],
+            )
+
     def on_download_all(e):
-        entries = [
-            (idx, ent.get("id"), ent["title"], ent["url"])
-            for idx, ent in enumerate(app_state["entries"])
-        ]
+        store = app_state["store"]
+        entries = [store.item(idx) for idx in range(len(store))]
         if not entries:
             set_status("İndirilecek video yok.", "red")
             return
@@ -312,16 +540,33 @@ def main(page: ft.Page):
         btn_download_all.disabled = True
         page.update()
         def run_download_all():
-            download_worker(entries)
+            if app_state.get("sync"):
+                run_sync()
+            else:
+                download_worker(entries)
             btn_download_selected.disabled = False
             btn_download_all.disabled = False
-            page.update()
+            ui.request_update()
 
         threading.Thread(target=run_download_all, daemon=True).start()
 
     def on_check_all(e):
-        for b in app_state["boxes"]:
-            b.value = chk_all.value
+        # Arama/süzgeç açıksa sadece eşleşen öğeler seçilir
+        app_state["store"].set_all_checked(chk_all.value, app_state["view"] if filter_active() else None)
+        render_page()
+        page.update()
+
+    def on_row_checked(e):
+        if e.control.data is not None:
+            app_state["store"].set_checked(e.control.data, e.control.value)
+
+    def on_search_change(e):
+        refresh_view()
+        page.update()
+
+    def on_page_change(delta):
+        app_state["page"] = max(0, app_state["page"] + delta)
+        render_page()
         page.update()
 
     def on_max_workers_change(e):
@@ -331,6 +576,13 @@ def main(page: ft.Page):
             app_state["max_workers"] = DEFAULT_MAX_WORKERS
         page.update()
 
+    def on_transcode_workers_change(e):
+        try:
+            app_state["transcode_workers"] = int(e.control.value)
+        except Exception:
+            app_state["transcode_workers"] = DEFAULT_TRANSCODE_WORKERS
+        page.update()
+
     def on_max_retries_change(e):
         try:
             value = int(e.control.value)
@@ -343,25 +595,342 @@ def main(page: ft.Page):
         except Exception:
             app_state["max_retries"] = MAX_RETRIES
             txt_max_retries.value = str(MAX_RETRIES)
+        # Sürmekte olan çalıştırma bir sonraki denemede yeni değeri kullanır
+        if app_state.get("run") is not None:
+            app_state["run"].max_retries = app_state["max_retries"]
+        page.update()
+
+    def on_rate_limit_change(e):
+        # Paylaşılan sınırlayıcı güncellenir; aktif indirmeler bir sonraki veri bloğunda yeni hıza geçer
+        try:
+            get_bandwidth_limiter().set_rate(parse_rate(e.control.value))
+            txt_rate_limit.error_text = None
+        except ValueError as ex:
+            txt_rate_limit.error_text = str(ex)
         page.update()
 
     def on_verbose_toggle(e):
         app_state["verbose_logging"] = bool(e.control.value)
+        if app_state.get("run") is not None:
+            app_state["run"].verbose = app_state["verbose_logging"]
+        page.update()
+
+    def on_adaptive_toggle(e):
+        app_state["adaptive"] = bool(e.control.value)
+        page.update()
+
+    def apply_format_labels():
+        short = format_labels.get(app_state["output_format"], (None, None))[1]
+        suffix = f" {short}" if short else ""
+        btn_download_selected.text = f"Seçileni{suffix} indir"
+        btn_download_all.text = f"Hepsini{suffix} indir"
+
+    def on_output_format_change(e):
+        app_state["output_format"] = e.control.value or OUTPUT_FORMAT
+        apply_format_labels()
+        page.update()
+
+    def on_engine_change(e):
+        app_state["engine"] = e.control.value or DOWNLOAD_ENGINE
+        page.update()
+
+    def on_sync_toggle(e):
+        app_state["sync"] = bool(e.control.value)
+        if len(app_state["store"]):
+            app_state["output_dir"] = current_playlist_dir()
+        page.update()
+
+    def on_sync_remove_toggle(e):
+        app_state["sync_remove"] = bool(e.control.value)
         page.update()
 
     def on_cancel(e):
         app_state["cancel_requested"] = True
-        set_status("İptal isteği gönderildi, mevcut indirme tamamlandıktan sonra duracak.", "red")
+        run = app_state.get("run")
+        if run is not None:
+            # Kuyruktakiler hemen iptal edilir; aktif indirme/ffmpeg süreçleri birkaç yüz ms içinde kesilir
+            run.cancel()
+        set_status("İptal ediliyor... aktif indirmeler ve dönüştürmeler durduruluyor.", "red")
         page.update()
 
     def on_reset_defaults(e):
         app_state["max_workers"] = DEFAULT_MAX_WORKERS
+        app_state["transcode_workers"] = DEFAULT_TRANSCODE_WORKERS
         app_state["max_retries"] = MAX_RETRIES
         app_state["verbose_logging"] = VERBOSE_LOGGING
+        app_state["adaptive"] = ADAPTIVE_CONCURRENCY
+        app_state["output_format"] = OUTPUT_FORMAT
+        app_state["engine"] = DOWNLOAD_ENGINE
 
         ddl_max_workers.value = str(DEFAULT_MAX_WORKERS)
+        ddl_transcode_workers.value = str(DEFAULT_TRANSCODE_WORKERS)
         txt_max_retries.value = str(MAX_RETRIES)
         sw_verbose.value = VERBOSE_LOGGING
+        sw_adaptive.value = ADAPTIVE_CONCURRENCY
+        ddl_output_format.value = OUTPUT_FORMAT
+        ddl_engine.value = DOWNLOAD_ENGINE
+        apply_format_labels()
+        txt_rate_limit.value = str(BANDWIDTH_LIMIT or "")
+        txt_rate_limit.error_text = None
+        get_bandwidth_limiter().set_rate(BANDWIDTH_LIMIT)
+        page.update()
+
+    def on_rebuild_manifest(e):
+        target_dir = app_state.get("output_dir", OUTPUT_DIR)
+        try:
+            count = get_manifest(target_dir).rebuild(entries=app_state["store"].entries() or None)
+            set_status(f"Klasör yeniden tarandı: {count} dosya kayıtlı ({target_dir})", "green")
+        except Exception as ex:
+            set_status(describe_error(ex), "red")
+
+    def check_resumable():
+        """Açılışta, önceki çalıştırmadan bitmemiş iş kalmış mı kontrol et."""
+        try:
+            pending = get_job_store().resumable()
+        except Exception as ex:
+            if app_state.get("verbose_logging", VERBOSE_LOGGING):
+                print("Job store error:", ex)
+            return
+        if not pending:
+            resume_row.visible = False
+            return
+        # En son güncellenen klasör önce gelir
+        output_dir, pending_jobs = next(iter(pending.items()))
+        app_state["resume_dir"] = output_dir
+        playlist_title = pending_jobs[0].get("playlist_title") or os.path.basename(output_dir)
+        lbl_resume.value = f"Yarım kalan indirme: {playlist_title} ({len(pending_jobs)} video bekliyor)"
+        resume_row.visible = True
+
+    def restart_jobs(output_dir, states):
+        """Klasörün iş kayıtlarından listeyi yeniden kur ve durumu states içinde olan öğeleri indir."""
+        all_jobs = get_job_store().jobs_for(output_dir)
+        if not any(job["state"] in states for job in all_jobs):
+            return False
+        os.makedirs(output_dir, exist_ok=True)
+        store = EntryStore({"id": j["video_id"], "title": j["title"], "url": j["url"]} for j in all_jobs)
+        app_state["output_dir"] = output_dir
+        app_state["playlist_title"] = all_jobs[0].get("playlist_title") or ""
+        reset_list(store)
+        lbl_playlist_info.value = f"Oynatma listesi: {app_state['playlist_title']} ({len(store)} video)"
+
+        items = []
+        order_indices = []
+        for idx, job in enumerate(all_jobs):
+            if job["state"] not in states:
+                continue
+            items.append((idx, job["video_id"], job["title"], job["url"]))
+            order_indices.append(job["order_index"])
+
+        resume_row.visible = False
+        btn_retry_failed.visible = False
+        btn_download_selected.disabled = True
+        btn_download_all.disabled = True
+        page.update()
+
+        def run_resume():
+            download_worker(items, order_indices=order_indices)
+            btn_download_selected.disabled = False
+            btn_download_all.disabled = False
+            ui.request_update()
+
+        threading.Thread(target=run_resume, daemon=True).start()
+        return True
+
+    def on_resume(e):
+        output_dir = app_state.get("resume_dir")
+        if output_dir and not restart_jobs(output_dir, jobs.RESUMABLE_STATES):
+            check_resumable()
+            page.update()
+
+    def on_retry_failed(e):
+        """Son indirmede kalıcı hatayla biten öğeleri açıkça yeniden kuyruğa al."""
+        output_dir = app_state.get("retry_dir")
+        if output_dir and not restart_jobs(output_dir, (jobs.FAILED,)):
+            btn_retry_failed.visible = False
+            page.update()
+
+    def on_resume_dismiss(e):
+        output_dir = app_state.pop("resume_dir", None)
+        if output_dir:
+            get_job_store().forget(output_dir)
+        check_resumable()
+        page.update()
+
+    # --- Playlist kuyruğu ---------------------------------------------------------
+
+    queue_state_labels = {
+        playlist_queue.QUEUED: ("sırada", ft.Colors.GREY_600),
+        playlist_queue.RUNNING: ("indiriliyor", ft.Colors.BLUE),
+        playlist_queue.FINISHED: ("bitti", ft.Colors.GREEN),
+        playlist_queue.CANCELLED: ("iptal edildi", ft.Colors.GREY_600),
+    }
+
+    def get_queue():
+        """Paylaşılan kuyruğu döndür; yoksa güncel paralellik ayarlarıyla oluştur."""
+        queue = app_state.get("queue")
+        if queue is None or (queue.cancel_event.is_set() and not queue.running):
+            queue = PlaylistQueue(
+                max_workers=app_state.get("max_workers", DEFAULT_MAX_WORKERS),
+                transcode_workers=app_state.get("transcode_workers", DEFAULT_TRANSCODE_WORKERS),
+                on_playlist_state=on_queue_state,
+            )
+            app_state["queue"] = queue
+        return queue
+
+    # DownloadRun -> kuyruk satırının kontrolleri (durum bildirimi add() dönmeden gelebilir)
+    queue_rows = {}
+
+    def on_queue_state(entry):
+        row = queue_rows.get(entry.run)
+        if row is None:
+            return
+        label, color = queue_state_labels.get(entry.state, (entry.state, None))
+
+        def apply():
+            row["state"].value = label
+            row["state"].color = color
+            if entry.state in (playlist_queue.FINISHED, playlist_queue.CANCELLED):
+                row["cancel"].disabled = True
+                summary = entry.summary or {}
+                if summary.get("failed"):
+                    row["state"].value = f"{label}, {summary['failed']} hata"
+                    row["state"].color = ft.Colors.RED
+
+        ui.submit(("queue-state", entry.id), apply)
+        if entry.state in (playlist_queue.FINISHED, playlist_queue.CANCELLED):
+            set_status(f"Kuyruk: {entry.title} {label}. Dosyalar: {entry.run.output_dir}", color)
+
+    def enqueue_playlist(title, entries, output_dir, priority, item_indices=None):
+        """Playlist'in (veya seçili öğelerinin) DownloadRun'ını kuyruğa ekle ve satırını göster."""
+        indices = list(range(len(entries))) if item_indices is None else list(item_indices)
+        row = {
+            "title": ft.Text(f"{title} ({len(indices)} video)", width=260, no_wrap=True),
+            "bar": ft.ProgressBar(width=200, value=0.0),
+            "text": ft.Text("", size=12, width=260),
+            "state": ft.Text("sırada", size=12, width=110),
+            "priority": ft.Dropdown(
+                width=120,
+                value=str(priority),
+                options=[ft.dropdown.Option(str(k), v) for k, v in priority_labels.items()],
+            ),
+            "cancel": ft.IconButton(icon=ft.Icons.CLOSE, tooltip="Bu playlist'i iptal et"),
+        }
+
+        def on_progress(tracker):
+            def apply():
+                snap = tracker.snapshot()
+                row["bar"].value = snap["items_finished"] / max(1, len(indices))
+                row["text"].value = tracker.summary_text()
+
+            ui.submit(("queue-progress", output_dir), apply)
+
+        run = DownloadRun(
+            [(idx, idx, entries[idx].get("id"), entries[idx]["title"], entries[idx]["url"]) for idx in indices],
+            output_dir,
+            playlist_title=title,
+            max_retries=app_state.get("max_retries", MAX_RETRIES),
+            transcode_workers=app_state.get("transcode_workers", DEFAULT_TRANSCODE_WORKERS),
+            verbose=app_state.get("verbose_logging", VERBOSE_LOGGING),
+            output_format=app_state.get("output_format", OUTPUT_FORMAT),
+            durations={idx: entries[idx].get("duration") for idx in indices},
+            on_progress=on_progress,
+        )
+        queue_rows[run] = row
+        queue = get_queue()
+        entry = queue.add(run, priority=priority)
+        row["priority"].on_change = lambda e: queue.set_priority(entry, int(e.control.value))
+        row["cancel"].on_click = lambda e: queue.cancel_playlist(entry)
+
+        def show():
+            queue_view.controls.append(
+                ft.Row([row["title"], row["bar"], row["text"], row["state"], row["priority"], row["cancel"]])
+            )
+
+        ui.submit(("queue-row", entry.id), show)
+        queue.ensure_running()
+        return entry
+
+    def queue_target(title, playlist_id, entries):
+        """Kuyruk için çıktı klasörü ve indirilecek öğe indeksleri (senkron modunda sadece fark)."""
+        if not app_state.get("sync"):
+            return playlist_output_dir(title, len(entries)), None
+        output_dir = playlist_sync_dir(title, playlist_id)
+        os.makedirs(output_dir, exist_ok=True)
+        manifest = get_manifest(output_dir)
+        plan = plan_sync(manifest, entries, output_dir)
+        apply_sync(
+            manifest,
+            plan,
+            remove_deleted=app_state.get("sync_remove", SYNC_REMOVE_DELETED),
+            verbose=app_state.get("verbose_logging", VERBOSE_LOGGING),
+        )
+        return output_dir, [idx for idx, _ent in plan.downloads]
+
+    def selected_priority():
+        try:
+            return int(ddl_queue_priority.value)
+        except (TypeError, ValueError):
+            return PRIORITY_NORMAL
+
+    def on_enqueue_current(e):
+        store = app_state["store"]
+        if not len(store):
+            set_status("Önce bir oynatma listesi getirin.", "red")
+            return
+        # Seçili video varsa sadece onlar, yoksa tüm liste; girdiler kopyalanır, yeni "Listeyi Getir" etkilemez
+        entries = store.entries()
+        checked = set(store.checked_indices())
+        title = app_state["playlist_title"]
+        priority = selected_priority()
+
+        def worker():
+            try:
+                output_dir, indices = queue_target(title, app_state.get("playlist_id"), entries)
+                if checked:
+                    indices = [idx for idx in (indices if indices is not None else range(len(entries))) if idx in checked]
+                enqueue_playlist(title, entries, output_dir, priority, indices)
+                set_status(f"Kuyruğa eklendi: {title}", "green")
+            except Exception as ex:
+                set_status(describe_error(ex), "red")
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def on_enqueue_urls(e):
+        urls = [line.strip() for line in (txt_queue_urls.value or "").splitlines()]
+        urls = [url for url in urls if url and not url.startswith("#")]
+        if not urls:
+            set_status("Kuyruğa eklenecek URL yok.", "red")
+            return
+        txt_queue_urls.value = ""
+        priority = selected_priority()
+        page.update()
+
+        def worker():
+            verbose = app_state.get("verbose_logging", VERBOSE_LOGGING)
+            for url in urls:
+                set_status(f"Kuyruk için oynatma listesi alınıyor: {url}")
+                try:
+                    result = fetch_playlist_info(url, verbose=verbose, flat=FLAT_PLAYLIST_FETCH)
+                    entries = list(result["entries"])
+                    if not entries:
+                        set_status(f"Oynatma listesi bulunamadı veya boş: {url}", "red")
+                        continue
+                    title = result.get("title") or ""
+                    output_dir, indices = queue_target(title, result.get("id"), entries)
+                    enqueue_playlist(title, entries, output_dir, priority, indices)
+                    set_status(f"Kuyruğa eklendi: {title} ({len(entries)} video)", "green")
+                except Exception as ex:
+                    if verbose:
+                        traceback.print_exc()
+                    set_status(f"{url}: {describe_error(ex)}", "red")
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def on_cancel_queue(e):
+        queue = app_state.get("queue")
+        if queue is not None:
+            queue.cancel()
+            set_status("Kuyruk iptal ediliyor...", "red")
         page.update()
 
     # Wire events
@@ -369,23 +938,52 @@ def main(page: ft.Page):
     btn_download_selected.on_click = on_download_selected
     btn_download_all.on_click = on_download_all
     chk_all.on_change = on_check_all
+    for box in row_boxes:
+        box.on_change = on_row_checked
+    txt_search.on_change = on_search_change
+    ddl_state_filter.on_change = on_search_change
+    btn_prev_page.on_click = lambda e: on_page_change(-1)
+    btn_next_page.on_click = lambda e: on_page_change(1)
     btn_cancel.on_click = on_cancel
     ddl_max_workers.on_change = on_max_workers_change
+    ddl_transcode_workers.on_change = on_transcode_workers_change
     txt_max_retries.on_change = on_max_retries_change
     sw_verbose.on_change = on_verbose_toggle
+    sw_adaptive.on_change = on_adaptive_toggle
+    txt_rate_limit.on_change = on_rate_limit_change
+    sw_sync.on_change = on_sync_toggle
+    ddl_output_format.on_change = on_output_format_change
+    ddl_engine.on_change = on_engine_change
+    chk_sync_remove.on_change = on_sync_remove_toggle
     btn_reset_defaults.on_click = on_reset_defaults
+    btn_rebuild_manifest.on_click = on_rebuild_manifest
+    btn_resume.on_click = on_resume
+    btn_resume_dismiss.on_click = on_resume_dismiss
+    btn_retry_failed.on_click = on_retry_failed
+    btn_enqueue_current.on_click = on_enqueue_current
+    btn_enqueue_urls.on_click = on_enqueue_urls
+    btn_cancel_queue.on_click = on_cancel_queue
 
     # Layout
     controls = [
         ft.Container(
             content=ft.Column(
                 [
+                    resume_row,
                     ft.Row([txt_playlist, btn_fetch]),
                     lbl_playlist_info,
                     ft.Row([chk_all, btn_download_selected, btn_download_all, btn_cancel, ddl_max_workers]),
                     ft.Text("Ayarlar:", size=14, weight=ft.FontWeight.BOLD),
-                    ft.Row([txt_max_retries, sw_verbose, btn_reset_defaults]),
+                    ft.Row([txt_max_retries, ddl_transcode_workers, sw_verbose]),
+                    ft.Row([sw_adaptive, txt_rate_limit, ddl_output_format]),
+                    ft.Row([sw_sync, chk_sync_remove, ddl_engine]),
+                    ft.Row([btn_reset_defaults, btn_rebuild_manifest]),
+                    ft.Text("Kuyruk:", size=14, weight=ft.FontWeight.BOLD),
+                    ft.Row([txt_queue_urls]),
+                    ft.Row([ddl_queue_priority, btn_enqueue_urls, btn_enqueue_current, btn_cancel_queue]),
+                    queue_view,
                     ft.Text("Videolar:", size=16),
+                    ft.Row([txt_search, ddl_state_filter, btn_prev_page, lbl_page, btn_next_page]),
                     ft.Container(
                         content=list_view,
                         height=360,
@@ -395,7 +993,7 @@ def main(page: ft.Page):
                     ),
                     progress_bar,
                     progress_text,
-                    lbl_failed,
+                    ft.Row([lbl_failed, btn_retry_failed]),
                     ft.Container(
                         content=lbl_status,
                         padding=10,
@@ -409,8 +1007,12 @@ def main(page: ft.Page):
             padding=15,
         )
     ]
+    apply_format_labels()
+    check_resumable()
     page.add(*controls)
 
 
 if __name__ == "__main__":
+    # METRICS_PORT verilmişse aşama ölçümleri tüm oturumlar için tek uç noktadan sunulur
+    start_metrics_server()
     ft.app(target=main, view=ft.WEB_BROWSER)
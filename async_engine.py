@@ -0,0 +1,712 @@
+# async_engine.py
+# asyncio tabanlı alternatif indirme motoru. Thread havuzlu pipeline'da (pipeline.py) her
+# paralel indirme ve her ffmpeg beklemesi bir thread tutar; burada hepsi tek bir event
+# loop'ta çalışan görevlerdir:
+#   - akışlar httpx.AsyncClient ile aralıklı (Range) isteklerle indirilir,
+#   - ffmpeg asyncio.create_subprocess_exec ile başlatılıp beklenir,
+#   - kuyruktaki öğeler sadece asyncio.Queue'da duran demetlerdir; görev sayısı öğe
+#     sayısıyla değil paralellik ayarıyla büyür (binlerce öğe için ek maliyet yok).
+# yt-dlp'nin engelleyici (blocking) bilgi çözümü küçük bir thread havuzunda yapılır; HLS/DASH
+# gibi tek bir HTTP dosyası olmayan akışlar ve fragment'li uzun öğeler de orada yt-dlp'nin
+# kendi indiricisine bırakılır.
+#
+# AsyncDownloadRun, DownloadRun'ın tüm durum geçişlerini, iş deposunu, manifest/kütüphane
+# adımlarını ve özetini paylaşır; sadece çalıştırma motoru farklıdır. Böylece iki motor aynı
+# playlist üzerinde A/B karşılaştırılabilir (bkz. cli.py --engine, benchmarks/offline_pipeline.py).
+import asyncio
+import contextvars
+import functools
+import os
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from cache import get_default_cache
+from config import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_TRANSCODE_WORKERS,
+    TRANSCODE_QUEUE_SIZE,
+    CANCEL_GRACE_SECONDS,
+    OUTPUT_FORMAT,
+    ASYNC_HTTP_CHUNK_SIZE,
+    ASYNC_HTTP_TIMEOUT,
+    ASYNC_EXECUTOR_WORKERS,
+)
+from downloader import (
+    DownloadCancelled,
+    audio_format_selector,
+    conversion_plan,
+    download_audio,
+    ffmpeg_failed,
+    ffmpeg_job,
+    finalize_target,
+    fragment_count,
+    library_tag,
+    publish_conversion,
+    record_finalized,
+    resolve_audio,
+    source_codec,
+)
+from metrics import get_metrics, STAGE_FORMAT_SELECT, STAGE_DOWNLOAD, STAGE_TRANSCODE, STAGE_FINALIZE
+from pipeline import RetryLater
+from runner import DownloadRun, ENGINE_ASYNCIO, _DOWNLOAD
+from staging import publish_file
+
+# Aralıklı isteklerde tek seferde okunan blok (progress ve hız sınırı bu aralıkla işlenir)
+_READ_SIZE = 64 * 1024
+
+
+class AsyncPipeline:
+    """DownloadPipeline'ın asyncio karşılığı; aynı sözleşme, ama aşama fonksiyonları coroutine'dir.
+
+    download_fn(item) -> payload | None | RetryLater   (await edilir)
+    transcode_fn(item, payload) -> bool | RetryLater   (await edilir; False/RetryLater = yeniden indir)
+    on_item_done(item), on_cancelled(item, payload)    (düz fonksiyonlar, loop thread'inden)
+    on_error(item, ex, stage)                          (aşama fonksiyonundan kaçan istisna)
+
+    download_workers / transcode_workers kadar uzun ömürlü görev kuyruktan öğe çeker;
+    download_limit (concurrency.AdjustableLimit) verilirse aynı anda kaç indirmenin
+    yapılacağını o belirler.
+    Her iki aşamada RetryLater ile ertelenen öğeler loop.call_later ile kuyruğa geri
+    döner. cancel() herhangi bir thread'den çağrılabilir.
+    """
+
+    def __init__(
+        self,
+        download_fn,
+        transcode_fn,
+        download_workers=DEFAULT_MAX_WORKERS,
+        transcode_workers=DEFAULT_TRANSCODE_WORKERS,
+        queue_size=TRANSCODE_QUEUE_SIZE,
+        on_item_done=None,
+        on_cancelled=None,
+        cancel_event=None,
+        cancel_grace=CANCEL_GRACE_SECONDS,
+        download_limit=None,
+        on_error=None,
+    ):
+        self.download_fn = download_fn
+        self.transcode_fn = transcode_fn
+        self.download_workers = max(1, int(download_workers))
+        self.transcode_workers = max(1, int(transcode_workers))
+        self.queue_size = max(1, int(queue_size))
+        self.on_item_done = on_item_done
+        self.on_cancelled = on_cancelled
+        self.on_error = on_error
+        self.cancel_event = cancel_event or threading.Event()
+        self.cancel_grace = cancel_grace
+        self.download_limit = download_limit
+        self.cancel_requested_at = None
+        self.quiesce_seconds = None
+        self.deferred_total = 0
+        self._loop = None
+        self._input = None
+        self._transcode_queue = None
+        self._done = None
+        self._pending = 0
+        # call_later tutamacı -> ertelenmiş öğe
+        self._deferred = {}
+
+    def _finish(self, item):
+        if self.on_item_done:
+            try:
+                self.on_item_done(item)
+            except Exception:
+                pass
+        self._pending -= 1
+        if self._pending <= 0:
+            self._done.set()
+
+    def _finish_cancelled(self, item, payload=None):
+        if self.on_cancelled:
+            try:
+                self.on_cancelled(item, payload)
+            except Exception:
+                pass
+        self._finish(item)
+
+    def _stage_failed(self, item, ex, stage):
+        if self.on_error:
+            try:
+                self.on_error(item, ex, stage)
+                return
+            except Exception:
+                pass
+        traceback.print_exception(type(ex), ex, ex.__traceback__, file=sys.stderr)
+
+    def _defer(self, item, delay):
+        handle = None
+
+        def release():
+            self._deferred.pop(handle, None)
+            self._input.put_nowait(item)
+
+        handle = self._loop.call_later(delay, release)
+        self._deferred[handle] = item
+        self.deferred_total += 1
+
+    def _drain(self):
+        """Henüz başlamamış öğeleri (kuyruklarda ve ertelenmişlerde) işlemeden bitir."""
+        deferred, self._deferred = self._deferred, {}
+        for handle, item in deferred.items():
+            handle.cancel()
+            self._finish_cancelled(item)
+        while not self._input.empty():
+            self._finish_cancelled(self._input.get_nowait())
+        while not self._transcode_queue.empty():
+            item, payload = self._transcode_queue.get_nowait()
+            self._finish_cancelled(item, payload)
+
+    def cancel(self):
+        """Kuyruktaki öğeleri iptal et (thread-safe); aktif işler cancel_event ile kesilir."""
+        if self.cancel_requested_at is None:
+            self.cancel_requested_at = time.monotonic()
+        self.cancel_event.set()
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self._drain)
+            except RuntimeError:
+                pass
+
+    async def _download_loop(self):
+        while True:
+            item = await self._input.get()
+            if self.cancel_event.is_set():
+                self._finish_cancelled(item)
+                continue
+            if self.download_limit is not None and not await self.download_limit.acquire_async(self.cancel_event):
+                self._finish_cancelled(item)
+                continue
+            try:
+                payload = await self.download_fn(item)
+            except Exception as ex:
+                self._stage_failed(item, ex, "download")
+                payload = None
+            finally:
+                if self.download_limit is not None:
+                    self.download_limit.release()
+            if payload is None:
+                self._finish(item)
+                continue
+            if isinstance(payload, RetryLater):
+                if self.cancel_event.is_set():
+                    self._finish_cancelled(item)
+                else:
+                    self._defer(item, payload.delay)
+                continue
+            if self.cancel_event.is_set():
+                self._finish_cancelled(item, payload)
+                continue
+            # Kuyruk doluysa dönüştürücüler yetişene kadar bekle (backpressure)
+            await self._transcode_queue.put((item, payload))
+
+    async def _transcode_loop(self):
+        while True:
+            item, payload = await self._transcode_queue.get()
+            if self.cancel_event.is_set():
+                self._finish_cancelled(item, payload)
+                continue
+            try:
+                finished = await self.transcode_fn(item, payload)
+            except Exception as ex:
+                self._stage_failed(item, ex, "transcode")
+                finished = True
+            if self.cancel_event.is_set():
+                self._finish(item)
+            elif isinstance(finished, RetryLater):
+                self._defer(item, finished.delay)
+            elif finished:
+                self._finish(item)
+            else:
+                self._input.put_nowait(item)
+
+    async def run(self, items):
+        """Tüm öğeleri işle; hepsi bitene veya iptal sonrası bekleme süresi dolana kadar sürer."""
+        items = list(items)
+        if not items:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._input = asyncio.Queue()
+        self._transcode_queue = asyncio.Queue(maxsize=self.queue_size)
+        self._done = asyncio.Event()
+        self._pending = len(items)
+        for item in items:
+            self._input.put_nowait(item)
+
+        tasks = [
+            asyncio.create_task(self._download_loop(), name=f"download-{i}")
+            for i in range(min(self.download_workers, len(items)))
+        ]
+        tasks += [
+            asyncio.create_task(self._transcode_loop(), name=f"transcode-{i}")
+            for i in range(min(self.transcode_workers, len(items)))
+        ]
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._done.wait(), 0.1)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+                if not self.cancel_event.is_set():
+                    continue
+                # cancel_event dışarıdan (DownloadRun.cancel) set edilmiş olabilir
+                if self.cancel_requested_at is None:
+                    self.cancel_requested_at = time.monotonic()
+                self._drain()
+                # Kesilemeyen bir çağrı (ör. executor'daki extract isteği) varsa sonsuza dek bekleme
+                if time.monotonic() - self.cancel_requested_at > self.cancel_grace:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self.cancel_requested_at is not None:
+                self.quiesce_seconds = time.monotonic() - self.cancel_requested_at
+
+
+# --- ffmpeg ----------------------------------------------------------------------
+
+
+async def run_ffmpeg_async(src_path, dst_path, codec_args, verbose=False, cancel_event=None, work_dir=None):
+    """downloader._run_ffmpeg'in asyncio sürümü: aynı komut, .part çıktısı ve atomik taşıma.
+
+    Süreç beklenirken loop serbesttir; cancel_event set edilirse (veya görev iptal
+    edilirse) ffmpeg öldürülür, geçici çıktı silinir ve DownloadCancelled fırlatılır.
+    """
+    cmd, tmp_path = ffmpeg_job(src_path, dst_path, codec_args, work_dir)
+    if verbose:
+        print("[async_engine] Converting:", os.path.basename(src_path))
+    if cancel_event is not None and cancel_event.is_set():
+        raise DownloadCancelled("Conversion cancelled")
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    # communicate stderr'i sürekli okur; PIPE dolup ffmpeg kilitlenmez
+    communicate = asyncio.ensure_future(proc.communicate())
+    try:
+        while True:
+            done, _pending = await asyncio.wait({communicate}, timeout=0.1)
+            if done:
+                break
+            if cancel_event is not None and cancel_event.is_set():
+                raise DownloadCancelled("Conversion cancelled")
+    except BaseException:
+        if proc.returncode is None:
+            proc.kill()
+        await asyncio.shield(communicate)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _stdout, stderr = communicate.result()
+    if proc.returncode != 0:
+        raise ffmpeg_failed(proc.returncode, stderr or b"", tmp_path)
+    return publish_conversion(src_path, tmp_path, dst_path)
+
+
+async def convert_audio_async(
+    src_path,
+    dst_path,
+    output_format=OUTPUT_FORMAT,
+    source_codec=None,
+    verbose: bool = False,
+    cancel_event=None,
+    work_dir=None,
+):
+    """downloader.convert_audio'nun asyncio sürümü; kullanılan yöntemi döndürür."""
+    mode, codec_args = conversion_plan(output_format, source_codec)
+    if codec_args is None:
+        if cancel_event is not None and cancel_event.is_set():
+            raise DownloadCancelled("Conversion cancelled")
+        publish_file(src_path, dst_path)
+        return mode
+    await run_ffmpeg_async(src_path, dst_path, codec_args, verbose=verbose, cancel_event=cancel_event, work_dir=work_dir)
+    return mode
+
+
+async def _acquire(lock, poll=0.05):
+    """threading.Lock'u loop'u bloklamadan al (senkron motorla paylaşılan kütüphane kilitleri)."""
+    while not lock.acquire(blocking=False):
+        await asyncio.sleep(poll)
+
+
+async def finalize_audio_async(
+    raw_path,
+    info,
+    output_dir,
+    order_index=None,
+    title_override=None,
+    video_id=None,
+    manifest=None,
+    verbose: bool = False,
+    cancel_event=None,
+    library=None,
+    output_format=OUTPUT_FORMAT,
+    scratch_dir=None,
+):
+    """downloader.finalize_audio'nun asyncio sürümü (aynı hedefler, kütüphane ve manifest adımları)."""
+    started = time.perf_counter()
+    transcode_seconds = 0.0
+    metrics = get_metrics()
+    final_path, store_path, library_id = finalize_target(
+        info, output_dir, order_index, title_override, video_id, library, output_format
+    )
+
+    async def _convert(dst_path):
+        with metrics.stage(STAGE_TRANSCODE, output=output_format) as timer:
+            mode = await convert_audio_async(
+                raw_path,
+                dst_path,
+                output_format,
+                source_codec(info),
+                verbose=verbose,
+                cancel_event=cancel_event,
+                work_dir=scratch_dir,
+            )
+        metrics.inc("ytmp3_conversions_total", output=output_format, mode=mode)
+        return timer.seconds
+
+    if order_index is not None and os.path.exists(final_path):
+        os.remove(raw_path)
+    elif library_id:
+        lock = library.key_lock(library_id, library_tag(output_format))
+        await _acquire(lock)
+        try:
+            if os.path.exists(store_path):
+                os.remove(raw_path)
+            else:
+                os.makedirs(os.path.dirname(store_path), exist_ok=True)
+                transcode_seconds = await _convert(store_path)
+        finally:
+            lock.release()
+        library.materialize(store_path, final_path)
+    else:
+        transcode_seconds = await _convert(final_path)
+
+    record_finalized(manifest, info, final_path, video_id, order_index, title_override)
+    metrics.record_stage(STAGE_FINALIZE, time.perf_counter() - started - transcode_seconds)
+    return final_path
+
+
+# --- HTTP ------------------------------------------------------------------------
+
+
+def direct_stream(info):
+    """Seçilen format tek bir HTTP(S) dosyasıysa (url, başlıklar, aralık boyutu); değilse None.
+
+    Birleştirilmiş (video+ses) formatlar, HLS/DASH manifest'leri ve diğer protokoller
+    yt-dlp'nin kendi indiricisine bırakılır.
+    """
+    if not info or info.get("requested_formats"):
+        return None
+    url = info.get("url") or ""
+    protocol = info.get("protocol") or urlparse(url).scheme
+    if protocol not in ("http", "https") or not url.startswith(("http://", "https://")):
+        return None
+    options = info.get("downloader_options") or {}
+    return url, dict(info.get("http_headers") or {}), options.get("http_chunk_size") or ASYNC_HTTP_CHUNK_SIZE
+
+
+def _range_total(content_range):
+    """'bytes 0-1023/4096' -> 4096 (bilinmiyorsa None)."""
+    try:
+        total = (content_range or "").rsplit("/", 1)[1]
+    except IndexError:
+        return None
+    return int(total) if total.isdigit() else None
+
+
+def _http_error(response):
+    # yt-dlp/urllib ile aynı biçim: classify_error 429'u throttle, 5xx'i ağ hatası sayar
+    return RuntimeError(f"HTTP Error {response.status_code}: {response.reason_phrase}")
+
+
+class AsyncDownloadRun(DownloadRun):
+    """DownloadRun'ın asyncio motoruyla çalışan sürümü.
+
+    Yapıcı parametreleri, geri çağrılar, iş deposu, manifest, kütüphane, retry/devre kesici
+    ve özet DownloadRun ile aynıdır. Farklar:
+      run_async()  -- bir event loop içinden await edilir (ör. Flet'in async olay işleyicileri)
+      run()        -- kendi loop'unu açar (asyncio.run); başsız kullanım ve GUI'nin worker thread'i için
+      max_workers  -- aynı anda açık indirme sayısı; her biri bir thread değil bir görevdir
+      adaptive     -- aynı AIMD denetleyicisi indirme görevlerinin eşzamanlılık sınırını ayarlar
+    http_client verilirse (httpx.AsyncClient) çalıştırmalar arasında paylaşılır, kapatılmaz.
+    geri çağrılar loop thread'inden, yt-dlp'ye bırakılan indirmelerde executor thread'lerinden gelir.
+    """
+
+    engine = ENGINE_ASYNCIO
+
+    def __init__(self, *args, http_client=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._client = http_client
+        self._own_client = False
+        self._executor = None
+
+    # --- yardımcılar -----------------------------------------------------------
+
+    async def _in_executor(self, fn, *args):
+        """Engelleyici yt-dlp çağrısını executor'da çalıştır; ölçüm etiketleri (contextvars) taşınır."""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(contextvars.copy_context().run, fn, *args)
+        return await loop.run_in_executor(self._executor, call)
+
+    def _http_client(self):
+        if self._client is None:
+            try:
+                import httpx
+            except ImportError as ex:
+                raise RuntimeError("asyncio motoru için httpx gerekli: pip install httpx") from ex
+            self._client = httpx.AsyncClient(
+                timeout=ASYNC_HTTP_TIMEOUT,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=None, max_keepalive_connections=max(self.max_workers, 1)),
+            )
+            self._own_client = True
+        return self._client
+
+    # --- indirme ---------------------------------------------------------------
+
+    async def _download_stage_async(self, item):
+        with self.metrics.context(run=self._run_label, item=item[1], video_id=item[2]):
+            return await self._download_item_async(item)
+
+    async def _download_item_async(self, item):
+        # Manifest/kütüphane/iş deposu/disk adımları senkron sürümle aynı koddur; G/Ç loop'u bloklamasın
+        outcome, manifest = await asyncio.to_thread(self._prepare_download, item)
+        if outcome is not _DOWNLOAD:
+            return outcome
+        try:
+            self._download_started(item)
+            raw_path, info = await self._fetch(item)
+            return self._download_succeeded(item, raw_path, info, manifest)
+        except Exception as ex:
+            return self._download_failed(item, ex)
+
+    async def _fetch(self, item):
+        """Ham akışı scratch'e indir: (raw_path, info)."""
+        orig_index, _order_index, video_id, _title, url = item
+        output_dir = self.scratch_dir or self.output_dir
+        selector = audio_format_selector(self.output_format)
+        fragments = fragment_count(self.durations.get(orig_index))
+        if fragments is None:
+            started = time.perf_counter()
+            info, filename, source = await self._in_executor(
+                resolve_audio, url, output_dir, self.verbose, video_id, True, selector
+            )
+            if self.cancel_event.is_set():
+                raise DownloadCancelled("Download cancelled")
+            stream = direct_stream(info)
+            if stream is not None:
+                try:
+                    await self._http_download(item, stream, filename, started, source)
+                except DownloadCancelled:
+                    raise
+                except Exception:
+                    # Önbellekteki imzalı akış URL'sinin süresi dolmuş olabilir; sonraki deneme baştan çözsün
+                    if source == "cache":
+                        get_default_cache().invalidate_video(video_id or info.get("id"))
+                    raise
+                info["filepath"] = filename
+                return filename, info
+        # HLS/DASH, birleştirilmiş formatlar ve fragment'li uzun öğeler: yt-dlp'nin kendi indiricisi
+        return await self._in_executor(
+            functools.partial(
+                download_audio,
+                url,
+                output_dir,
+                verbose=self.verbose,
+                video_id=video_id,
+                cancel_event=self.cancel_event,
+                stats_callback=lambda d, it=item: self._on_download_stats(it, d),
+                rate_limiter=self.rate_limiter,
+                format_selector=selector,
+                concurrent_fragments=fragments,
+            )
+        )
+
+    async def _http_download(self, item, stream, filename, started, source):
+        """Akışı aralıklı GET'lerle filename'e indir; yarım .part dosyası varsa kaldığı yerden sürer."""
+        import httpx
+
+        url, headers, range_size = stream
+        client = self._http_client()
+        tmp_path = filename + ".part"
+        os.makedirs(os.path.dirname(tmp_path) or ".", exist_ok=True)
+        downloaded = os.path.getsize(tmp_path) if os.path.exists(tmp_path) else 0
+        resumed = downloaded
+        total = None
+        first_byte = None
+        clock = time.monotonic()
+        try:
+            with open(tmp_path, "ab") as fh:
+                while total is None or downloaded < total:
+                    request_headers = dict(headers, Range=f"bytes={downloaded}-{downloaded + range_size - 1}")
+                    async with client.stream("GET", url, headers=request_headers) as response:
+                        if response.status_code == 416 and downloaded:
+                            # Dosya zaten tamamen inmiş
+                            break
+                        if response.status_code >= 400:
+                            raise _http_error(response)
+                        whole = response.status_code != 206
+                        if whole:
+                            # Sunucu Range desteklemiyor: dosya baştan, tek yanıtta gelir
+                            fh.seek(0)
+                            fh.truncate()
+                            downloaded = resumed = 0
+                            total = int(response.headers.get("content-length") or 0) or None
+                            if response.headers.get("content-encoding", "identity") != "identity":
+                                # Sıkıştırılmış yanıtta Content-Length açılmış boyutu vermez
+                                total = None
+                        else:
+                            total = _range_total(response.headers.get("content-range")) or total
+                        received = 0
+                        async for block in response.aiter_bytes(_READ_SIZE):
+                            if self.cancel_event.is_set():
+                                raise DownloadCancelled("Download cancelled")
+                            fh.write(block)
+                            downloaded += len(block)
+                            received += len(block)
+                            if first_byte is None:
+                                first_byte = time.perf_counter()
+                                self.metrics.record_stage(STAGE_FORMAT_SELECT, first_byte - started, source=source)
+                            await self.rate_limiter.consume_async(len(block), self.cancel_event)
+                            elapsed = time.monotonic() - clock
+                            speed = (downloaded - resumed) / elapsed if elapsed > 0 else None
+                            self._on_download_stats(
+                                item,
+                                {
+                                    "status": "downloading",
+                                    "downloaded_bytes": downloaded,
+                                    "total_bytes": total,
+                                    "total_bytes_estimate": None,
+                                    "speed": speed,
+                                    "eta": (total - downloaded) / speed if speed and total else None,
+                                    "elapsed": elapsed,
+                                },
+                            )
+                    if whole or (total is not None and downloaded >= total):
+                        break
+                    if total is None:
+                        # Content-Range toplamı bilinmiyor ('bytes a-b/*'): kısa veya boş aralık dosyanın sonudur
+                        if received < range_size and (received or downloaded):
+                            break
+                    if not received:
+                        raise ConnectionError("Connection reset: empty range response")
+        except httpx.TransportError as ex:
+            if self.cancel_event.is_set():
+                self._remove_partial(tmp_path)
+                raise DownloadCancelled("Download cancelled") from ex
+            # classify_error bağlantı hatası saysın (tekrar denenir; .part korunur, kaldığı yerden sürer)
+            raise ConnectionError(f"{type(ex).__name__}: {ex}") from ex
+        except DownloadCancelled:
+            self._remove_partial(tmp_path)
+            raise
+        if total is not None and downloaded != total:
+            if downloaded > total:
+                # Sunucuyla uyuşmayan .part'tan sürdürülmüş olabilir; sonraki deneme baştan başlasın
+                self._remove_partial(tmp_path)
+            # Eksik dosya yayımlanmaz; ağ hatası sayılır ve .part'tan kaldığı yerden sürer
+            raise ConnectionError(f"Incomplete download: {downloaded} of {total} bytes")
+        publish_file(tmp_path, filename)
+        elapsed = time.monotonic() - clock
+        self._on_download_stats(
+            item,
+            {
+                "status": "finished",
+                "downloaded_bytes": downloaded,
+                "total_bytes": downloaded,
+                "total_bytes_estimate": None,
+                "speed": None,
+                "eta": None,
+                "elapsed": elapsed,
+            },
+        )
+        nbytes = downloaded - resumed
+        self.metrics.record_stage(
+            STAGE_DOWNLOAD,
+            time.perf_counter() - (first_byte or time.perf_counter()),
+            details={"bytes": nbytes, "fragments": 1},
+        )
+        self.metrics.inc("ytmp3_downloaded_bytes_total", nbytes)
+
+    @staticmethod
+    def _remove_partial(tmp_path):
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+    # --- dönüştürme ------------------------------------------------------------
+
+    async def _transcode_stage_async(self, item, payload):
+        with self.metrics.context(run=self._run_label, item=item[1], video_id=item[2]):
+            return await self._transcode_item_async(item, payload)
+
+    async def _transcode_item_async(self, item, payload):
+        raw_path, info, manifest = payload
+        try:
+            self._transcode_started(item)
+            filepath = await finalize_audio_async(
+                raw_path,
+                info,
+                self.output_dir,
+                order_index=item[1],
+                title_override=item[3],
+                video_id=item[2],
+                manifest=manifest,
+                verbose=self.verbose,
+                cancel_event=self.cancel_event,
+                library=self.library,
+                output_format=self.output_format,
+                scratch_dir=self.scratch_dir,
+            )
+            return self._transcode_succeeded(item, filepath)
+        except Exception as ex:
+            return self._transcode_failed(item, raw_path, ex)
+
+    # --- dış API ---------------------------------------------------------------
+
+    async def run_async(self):
+        """Tüm öğeleri bu event loop'ta işle; bitince özet sözlüğü döndür."""
+        items = self.start()
+        download_workers, download_limit = self._download_concurrency()
+        self.pipeline = AsyncPipeline(
+            self._download_stage_async,
+            self._transcode_stage_async,
+            download_workers=min(download_workers, max(1, len(self.items))),
+            transcode_workers=self.transcode_workers,
+            queue_size=TRANSCODE_QUEUE_SIZE,
+            on_item_done=self._on_item_done,
+            on_cancelled=self._on_cancelled,
+            on_error=self._on_stage_error,
+            cancel_event=self.cancel_event,
+            download_limit=download_limit,
+        )
+        self._executor = ThreadPoolExecutor(max_workers=ASYNC_EXECUTOR_WORKERS, thread_name_prefix="async-ydl")
+        if self.controller is not None:
+            self.controller.start()
+        try:
+            await self.pipeline.run(items)
+        except BaseException:
+            self._close()
+            raise
+        finally:
+            if self.controller is not None:
+                # stop() denetleyici thread'ini join eder; loop'u bekletmesin
+                await asyncio.to_thread(self.controller.stop)
+            # Kesilemeyen extract çağrıları arka planda biter, sonuçları yok sayılır
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            if self._own_client and self._client is not None:
+                await self._client.aclose()
+                self._client = None
+                self._own_client = False
+        return self.finish()
+
+    def run(self):
+        """run_async()'i kendi event loop'unda çalıştır (çağıran thread bloklanır)."""
+        return asyncio.run(self.run_async())
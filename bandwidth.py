@@ -0,0 +1,223 @@
+# bandwidth.py
+# Tüm indirme worker'larının paylaştığı global bant genişliği sınırı (token bucket).
+#
+# yt-dlp her veri bloğundan sonra progress hook'u çağırır; download_audio bu hook'ta
+# inen bayt kadar token tüketir. Kovada yeterli token yoksa çağıran thread borç
+# kapanana kadar uyur ve aktarım kendiliğinden yavaşlar. Böylece worker sayısından
+# bağımsız olarak toplam hız sınırın altında kalır. asyncio motoru (async_engine.py) aynı
+# kovayı consume_async ile, event loop'u bloklamadan kullanır.
+#
+# Sınır çalışma sırasında set_rate() ile değiştirilebilir; günün saatine göre farklı
+# sınırlar için bir zaman çizelgesi (schedule) verilebilir.
+import asyncio
+import re
+import threading
+import time
+from datetime import datetime
+
+from config import BANDWIDTH_LIMIT, BANDWIDTH_SCHEDULE, BANDWIDTH_BURST_SECONDS
+
+_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+_RATE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMG]?)(?:I?B)?(?:/S)?\s*$")
+
+# Zaman çizelgesi en fazla bu aralıkla yeniden değerlendirilir
+_SCHEDULE_CHECK_SECONDS = 30.0
+
+
+def parse_rate(value):
+    """'2M', '500K', '1.5MB/s', 1048576 -> bayt/sn. Boş, '0', 'unlimited' -> None (sınırsız)."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+    text = str(value).strip().upper()
+    if text in ("", "0", "NONE", "UNLIMITED", "SINIRSIZ"):
+        return None
+    match = _RATE_RE.match(text)
+    if not match:
+        raise ValueError(f"Geçersiz hız sınırı: {value!r} (ör. 500K, 2M)")
+    rate = float(match.group(1)) * _UNITS[match.group(2)]
+    return rate if rate > 0 else None
+
+
+def _parse_clock(text):
+    hours, minutes = text.strip().split(":")
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"Geçersiz saat: {text!r}")
+    return hours * 60 + minutes
+
+
+def parse_schedule(spec):
+    """'09:00-18:00=1M' biçimindeki pencereleri [(başlangıç_dk, bitiş_dk, bayt/sn|None), ...] yap.
+
+    spec bir string (virgülle ayrılmış) veya (başlangıç, bitiş, hız) demetleri listesi olabilir.
+    Bitiş başlangıçtan önceyse pencere gece yarısını aşar (ör. 22:00-06:00).
+    """
+    if not spec:
+        return []
+    if isinstance(spec, str):
+        entries = []
+        for part in spec.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            try:
+                window, rate = part.split("=", 1)
+                start, end = window.split("-", 1)
+            except ValueError:
+                raise ValueError(f"Geçersiz zaman penceresi: {part!r} (ör. 09:00-18:00=1M)")
+            entries.append((start, end, rate))
+        spec = entries
+    return [(_parse_clock(start), _parse_clock(end), parse_rate(rate)) for start, end, rate in spec]
+
+
+class BandwidthLimiter:
+    """Thread-safe token bucket. rate=None ise sınırsızdır ve consume() hemen döner.
+
+    Zaman çizelgesindeki bir pencere eşleşirse onun hızı, aksi halde set_rate() ile
+    ayarlanan varsayılan hız kullanılır.
+    """
+
+    def __init__(self, rate=None, schedule=None, burst_seconds=BANDWIDTH_BURST_SECONDS, clock=None):
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self.burst_seconds = burst_seconds
+        self._clock = clock or datetime.now
+        self._default_rate = parse_rate(rate)
+        self._schedule = parse_schedule(schedule)
+        self._rate = self._default_rate
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self._schedule_checked = 0.0
+        self.bytes_consumed = 0
+        self.seconds_waited = 0.0
+        self._refresh_schedule(force=True)
+
+    @property
+    def rate(self):
+        """Şu an geçerli sınır (bayt/sn) veya None."""
+        return self._rate
+
+    @property
+    def default_rate(self):
+        return self._default_rate
+
+    def set_rate(self, rate):
+        """Varsayılan sınırı değiştir (bayt/sn, '2M' gibi metin veya None); hemen etkili olur."""
+        rate = parse_rate(rate)
+        with self._lock:
+            self._default_rate = rate
+            self._schedule_checked = 0.0
+        self._refresh_schedule(force=True)
+
+    def set_schedule(self, schedule):
+        parsed = parse_schedule(schedule)
+        with self._lock:
+            self._schedule = parsed
+        self._refresh_schedule(force=True)
+
+    def _scheduled_rate(self):
+        if not self._schedule:
+            return self._default_rate
+        now = self._clock()
+        minute = now.hour * 60 + now.minute
+        for start, end, rate in self._schedule:
+            if start <= end:
+                inside = start <= minute < end
+            else:
+                inside = minute >= start or minute < end
+            if inside:
+                return rate
+        return self._default_rate
+
+    def _refresh_schedule(self, force=False):
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._schedule_checked < _SCHEDULE_CHECK_SECONDS:
+                return
+            self._schedule_checked = now
+            rate = self._scheduled_rate()
+            if rate != self._rate:
+                self._refill(now)
+                self._rate = rate
+                # Yeni sınırla birikmiş borç/token sıfırlanır; değişiklik hemen hissedilir
+                self._tokens = 0.0
+                self._changed.notify_all()
+
+    def _refill(self, now):
+        if self._rate is not None:
+            capacity = self._rate * self.burst_seconds
+            self._tokens = min(capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def consume(self, nbytes, cancel_event=None):
+        """nbytes kadar token harca; gerekirse sınır izin verene kadar bekle.
+
+        Bekleme cancel_event ile veya sınır değiştiğinde kesilir. Beklenen süreyi döndürür.
+        """
+        if nbytes <= 0:
+            return 0.0
+        self._refresh_schedule()
+        waited = 0.0
+        with self._lock:
+            self.bytes_consumed += nbytes
+            if self._rate is None:
+                return 0.0
+            self._refill(time.monotonic())
+            # Borca izin verilir: blok zaten indi, sonraki blok borç kapanana kadar bekler
+            self._tokens -= nbytes
+            while self._tokens < 0 and self._rate is not None:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                delay = min(-self._tokens / self._rate, 0.25)
+                started = time.monotonic()
+                self._changed.wait(delay)
+                waited += time.monotonic() - started
+                self._refill(time.monotonic())
+            self.seconds_waited += waited
+        return waited
+
+    async def consume_async(self, nbytes, cancel_event=None):
+        """consume()'un asyncio sürümü: borç kapanana kadar event loop'u bloklamadan bekler.
+
+        Aynı kova thread'lerle paylaşılır; böylece iki motor aynı anda çalışsa da toplam
+        hız sınırın altında kalır. Kilit sadece kısa hesaplar için tutulur.
+        """
+        if nbytes <= 0:
+            return 0.0
+        self._refresh_schedule()
+        with self._lock:
+            self.bytes_consumed += nbytes
+            if self._rate is None:
+                return 0.0
+            self._refill(time.monotonic())
+            self._tokens -= nbytes
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= 0 or self._rate is None:
+                    break
+                delay = min(-self._tokens / self._rate, 0.25)
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            started = time.monotonic()
+            await asyncio.sleep(delay)
+            waited += time.monotonic() - started
+        with self._lock:
+            self.seconds_waited += waited
+        return waited
+
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_bandwidth_limiter() -> BandwidthLimiter:
+    """Proje geneli paylaşılan bant genişliği sınırlayıcısını döndür."""
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = BandwidthLimiter(BANDWIDTH_LIMIT, BANDWIDTH_SCHEDULE)
+        return _default_limiter
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# benchmarks/fake_ffmpeg.py
+# Benchmark'larda gerçek ffmpeg yerine kullanılan sahte dönüştürücü. transcode_to_mp3'ün
+# verdiği komut satırını (… -i <kaynak> … <çıktı>) kabul eder, kaynağı okuyup çıktıya
+# kopyalar ve isteğe bağlı olarak bekler. Süreç başlatma ve disk G/Ç maliyeti gerçeğe
+# yakın kalır, kodlama (CPU) maliyeti ise ortamdan bağımsız ve ayarlanabilir olur.
+#
+# Ortam değişkenleri:
+#   FAKE_FFMPEG_SECONDS   dönüştürme başına ek bekleme (varsayılan 0)
+#   FAKE_FFMPEG_FAIL      "1" ise hata koduyla çıkar (hata yolunu ölçmek için)
+import os
+import shutil
+import sys
+import time
+
+
+def main(argv):
+    if "-i" not in argv or len(argv) < 3:
+        print("fake_ffmpeg: kullanım: fake_ffmpeg.py [...] -i <kaynak> [...] <çıktı>", file=sys.stderr)
+        return 2
+    src = argv[argv.index("-i") + 1]
+    dst = argv[-1]
+    if os.environ.get("FAKE_FFMPEG_FAIL") == "1":
+        print(f"{src}: Invalid data found when processing input", file=sys.stderr)
+        return 1
+    if not os.path.exists(src):
+        print(f"{src}: No such file or directory", file=sys.stderr)
+        return 1
+    shutil.copyfile(src, dst)
+    delay = float(os.environ.get("FAKE_FFMPEG_SECONDS") or 0)
+    if delay > 0:
+        time.sleep(delay)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
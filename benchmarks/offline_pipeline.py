@@ -0,0 +1,609 @@
+# benchmarks/offline_pipeline.py
+# Ağ ve YouTube'a bağlı olmadan uçtan uca indirme pipeline'ı ölçümü. YoutubeDL yerine
+# yerel bir HTTP sunucusundan sentetik ses (WAV) indiren sahte bir extractor, ffmpeg yerine
+# de benchmarks/fake_ffmpeg.py (veya --ffmpeg ile gerçek ffmpeg) kullanılır; geri kalan her
+# şey (DownloadRun, pipeline, manifest, iş deposu, kütüphane, progress) gerçek koddur.
+#
+# Her playlist boyutu x worker sayısı için raporlanan değerler:
+#   - soğuk çalıştırma: öğe/sn, bayt/sn, aşama gecikmeleri (indirme, dönüştürme kuyruğu,
+#     dönüştürme, uçtan uca; p50/p95)
+#   - sıcak çalıştırma: aynı öğelerle ikinci çalıştırma (hepsi manifest'ten atlanır)
+#   - klasör tarama: manifest yükleme, manifest rebuild ve os.listdir süreleri
+#   - UI: UIDispatcher'a (sahte sayfa ile) giden güncellemelerin worker ve flush maliyeti
+#
+# Sonuçlar JSON olarak benchmarks/results/ altına yazılır; --compare ile önceki bir sonuç
+# dosyasıyla karşılaştırılır ve eşikten fazla yavaşlama varsa çıkış kodu 1 olur.
+#
+# Kullanım:
+#   python benchmarks/offline_pipeline.py                         # 10,100,1000 öğe x 1,4,8 worker
+#   python benchmarks/offline_pipeline.py --sizes 10000 --workers 8 --item-kb 32
+#   python benchmarks/offline_pipeline.py --ffmpeg real           # PATH'teki gerçek ffmpeg ile
+#   python benchmarks/offline_pipeline.py --engine asyncio        # asyncio motoru (A/B için iki kez çalıştırın)
+#   python benchmarks/offline_pipeline.py --compare benchmarks/results/offline-20251118-101500.json
+import argparse
+import hashlib
+import json
+import math
+import os
+import platform
+import shutil
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FAKE_FFMPEG = os.path.join(ROOT, "benchmarks", "fake_ffmpeg.py")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+# Karşılaştırmada izlenen değerler: (bölüm, anahtar, büyük olan mı iyi)
+COMPARE_METRICS = (
+    ("cold", "items_per_sec", True),
+    ("warm", "items_per_sec", True),
+    ("scan", "manifest_load_ms", False),
+    ("scan", "rebuild_ms", False),
+    ("ui", "worker_overhead_ms", False),
+)
+
+_SAMPLE_RATE = 44100
+_CHUNK_SIZE = 16 * 1024
+
+
+# --- sentetik ses sunucusu -------------------------------------------------------
+
+
+def _sine_pcm(seconds=1.0, freq=440.0):
+    """16 bit mono sinüs; gerçek ffmpeg ile ölçümde kodlanacak anlamlı bir içerik."""
+    count = int(_SAMPLE_RATE * seconds)
+    return b"".join(
+        struct.pack("<h", int(12000 * math.sin(2 * math.pi * freq * i / _SAMPLE_RATE))) for i in range(count)
+    )
+
+
+def _wav_header(data_size):
+    return (
+        b"RIFF"
+        + struct.pack("<I", 36 + data_size)
+        + b"WAVEfmt "
+        + struct.pack("<IHHIIHH", 16, 1, 1, _SAMPLE_RATE, _SAMPLE_RATE * 2, 2, 16)
+        + b"data"
+        + struct.pack("<I", data_size)
+    )
+
+
+class _AudioHandler(BaseHTTPRequestHandler):
+    """GET /audio/<id>.wav?kb=N -> yaklaşık N KB'lık WAV dosyası."""
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if not parsed.path.startswith("/audio/"):
+            self.send_error(404)
+            return
+        kb = int((parse_qs(parsed.query).get("kb") or ["64"])[0])
+        data_size = max(2, kb * 1024 - 44) & ~1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/wav")
+        self.send_header("Content-Length", str(44 + data_size))
+        self.end_headers()
+        pcm = self.server.pcm
+        self.wfile.write(_wav_header(data_size))
+        sent = 0
+        while sent < data_size:
+            offset = sent % len(pcm)
+            block = pcm[offset : offset + min(_CHUNK_SIZE, data_size - sent)]
+            self.wfile.write(block)
+            sent += len(block)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_audio_server(latency=0.0):
+    """Yerel sunucuyu arka planda başlat; (server, base_url) döndür."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _AudioHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.pcm = _sine_pcm()
+    threading.Thread(target=server.serve_forever, name="bench-http", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# --- sahte extractor -------------------------------------------------------------
+
+
+class FakeYoutubeDL:
+    """yt_dlp.YoutubeDL yerine geçen yerel extractor.
+
+    download_audio'nun kullandığı arayüzü (extract_info, process_ie_result, sanitize_info,
+    prepare_filename, params, progress_hooks) taklit eder; URL'yi yerel sunucudan bloklar
+    halinde indirir ve her blokta yt-dlp ile aynı alanlarla progress hook'larını çağırır.
+    """
+
+    def __init__(self, params=None):
+        self.params = dict(params or {})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def close(self):
+        pass
+
+    def extract_info(self, url, download=True):
+        video_id = os.path.basename(urlparse(url).path).rsplit(".", 1)[0]
+        info = {
+            "id": video_id,
+            "title": f"Benchmark {video_id}",
+            "ext": "wav",
+            "url": url,
+            "webpage_url": url,
+            "extractor": "fake",
+        }
+        return self.process_ie_result(info, download=download)
+
+    def process_ie_result(self, ie_result, download=True):
+        info = dict(ie_result)
+        if download:
+            self._download(info)
+        return info
+
+    def sanitize_info(self, info):
+        return {k: v for k, v in info.items() if k not in ("requested_downloads", "filepath")}
+
+    def prepare_filename(self, info):
+        home = (self.params.get("paths") or {}).get("home") or "."
+        return os.path.join(home, f"{info['id']}_{info['id']}.{info.get('ext', 'wav')}")
+
+    def _report(self, d):
+        for hook in self.params.get("progress_hooks") or []:
+            hook(d)
+
+    def _download(self, info):
+        filename = self.prepare_filename(info)
+        tmp_path = filename + ".part"
+        # yt-dlp gibi hedef klasörü (ör. scratch) gerekirse oluştur
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        started = time.monotonic()
+        downloaded = 0
+        with urllib.request.urlopen(info["url"], timeout=30) as resp, open(tmp_path, "wb") as fh:
+            total = int(resp.headers.get("Content-Length") or 0) or None
+            while True:
+                block = resp.read(_CHUNK_SIZE)
+                if not block:
+                    break
+                fh.write(block)
+                downloaded += len(block)
+                elapsed = time.monotonic() - started
+                speed = downloaded / elapsed if elapsed > 0 else None
+                self._report(
+                    {
+                        "status": "downloading",
+                        "downloaded_bytes": downloaded,
+                        "total_bytes": total,
+                        "tmpfilename": tmp_path,
+                        "filename": filename,
+                        "speed": speed,
+                        "eta": (total - downloaded) / speed if speed and total else None,
+                        "elapsed": elapsed,
+                    }
+                )
+        os.replace(tmp_path, filename)
+        self._report(
+            {
+                "status": "finished",
+                "downloaded_bytes": downloaded,
+                "total_bytes": downloaded,
+                "filename": filename,
+                "elapsed": time.monotonic() - started,
+            }
+        )
+        info["filepath"] = filename
+        info["requested_downloads"] = [{"filepath": filename}]
+
+
+# --- sahte UI ----------------------------------------------------------------------
+
+
+class FakePage:
+    """flet.Page yerine; update() Flet'in diff/gönderim maliyetini sabit bir beklemeyle taklit eder."""
+
+    def __init__(self, update_seconds=0.0):
+        self.update_seconds = update_seconds
+        self.updates = 0
+
+    def update(self):
+        self.updates += 1
+        if self.update_seconds:
+            time.sleep(self.update_seconds)
+
+
+# --- ölçüm -------------------------------------------------------------------------
+
+
+def _load_project(workdir, ffmpeg, library):
+    """Proje modüllerini geçici çalışma klasörüne yönlendirerek yükle.
+
+    config sabitleri diğer modüller import edilmeden önce değiştirilmelidir; modüller
+    değerleri import anında kendi isim alanlarına kopyalar.
+    """
+    import config
+
+    config.use_output_dir(workdir)
+    if not library:
+        config.LIBRARY_DIR = None
+    config.FFMPEG_BINARY = ffmpeg
+    config.VERBOSE_LOGGING = False
+
+    import downloader
+    from ydl_pool import YoutubeDLPool
+
+    downloader.set_download_pool(YoutubeDLPool(downloader._DOWNLOAD_OPTS, factory=FakeYoutubeDL))
+
+
+def _resolve_ffmpeg(value):
+    if value == "fake":
+        return FAKE_FFMPEG
+    if value == "real":
+        found = shutil.which("ffmpeg")
+        if not found:
+            raise SystemExit("ffmpeg PATH'te bulunamadı (--ffmpeg fake kullanın veya yolunu verin)")
+        return found
+    return value
+
+
+def _items(base_url, tag, size, item_kb):
+    items = []
+    for i in range(size):
+        video_id = hashlib.sha1(f"{tag}-{i}".encode()).hexdigest()[:11]
+        items.append((i, i, video_id, f"Benchmark parça {i + 1}", f"{base_url}/audio/{video_id}.wav?kb={item_kb}"))
+    return items
+
+
+def _latency(values):
+    """Saniye listesini ms cinsinden p50/p95/max/ortalama özetine çevir."""
+    if not values:
+        return None
+    ms = sorted(v * 1000 for v in values)
+    return {
+        "p50": round(ms[len(ms) // 2], 3),
+        "p95": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+        "max": round(ms[-1], 3),
+        "mean": round(statistics.mean(ms), 3),
+    }
+
+
+class _RunProbe:
+    """DownloadRun geri çağrılarından aşama zamanlarını ve UI güncelleme maliyetini toplar."""
+
+    def __init__(self, dispatcher):
+        import runner
+
+        self.runner = runner
+        self.dispatcher = dispatcher
+        self.marks = {}
+        self.callback_seconds = 0.0
+        self.callbacks = 0
+        self._lock = threading.Lock()
+
+    def on_item_state(self, item, state, detail):
+        started = time.perf_counter()
+        now = time.monotonic()
+        with self._lock:
+            self.marks.setdefault(item[0], {}).setdefault(state, now)
+        if self.dispatcher is not None:
+            text = f"{state} {detail.get('downloaded_bytes') or ''}"
+            self.dispatcher.submit(("row", item[0]), lambda: text.upper())
+        self._charge(started)
+
+    def on_progress(self, tracker):
+        started = time.perf_counter()
+        if self.dispatcher is not None:
+            summary = tracker.summary_text()
+            self.dispatcher.submit("summary", lambda: summary)
+        self._charge(started)
+
+    def _charge(self, started):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.callback_seconds += elapsed
+            self.callbacks += 1
+
+    def stage_latencies(self):
+        r = self.runner
+        download, queue_wait, transcode, total = [], [], [], []
+        for marks in self.marks.values():
+            start, waiting = marks.get(r.DOWNLOADING), marks.get(r.WAITING_TRANSCODE)
+            transcoding, done = marks.get(r.TRANSCODING), marks.get(r.DONE)
+            if start is not None and waiting is not None:
+                download.append(waiting - start)
+            if waiting is not None and transcoding is not None:
+                queue_wait.append(transcoding - waiting)
+            if transcoding is not None and done is not None:
+                transcode.append(done - transcoding)
+            if start is not None and done is not None:
+                total.append(done - start)
+        return {
+            "download": _latency(download),
+            "queue_wait": _latency(queue_wait),
+            "transcode": _latency(transcode),
+            "end_to_end": _latency(total),
+        }
+
+
+def _run_once(items, output_dir, workers, transcode_workers, dispatcher, output_format, engine):
+    from runner import run_class
+
+    probe = _RunProbe(dispatcher)
+    run = run_class(engine)(
+        items,
+        output_dir,
+        playlist_title="benchmark",
+        max_workers=workers,
+        transcode_workers=transcode_workers,
+        max_retries=1,
+        verbose=False,
+        output_format=output_format,
+        on_item_state=probe.on_item_state,
+        on_progress=probe.on_progress,
+    )
+    started = time.perf_counter()
+    summary = run.run()
+    elapsed = time.perf_counter() - started
+    return summary, elapsed, probe
+
+
+def _scan_costs(output_dir):
+    from manifest import LibraryManifest
+
+    started = time.perf_counter()
+    names = os.listdir(output_dir)
+    listdir = time.perf_counter() - started
+
+    started = time.perf_counter()
+    manifest = LibraryManifest(output_dir)
+    load = time.perf_counter() - started
+
+    started = time.perf_counter()
+    manifest.rebuild()
+    rebuild = time.perf_counter() - started
+    return {
+        "files": len(names),
+        "listdir_ms": round(listdir * 1000, 3),
+        "manifest_load_ms": round(load * 1000, 3),
+        "rebuild_ms": round(rebuild * 1000, 3),
+    }
+
+
+def run_case(base_url, workdir, size, workers, args):
+    """Tek bir (boyut, worker) ölçümü: soğuk çalıştırma, klasör tarama, sıcak çalıştırma."""
+    from downloader import get_download_pool
+    from ui_dispatcher import UIDispatcher
+
+    tag = f"{size}x{workers}"
+    items = _items(base_url, tag, size, args.item_kb)
+    output_dir = os.path.join(workdir, f"playlist_{tag}")
+
+    page = FakePage(args.ui_update_ms / 1000.0)
+    dispatcher = None if args.no_ui else UIDispatcher(page).start()
+    try:
+        summary, elapsed, probe = _run_once(
+            items, output_dir, workers, args.transcode_workers, dispatcher, args.output_format, args.engine
+        )
+    finally:
+        if dispatcher is not None:
+            dispatcher.stop()
+        get_download_pool().close_all()
+    if summary["failed"]:
+        first = summary["failed_items"][0]
+        raise RuntimeError(f"{summary['failed']} öğe başarısız ({first['category']}): {first['error']}")
+
+    cold = {
+        "seconds": round(elapsed, 4),
+        "items_per_sec": round(size / elapsed, 3),
+        "bytes_per_sec": round(summary["bytes_downloaded"] / elapsed, 1),
+        "done": summary["done"] + summary["linked"],
+        "stages": probe.stage_latencies(),
+    }
+    ui = None
+    if dispatcher is not None:
+        stats = dispatcher.stats()
+        ui = {
+            "callbacks": probe.callbacks,
+            "worker_overhead_ms": round(probe.callback_seconds * 1000, 3),
+            "submitted": stats["submitted"],
+            "applied": stats["applied"],
+            "coalesced": stats["coalesced"],
+            "flushes": stats["flushes"],
+            "page_updates": page.updates,
+            "flush_ms": round(stats["flush_seconds"] * 1000, 3),
+        }
+
+    scan = _scan_costs(output_dir)
+
+    summary, elapsed, _probe = _run_once(
+        items, output_dir, workers, args.transcode_workers, None, args.output_format, args.engine
+    )
+    warm = {
+        "seconds": round(elapsed, 4),
+        "items_per_sec": round(size / elapsed, 3),
+        "skipped": summary["skipped"],
+    }
+    if not args.keep:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return {"size": size, "workers": workers, "cold": cold, "warm": warm, "scan": scan, "ui": ui}
+
+
+# --- rapor ve karşılaştırma --------------------------------------------------------
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=5
+        )
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _report(case):
+    cold, warm, scan, ui = case["cold"], case["warm"], case["scan"], case["ui"]
+    stages = cold["stages"]
+
+    def p(stage):
+        s = stages.get(stage)
+        return f"{s['p50']:8.1f}/{s['p95']:8.1f}" if s else f"{'-':>17}"
+
+    print(
+        f"n={case['size']:<6} w={case['workers']:<3} "
+        f"soğuk={cold['items_per_sec']:9.1f} öğe/sn  sıcak={warm['items_per_sec']:9.1f} öğe/sn  "
+        f"indirme={p('download')}  kuyruk={p('queue_wait')}  dönüştürme={p('transcode')} ms (p50/p95)  "
+        f"manifest={scan['manifest_load_ms']:.1f} ms  rebuild={scan['rebuild_ms']:.1f} ms  "
+        + (f"ui={ui['worker_overhead_ms']:.1f} ms/{ui['page_updates']} update" if ui else "ui=-")
+    )
+
+
+def compare(results, baseline, threshold):
+    """Ortak (boyut, worker) ölçümlerini karşılaştır; eşiği aşan yavaşlamaların listesini döndür."""
+    previous = {(c["size"], c["workers"]): c for c in baseline.get("results", [])}
+    regressions = []
+    for case in results["results"]:
+        old = previous.get((case["size"], case["workers"]))
+        if old is None:
+            continue
+        for section, key, higher_is_better in COMPARE_METRICS:
+            new_value = (case.get(section) or {}).get(key)
+            old_value = (old.get(section) or {}).get(key)
+            if not new_value or not old_value:
+                continue
+            change = (new_value - old_value) / old_value
+            worse = -change if higher_is_better else change
+            flag = "  <-- yavaşlama" if worse > threshold else ""
+            print(
+                f"n={case['size']:<6} w={case['workers']:<3} {section}.{key:<20} "
+                f"{old_value:12.3f} -> {new_value:12.3f}  ({change * 100:+6.1f}%){flag}"
+            )
+            if flag:
+                regressions.append((case["size"], case["workers"], f"{section}.{key}", change))
+    return regressions
+
+
+def _int_list(text):
+    return [int(part) for part in text.split(",") if part.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ağsız uçtan uca pipeline ölçümü (sahte extractor + ffmpeg)")
+    parser.add_argument("--sizes", type=_int_list, default=[10, 100, 1000], help="playlist boyutları (ör. 10,100,10000)")
+    parser.add_argument("--workers", type=_int_list, default=[1, 4, 8], help="indirme worker sayıları (ör. 1,4,8)")
+    parser.add_argument("--transcode-workers", type=int, default=None, help="dönüştürme worker sayısı (varsayılan: config)")
+    parser.add_argument("--item-kb", type=int, default=64, help="öğe başına sentetik ses boyutu (KB)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="sunucunun ilk bayttan önceki gecikmesi")
+    parser.add_argument(
+        "--ffmpeg", default="fake", help="'fake' (benchmarks/fake_ffmpeg.py), 'real' (PATH'teki ffmpeg) veya bir yol"
+    )
+    parser.add_argument(
+        "--output-format",
+        default="mp3",
+        choices=("mp3", "m4a", "opus", "original"),
+        help="çıktı biçimi (original: ffmpeg çalıştırılmaz)",
+    )
+    parser.add_argument(
+        "--engine",
+        default="threads",
+        choices=("threads", "asyncio"),
+        help="indirme motoru: thread havuzu veya asyncio (async HTTP + asyncio subprocess ffmpeg)",
+    )
+    parser.add_argument("--fake-ffmpeg-ms", type=float, default=0.0, help="sahte ffmpeg'in dönüştürme başına beklemesi")
+    parser.add_argument("--ui-update-ms", type=float, default=2.0, help="sahte page.update() maliyeti")
+    parser.add_argument("--no-ui", action="store_true", help="UIDispatcher olmadan ölç")
+    parser.add_argument("--no-library", action="store_true", help="global kütüphaneyi kapat (LIBRARY_DIR=None)")
+    parser.add_argument("--workdir", default=None, help="çalışma klasörü (varsayılan: geçici klasör)")
+    parser.add_argument("--keep", action="store_true", help="indirilen dosyaları silme")
+    parser.add_argument("--output", default=None, help="sonuç JSON yolu (varsayılan: benchmarks/results/offline-<zaman>.json)")
+    parser.add_argument("--no-save", action="store_true", help="sonuçları dosyaya yazma")
+    parser.add_argument("--compare", default=None, help="karşılaştırılacak önceki sonuç JSON'u")
+    parser.add_argument("--threshold", type=float, default=0.15, help="yavaşlama sayılacak oran (0.15 = %%15)")
+    args = parser.parse_args(argv)
+
+    ffmpeg = _resolve_ffmpeg(args.ffmpeg)
+    if args.fake_ffmpeg_ms:
+        os.environ["FAKE_FFMPEG_SECONDS"] = str(args.fake_ffmpeg_ms / 1000.0)
+
+    temp = None
+    workdir = args.workdir
+    if workdir is None:
+        temp = tempfile.TemporaryDirectory(prefix="ytmp3-bench-")
+        workdir = temp.name
+    os.makedirs(workdir, exist_ok=True)
+    _load_project(workdir, ffmpeg, library=not args.no_library)
+    from config import DEFAULT_TRANSCODE_WORKERS
+
+    if args.transcode_workers is None:
+        args.transcode_workers = DEFAULT_TRANSCODE_WORKERS
+
+    server, base_url = start_audio_server(args.latency_ms / 1000.0)
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "git_revision": _git_revision(),
+        },
+        "settings": {
+            "item_kb": args.item_kb,
+            "latency_ms": args.latency_ms,
+            "ffmpeg": "fake" if ffmpeg == FAKE_FFMPEG else ffmpeg,
+            "fake_ffmpeg_ms": args.fake_ffmpeg_ms,
+            "output_format": args.output_format,
+            "engine": args.engine,
+            "transcode_workers": args.transcode_workers,
+            "ui_update_ms": None if args.no_ui else args.ui_update_ms,
+            "library": not args.no_library,
+        },
+        "results": [],
+    }
+    try:
+        for size in args.sizes:
+            for workers in args.workers:
+                case = run_case(base_url, workdir, size, workers, args)
+                results["results"].append(case)
+                _report(case)
+    finally:
+        server.shutdown()
+        if temp is not None:
+            temp.cleanup()
+
+    if not args.no_save:
+        path = args.output or os.path.join(RESULTS_DIR, f"offline-{datetime.now():%Y%m%d-%H%M%S}.json")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, ensure_ascii=False, indent=2)
+        print(f"sonuçlar: {path}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} ölçümde %{args.threshold * 100:.0f} üzeri yavaşlama")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,130 @@
+# benchmarks/ydl_overhead.py
+# Video başına YoutubeDL kurulum maliyetini ölçer: her öğe için yeni YoutubeDL
+# (eski davranış) ile worker başına havuzdan alınan örnek (ydl_pool) karşılaştırılır.
+#
+# Kullanım:
+#   python benchmarks/ydl_overhead.py                 # sadece kurulum/kapatma maliyeti
+#   python benchmarks/ydl_overhead.py --url https://www.youtube.com/robots.txt
+#                                                     # + öğe başına bir HTTP isteği (TLS el sıkışması dahil)
+#   python benchmarks/ydl_overhead.py --check-formats # havuzdaki örnek çağrıya özel formatı seçiyor mu (ağsız)
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from yt_dlp import YoutubeDL  # noqa: E402
+from downloader import audio_format_selector  # noqa: E402
+from ydl_pool import YoutubeDLPool  # noqa: E402
+
+OPTS = {
+    "format": "bestaudio/best",
+    "outtmpl": "%(id)s_%(title)s.%(ext)s",
+    "quiet": True,
+    "noplaylist": True,
+}
+
+
+def _request(ydl, url):
+    if url:
+        with ydl.urlopen(url) as resp:
+            resp.read()
+    else:
+        # HTTP oturumunu (request director) oluşturmaya zorla
+        ydl._request_director
+
+
+def run_fresh(items, output_dir, url=None):
+    timings = []
+    for _ in range(items):
+        start = time.perf_counter()
+        with YoutubeDL(dict(OPTS, paths={"home": output_dir})) as ydl:
+            _request(ydl, url)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_pooled(items, output_dir, url=None):
+    pool = YoutubeDLPool(OPTS)
+    timings = []
+    for _ in range(items):
+        start = time.perf_counter()
+        with pool.session(output_dir=output_dir) as ydl:
+            _request(ydl, url)
+        timings.append(time.perf_counter() - start)
+    pool.close_all()
+    return timings
+
+
+# Ağsız format seçimi kontrolü için sentetik bir video: YouTube'daki tipik iki ses akışı
+_FORMATS_INFO = {
+    "id": "check",
+    "title": "check",
+    "extractor": "generic",
+    "extractor_key": "Generic",
+    "webpage_url": "http://127.0.0.1/check",
+    "formats": [
+        {"format_id": "140", "url": "http://127.0.0.1/140", "ext": "m4a", "acodec": "mp4a.40.2", "vcodec": "none", "abr": 129},
+        {"format_id": "251", "url": "http://127.0.0.1/251", "ext": "webm", "acodec": "opus", "vcodec": "none", "abr": 140},
+    ],
+}
+
+
+def check_formats():
+    """Havuzdan alınan örnek, session(format=...) ile verilen seçiciyi yeni bir örnekle aynı uygulamalı.
+
+    Eşleşmeyen varsa 1 döndürür (ör. m4a istendiği halde webm/opus seçilirse remux yerine yeniden kodlanır).
+    """
+    pool = YoutubeDLPool(OPTS)
+    failures = 0
+    # Önce varsayılan formatla kullan: örnek derlenmiş 'bestaudio/best' seçicisiyle oluşmuş olsun
+    for output_format in ("mp3", "m4a", "opus", "mp3"):
+        selector = audio_format_selector(output_format)
+        with YoutubeDL(dict(OPTS, format=selector)) as ydl:
+            expected = ydl.process_ie_result(dict(_FORMATS_INFO), download=False)["format_id"]
+        with pool.session(format=selector) as ydl:
+            got = ydl.process_ie_result(dict(_FORMATS_INFO), download=False)["format_id"]
+        ok = got == expected
+        failures += not ok
+        print(f"{output_format:<5} {selector:<40} yeni={expected} havuz={got} {'OK' if ok else 'HATA'}")
+    pool.close_all()
+    return 1 if failures else 0
+
+
+def _report(name, timings):
+    ms = [t * 1000 for t in timings]
+    print(
+        f"{name:<8} n={len(ms):<4} toplam={sum(ms):9.1f} ms  "
+        f"ortalama={statistics.mean(ms):7.2f} ms  medyan={statistics.median(ms):7.2f} ms  "
+        f"ilk={ms[0]:7.2f} ms"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="YoutubeDL öğe başına kurulum maliyeti ölçümü")
+    parser.add_argument("--items", type=int, default=50, help="simüle edilen video sayısı")
+    parser.add_argument("--url", default=None, help="öğe başına istenecek URL (ağ gerektirir)")
+    parser.add_argument(
+        "--check-formats",
+        action="store_true",
+        help="sadece havuzdaki örneğin çağrıya özel format seçicisini uyguladığını doğrula",
+    )
+    args = parser.parse_args(argv)
+    if args.check_formats:
+        return check_formats()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        fresh = run_fresh(args.items, output_dir, args.url)
+        pooled = run_pooled(args.items, output_dir, args.url)
+    _report("yeni", fresh)
+    _report("havuz", pooled)
+    saved = (statistics.mean(fresh) - statistics.mean(pooled)) * 1000
+    print(f"öğe başına kazanç: {saved:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,161 @@
+# cache.py
+# Playlist ve video metadata'sı için kalıcı (SQLite) önbellek.
+# Aynı playlist'in tekrar alınması ve indirme/retry sırasında aynı videonun
+# yeniden çözülmesi (extract) bu önbellek sayesinde atlanır.
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import config
+from config import (
+    CACHE_ENABLED,
+    CACHE_PLAYLIST_TTL_SECONDS,
+    CACHE_VIDEO_TTL_SECONDS,
+    CACHE_MAX_BYTES,
+)
+
+# Video bilgisinden önbelleğe yazılmayacak büyük/gereksiz alanlar
+_DROP_VIDEO_KEYS = (
+    "thumbnails",
+    "automatic_captions",
+    "subtitles",
+    "heatmap",
+    "chapters",
+    "requested_formats",
+    "requested_downloads",
+    "requested_subtitles",
+    "filepath",
+    "_filename",
+    "filename",
+)
+
+
+def compact_video_info(info: dict) -> dict:
+    """Tam yt-dlp video bilgisini önbellek için küçült (sadece ses formatları kalır)."""
+    compact = {k: v for k, v in info.items() if k not in _DROP_VIDEO_KEYS}
+    formats = info.get("formats") or []
+    audio_formats = [f for f in formats if f.get("vcodec") == "none" and f.get("acodec") not in (None, "none")]
+    if audio_formats:
+        compact["formats"] = audio_formats
+    return compact
+
+
+class MetadataCache:
+    """TTL'li ve toplam boyutu sınırlı (LRU tahliyeli) SQLite önbelleği.
+
+    İki tür kayıt tutulur: 'playlist' (anahtar: playlist URL'si) ve
+    'video' (anahtar: video id). Thread-safe'tir.
+    """
+
+    def __init__(
+        self,
+        path,
+        playlist_ttl=CACHE_PLAYLIST_TTL_SECONDS,
+        video_ttl=CACHE_VIDEO_TTL_SECONDS,
+        max_bytes=CACHE_MAX_BYTES,
+    ):
+        self.path = path
+        self.ttl = {"playlist": playlist_ttl, "video": video_ttl}
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS items (
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (kind, key)
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS items_accessed ON items (accessed_at)")
+
+    def _get(self, kind, key):
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT payload, created_at FROM items WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+            if row is None:
+                return None
+            payload, created_at = row
+            if now - created_at > self.ttl[kind]:
+                self._conn.execute("DELETE FROM items WHERE kind = ? AND key = ?", (kind, key))
+                return None
+            self._conn.execute(
+                "UPDATE items SET accessed_at = ? WHERE kind = ? AND key = ?", (now, kind, key)
+            )
+        return json.loads(payload)
+
+    def _put(self, kind, key, value):
+        payload = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO items (kind, key, payload, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, key, payload, len(payload), now, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        """Toplam boyut sınırı aşıldıysa en uzun süredir kullanılmayan kayıtları sil."""
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM items").fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT kind, key, size FROM items ORDER BY accessed_at ASC").fetchall()
+        for kind, key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM items WHERE kind = ? AND key = ?", (kind, key))
+            total -= size
+
+    def get_playlist(self, url):
+        """Önbellekteki {'title', 'id', 'entries'} kaydını döndür; yoksa/süresi dolmuşsa None."""
+        return self._get("playlist", url)
+
+    def put_playlist(self, url, title, entries, playlist_id=None):
+        self._put("playlist", url, {"title": title, "id": playlist_id, "entries": list(entries)})
+
+    def get_video(self, video_id):
+        """Önbellekteki (küçültülmüş) yt-dlp video bilgisini döndür; yoksa None."""
+        return self._get("video", video_id)
+
+    def put_video(self, video_id, info):
+        self._put("video", video_id, compact_video_info(info))
+
+    def invalidate_video(self, video_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM items WHERE kind = 'video' AND key = ?", (video_id,))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM items")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """Proje geneli paylaşılan önbelleği döndür (CACHE_ENABLED False ise None)."""
+    global _default_cache
+    if not CACHE_ENABLED:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = MetadataCache(config.CACHE_PATH)
+        return _default_cache
@@ -0,0 +1,395 @@
+# cli.py
+# Başsız (GUI'siz) toplu indirme: bir veya daha fazla playlist/video URL'sini indirir,
+# sonunda makine tarafından okunabilir bir JSON özeti yazar ve hata varsa sıfırdan
+# farklı bir çıkış koduyla biter. Cron, CI veya sunucu üzerinde çalıştırmak içindir.
+#
+# Kullanım:
+#   python cli.py URL [URL ...] [-f urls.txt] [-o klasör] [--workers N] [--progress-jsonl -]
+#   python cli.py --queue -f urls.txt      # tüm playlist'ler tek paylaşılan havuzda, adil sırayla
+#
+# Flet ve yt-dlp gibi ağır modüller sadece gerçekten iş yapılacağı zaman yüklenir;
+# --help ve argüman hataları anında döner.
+import argparse
+import json
+import os
+import sys
+import threading
+
+# Çıkış kodları
+EXIT_OK = 0
+EXIT_FAILED = 1  # en az bir öğe indirilemedi veya playlist alınamadı
+EXIT_USAGE = 2
+EXIT_CANCELLED = 130  # Ctrl+C
+
+
+def _positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"pozitif bir tam sayı bekleniyordu: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"pozitif bir tam sayı bekleniyordu: {value!r}")
+    return number
+
+
+def _build_parser():
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="YouTube playlist/video URL'lerini GUI olmadan MP3 olarak indir.",
+    )
+    parser.add_argument("urls", nargs="*", metavar="URL", help="playlist veya video URL'si")
+    parser.add_argument(
+        "-f",
+        "--file",
+        action="append",
+        default=[],
+        metavar="DOSYA",
+        help="satır başına bir URL içeren dosya ('#' ile başlayan satırlar yok sayılır, '-' = stdin); "
+        "--queue ile URL'den sonra boşlukla bir öncelik verilebilir (ör. 'URL 1', büyük olan önce)",
+    )
+    parser.add_argument("-o", "--output", metavar="KLASÖR", help="ana çıktı klasörü (varsayılan: ./downloads)")
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="playlist'i kalıcı klasörüyle karşılaştır; sadece yeni videoları indir, sırası değişenleri yeniden adlandır",
+    )
+    parser.add_argument(
+        "--delete-removed",
+        action="store_true",
+        help="--sync ile: playlist'ten çıkarılan videoların dosyalarını sil",
+    )
+    parser.add_argument(
+        "--queue",
+        action="store_true",
+        help="playlist'leri sırayla değil, öğelerini tek paylaşılan havuzda öncelik ve round-robin ile birlikte işle",
+    )
+    parser.add_argument("--workers", type=_positive_int, help="paralel indirme sayısı")
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="paralel indirme sayısını hız/hata/CPU ölçümlerine göre otomatik ayarla (--workers başlangıçtır)",
+    )
+    parser.add_argument("--transcode-workers", type=_positive_int, help="paralel dönüştürme (ffmpeg) sayısı")
+    parser.add_argument(
+        "--engine",
+        choices=("threads", "asyncio"),
+        help="indirme motoru: threads (thread havuzu) veya asyncio (async HTTP + asyncio subprocess ffmpeg, "
+        "httpx gerekir); --queue her zaman thread havuzunu kullanır",
+    )
+    parser.add_argument("--retries", type=_positive_int, help="öğe başına maksimum deneme")
+    parser.add_argument(
+        "--format",
+        dest="output_format",
+        choices=("mp3", "m4a", "opus", "original"),
+        help="çıktı biçimi: mp3 (yeniden kodla), m4a/opus (kaynak uygunsa remux), original (dönüştürmesiz)",
+    )
+    parser.add_argument(
+        "--limit-rate",
+        metavar="HIZ",
+        help="tüm indirmelerin toplam hız sınırı, ör. 500K veya 2M (bayt/sn; 0 = sınırsız)",
+    )
+    parser.add_argument(
+        "--schedule",
+        metavar="PENCERELER",
+        help="saate göre hız sınırı, ör. '09:00-18:00=1M,22:00-06:00=0' (pencere dışında --limit-rate geçerli)",
+    )
+    parser.add_argument(
+        "--rate-file",
+        metavar="DOSYA",
+        help="çalışma sırasında hız sınırını bu dosyadan oku; dosya değiştikçe yeni değer uygulanır",
+    )
+    parser.add_argument(
+        "--progress-jsonl",
+        metavar="DOSYA",
+        help="ilerleme olaylarını JSON-lines olarak bu dosyaya yaz ('-' = stderr; stdout özet JSON'una ayrılmıştır)",
+    )
+    parser.add_argument("--summary-json", metavar="DOSYA", help="özet JSON'unu ayrıca bu dosyaya yaz")
+    parser.add_argument(
+        "--metrics-port",
+        type=_positive_int,
+        metavar="PORT",
+        help="aşama ölçümlerini http://127.0.0.1:PORT/metrics adresinde Prometheus formatında sun",
+    )
+    parser.add_argument(
+        "--metrics-log",
+        metavar="DOSYA",
+        help="aşama sürelerinin yazıldığı JSON-lines log (varsayılan: config.METRICS_LOG_PATH)",
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="stderr'e durum satırı yazma")
+    parser.add_argument("-v", "--verbose", action="store_true", help="ayrıntılı log")
+    return parser
+
+
+def _read_urls(args):
+    """[(url, öncelik), ...]; dosya satırları 'URL' veya 'URL ÖNCELİK' biçimindedir."""
+    urls = [(url, 0) for url in args.urls]
+    for path in args.file:
+        fh = sys.stdin if path == "-" else open(path, encoding="utf-8")
+        try:
+            for line in fh:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                parts = line.split()
+                priority = 0
+                if len(parts) == 2:
+                    try:
+                        priority = int(parts[1])
+                        line = parts[0]
+                    except ValueError:
+                        pass
+                urls.append((line, priority))
+        finally:
+            if fh is not sys.stdin:
+                fh.close()
+    return urls
+
+
+def _run_in_thread(run):
+    """DownloadRun'ı (veya PlaylistQueue'yu) ayrı thread'de çalıştır; Ctrl+C gelirse iptal et ve durmasını bekle.
+
+    (sonuç, hata) döndürür; run() bir istisna fırlatırsa sonuç None, hata o istisnadır.
+    """
+    result = {}
+
+    def target():
+        try:
+            result["summary"] = run.run()
+        except Exception as ex:
+            result["error"] = ex
+
+    thread = threading.Thread(target=target, name="cli-run", daemon=True)
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(0.2)
+    except KeyboardInterrupt:
+        run.cancel()
+        thread.join()
+    return result.get("summary"), result.get("error")
+
+
+def _watch_rate_file(path, limiter, log, stop_event, interval=2.0):
+    """Dosyanın içeriği değiştikçe (ör. `echo 500K > rate.txt`) sınırı güncelle."""
+    last = None
+    while not stop_event.wait(interval):
+        try:
+            with open(path, encoding="utf-8") as fh:
+                text = fh.read().strip()
+        except OSError:
+            continue
+        if text == last:
+            continue
+        last = text
+        try:
+            limiter.set_rate(text)
+            log(f"Hız sınırı: {text or 'sınırsız'}")
+        except ValueError as ex:
+            log(str(ex))
+
+
+def main(argv=None):
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+    try:
+        urls = _read_urls(args)
+    except OSError as ex:
+        parser.error(str(ex))
+    if not urls:
+        parser.error("en az bir URL veya -f DOSYA gerekli")
+
+    # Ağır importlar argümanlar doğrulandıktan sonra
+    import config
+
+    if args.output:
+        # Önbellek, iş deposu, scratch ve kütüphane de seçilen klasöre (aynı dosya sistemine) taşınır
+        config.use_output_dir(args.output)
+    from downloader import fetch_playlist_info, playlist_output_dir, playlist_sync_dir, describe_error
+    from manifest import get_manifest
+    from bandwidth import get_bandwidth_limiter
+    from metrics import get_metrics, start_metrics_server
+    from playlist_queue import PlaylistQueue
+    from progress import JsonLinesSink
+    from runner import DownloadRun, run_class
+    from sync import plan_sync, apply_sync
+
+    base_dir = config.OUTPUT_DIR
+    verbose = args.verbose
+    quiet = args.quiet
+
+    def log(text):
+        if not quiet:
+            print(text, file=sys.stderr, flush=True)
+
+    limiter = get_bandwidth_limiter()
+    try:
+        if args.limit_rate is not None:
+            limiter.set_rate(args.limit_rate)
+        if args.schedule:
+            limiter.set_schedule(args.schedule)
+    except ValueError as ex:
+        parser.error(str(ex))
+    stop_watch = threading.Event()
+    if args.rate_file:
+        threading.Thread(
+            target=_watch_rate_file,
+            args=(args.rate_file, limiter, log, stop_watch),
+            name="rate-file",
+            daemon=True,
+        ).start()
+
+    metrics = get_metrics()
+    if args.metrics_log:
+        metrics.set_log_path(os.path.abspath(args.metrics_log))
+    metrics_server = None
+    try:
+        metrics_server = start_metrics_server(args.metrics_port or config.METRICS_PORT)
+    except OSError as ex:
+        log(f"Ölçüm uç noktası açılamadı: {ex}")
+    if metrics_server is not None:
+        log(f"Ölçümler: http://127.0.0.1:{metrics_server.server_address[1]}/metrics")
+
+    sink = None
+    if args.progress_jsonl == "-":
+        # stdout'ta sadece sonuç özeti olur (ör. `| jq`); olay akışı stderr'e gider
+        sink = JsonLinesSink(stream=sys.stderr)
+    elif args.progress_jsonl:
+        sink = JsonLinesSink(args.progress_jsonl)
+
+    # Paylaşılan kuyruk havuzu thread'lidir; asyncio motoru tek tek çalıştırılan playlist'ler içindir
+    try:
+        run_cls = DownloadRun if args.queue else run_class(args.engine or config.DOWNLOAD_ENGINE)
+    except ValueError as ex:
+        parser.error(str(ex))
+
+    runs = []
+    # --queue: (runs içindeki yer, url, DownloadRun, öncelik, senkron raporu)
+    queued = []
+    exit_code = EXIT_OK
+    try:
+        for url, priority in urls:
+            try:
+                result = fetch_playlist_info(url, verbose=verbose, flat=config.FLAT_PLAYLIST_FETCH)
+                entries = list(result["entries"])
+            except KeyboardInterrupt:
+                exit_code = EXIT_CANCELLED
+                break
+            except Exception as ex:
+                log(f"Oynatma listesi alınamadı: {url}\n{describe_error(ex)}")
+                runs.append({"url": url, "error": str(ex), "message": describe_error(ex)})
+                exit_code = EXIT_FAILED
+                continue
+            if not entries:
+                log(f"Oynatma listesi bulunamadı veya boş: {url}")
+                runs.append({"url": url, "error": "empty", "message": "Oynatma listesi bulunamadı veya boş."})
+                exit_code = EXIT_FAILED
+                continue
+
+            playlist_title = result.get("title") or ""
+            items = [(idx, idx, ent.get("id"), ent["title"], ent["url"]) for idx, ent in enumerate(entries)]
+            sync_report = None
+            if args.sync:
+                output_dir = playlist_sync_dir(playlist_title, result.get("id"), base_dir)
+                try:
+                    os.makedirs(output_dir, exist_ok=True)
+                    manifest = get_manifest(output_dir)
+                    plan = plan_sync(manifest, entries, output_dir)
+                    applied = apply_sync(manifest, plan, remove_deleted=args.delete_removed, verbose=verbose)
+                except OSError as ex:
+                    log(f"Senkronizasyon başarısız: {output_dir}\n{describe_error(ex)}")
+                    runs.append({"url": url, "output_dir": output_dir, "error": str(ex), "message": describe_error(ex)})
+                    exit_code = EXIT_FAILED
+                    continue
+                sync_report = {**plan.summary(), **applied}
+                items = [(idx, idx, ent.get("id"), ent["title"], ent["url"]) for idx, ent in plan.downloads]
+                log(
+                    f"Senkronizasyon: {sync_report['new']} yeni, {sync_report['renamed']} yeniden adlandırıldı, "
+                    f"{sync_report['removed']} silindi, {sync_report['unchanged']} değişmedi"
+                )
+            else:
+                output_dir = playlist_output_dir(playlist_title, len(entries), base_dir)
+            log(f"{playlist_title} ({len(entries)} video) -> {output_dir}")
+
+            run = run_cls(
+                items,
+                output_dir,
+                playlist_title=playlist_title,
+                max_workers=args.workers or config.DEFAULT_MAX_WORKERS,
+                transcode_workers=args.transcode_workers or config.DEFAULT_TRANSCODE_WORKERS,
+                max_retries=args.retries or config.MAX_RETRIES,
+                verbose=verbose,
+                adaptive=args.adaptive or config.ADAPTIVE_CONCURRENCY,
+                output_format=args.output_format or config.OUTPUT_FORMAT,
+                durations={idx: ent.get("duration") for idx, ent in enumerate(entries)},
+                on_status=lambda text, level: log(text),
+                progress_sink=sink,
+                scratch_dir=config.SCRATCH_DIR,
+            )
+            if args.queue:
+                queued.append((len(runs), url, run, priority, sync_report))
+                runs.append(None)
+                continue
+            summary, error = _run_in_thread(run)
+            if error is not None:
+                log(f"İndirme yarıda kesildi: {playlist_title}\n{describe_error(error)}")
+                summary = {**run.summary(), "error": str(error), "message": describe_error(error)}
+                exit_code = EXIT_FAILED
+            summary["url"] = url
+            if sync_report is not None:
+                summary["sync"] = sync_report
+            runs.append(summary)
+            if summary["failed"]:
+                exit_code = EXIT_FAILED
+            if run.cancelled:
+                exit_code = EXIT_CANCELLED
+                break
+
+        if queued:
+            queue = PlaylistQueue(
+                max_workers=args.workers or config.DEFAULT_MAX_WORKERS,
+                transcode_workers=args.transcode_workers or config.DEFAULT_TRANSCODE_WORKERS,
+                on_playlist_state=lambda entry: log(f"[kuyruk] {entry.title}: {entry.state}"),
+            )
+            entries = [queue.add(run, priority=priority) for _pos, _url, run, priority, _sync in queued]
+            error = None
+            if exit_code != EXIT_CANCELLED:
+                _summaries, error = _run_in_thread(queue)
+            else:
+                queue.cancel()
+            if error is not None:
+                log(f"Kuyruk yarıda kesildi:\n{describe_error(error)}")
+                exit_code = EXIT_FAILED
+            for (pos, url, run, _priority, sync_report), entry in zip(queued, entries):
+                summary = entry.summary or run.summary()
+                if error is not None and entry.summary is None:
+                    summary.update(error=str(error), message=describe_error(error))
+                summary["url"] = url
+                if sync_report is not None:
+                    summary["sync"] = sync_report
+                runs[pos] = summary
+                if summary["failed"]:
+                    exit_code = EXIT_FAILED
+            if queue.cancel_event.is_set():
+                exit_code = EXIT_CANCELLED
+    finally:
+        stop_watch.set()
+        if sink is not None:
+            sink.close()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        metrics.close()
+
+    report = {
+        "ok": exit_code == EXIT_OK,
+        "exit_code": exit_code,
+        "runs": runs,
+    }
+    print(json.dumps(report, ensure_ascii=False), flush=True)
+    if args.summary_json:
+        with open(args.summary_json, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, ensure_ascii=False, indent=2)
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,892 @@
+# cluster.py
+# Birden çok makineye dağıtılmış indirme. Tek bir koordinatör playlist'i alır
+# (fetch_playlist_info) ve öğeleri yerel ağ üzerinden HTTP/JSON ile worker süreçlerine
+# kiralar (lease); worker'lar download_as_mp3 ile indirip dönüştürür ve sonucu
+# koordinatöre yükler ya da paylaşılan klasöre (NFS/SMB) doğrudan yazar. Böylece
+# dönüştürme için tek makinenin CPU'su darboğaz olmaz.
+#
+# Kiralama: her öğe belirli süreliğine (CLUSTER_LEASE_SECONDS) bir worker'a verilir; worker
+# iş sürdükçe kirayı yeniler. Yenilenmeyen kira (worker öldü, ağ koptu) süresi dolunca
+# geri alınır ve öğe başka bir worker'a verilir. İlk gelen geçerli sonuç kabul edilir;
+# aynı öğe için sonradan gelen sonuç reddedilir.
+#
+# Aynı makinede birkaç worker ile denemek için:
+#   python cluster.py coordinator URL --port 8765
+#   python cluster.py worker http://127.0.0.1:8765 --work-dir /tmp/w1 &
+#   python cluster.py worker http://127.0.0.1:8765 --work-dir /tmp/w2 &
+#
+# Protokol (istek/yanıt gövdeleri JSON; CLUSTER_TOKEN varsa X-Cluster-Token başlığı gerekir):
+#   POST /lease  {"worker"}              -> 200 {"lease", "item", ...} | 200 {"retry_after"} | 410 (bitti)
+#   POST /renew  {"lease"}               -> 200 | 409 (kira geri alındı; worker işi bırakır)
+#   PUT  /upload?lease=..&ext=mp3        -> gövde: dosyanın kendisi; 200 | 409
+#   POST /done   {"lease", "filename"}   -> paylaşılan klasöre yazılan dosya; 200 | 409
+#   POST /fail   {"lease", "error", "category"}
+#   GET  /status                         -> ilerleme özeti
+import argparse
+import collections
+import json
+import os
+import re
+import shutil
+import socket
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError, URLError
+from urllib.parse import parse_qs, urlparse
+from urllib.request import Request, urlopen
+
+import jobs
+from config import (
+    CLUSTER_HOST,
+    CLUSTER_PORT,
+    CLUSTER_TOKEN,
+    CLUSTER_LEASE_SECONDS,
+    CLUSTER_POLL_SECONDS,
+    MAX_RETRIES,
+    OUTPUT_FORMAT,
+    SCHEDULE_LONGEST_FIRST,
+    SCRATCH_DIR,
+    VERBOSE_LOGGING,
+)
+from downloader import (
+    DownloadCancelled,
+    audio_output_path,
+    classify_error,
+    describe_error,
+    download_as_mp3,
+    output_extensions,
+    ERROR_DISK,
+    ERROR_FFMPEG,
+    ERROR_PERMISSION,
+    ERROR_UNKNOWN,
+)
+from jobs import get_job_store
+from manifest import get_manifest
+from metrics import get_metrics
+from retry import RetryPolicy
+from runner import schedule_longest_first, DOWNLOADING, RETRYING, DONE, SKIPPED, FAILED, CANCELLED
+from staging import publish_file, remove_if_empty, scratch_dir_for
+
+_EXT_RE = re.compile(r"^[A-Za-z0-9]{1,5}$")
+_UPLOAD_CHUNK = 1024 * 1024
+
+# Worker'ın kendi ortamından kaynaklanan hatalar (ffmpeg yok, disk dolu, izin): tek
+# makinede kalıcıdır ama öğe başka bir worker'da başarılı olabilir, tekrar kiralanır
+_WORKER_LOCAL_ERRORS = (ERROR_FFMPEG, ERROR_PERMISSION, ERROR_DISK)
+
+# Koordinatördeki öğe durumları (DONE/SKIPPED/FAILED/CANCELLED runner ile ortak)
+PENDING = "pending"
+LEASED = "leased"
+
+
+class _Task:
+    """Koordinatördeki bir öğe ve güncel kirası."""
+
+    __slots__ = ("item", "duration", "state", "attempts", "expiries", "not_before", "lease", "deadline", "worker")
+
+    def __init__(self, item, duration=None):
+        self.item = item
+        self.duration = duration
+        self.state = PENDING
+        self.attempts = 0
+        self.expiries = 0
+        self.not_before = 0.0
+        self.lease = None
+        self.deadline = None
+        self.worker = None
+
+
+class LeaseLost(Exception):
+    """Kira koordinatör tarafından geri alındı veya öğe başka bir worker'da tamamlandı."""
+
+
+class Coordinator:
+    """Öğeleri worker'lara kiralayan, sonuçları çıktı klasörüne yazan koordinatör.
+
+    items: DownloadRun ile aynı (orig_index, order_index, video_id, title, url) listesi.
+    Zaten indirilmiş öğeler (manifest) hiç kiralanmaz; durumlar kalıcı iş deposuna yazılır.
+
+    Geri çağrılar (opsiyonel, HTTP thread'lerinden çağrılır):
+      on_item_state(item, state, detail)
+      on_status(text, level)
+
+    Worker'ın bildirdiği hata kategorisi RetryPolicy ile değerlendirilir: geçici hatalar
+    (ve worker'a özgü ffmpeg/disk/izin hataları) beklemeden sonra tekrar kiralanır.
+    Kirası art arda max_retries kez dolan öğe (ör. her seferinde worker'ı çökerten)
+    başarısız sayılır.
+    """
+
+    def __init__(
+        self,
+        items,
+        output_dir,
+        playlist_title=None,
+        durations=None,
+        output_format=OUTPUT_FORMAT,
+        max_retries=MAX_RETRIES,
+        lease_seconds=CLUSTER_LEASE_SECONDS,
+        poll_seconds=CLUSTER_POLL_SECONDS,
+        host=CLUSTER_HOST,
+        port=CLUSTER_PORT,
+        token=CLUSTER_TOKEN,
+        longest_first=SCHEDULE_LONGEST_FIRST,
+        scratch_dir=SCRATCH_DIR,
+        verbose=VERBOSE_LOGGING,
+        on_item_state=None,
+        on_status=None,
+    ):
+        self.items = list(items)
+        durations = dict(durations or {})
+        if longest_first and durations:
+            self.items = schedule_longest_first(self.items, durations)
+        self.output_dir = output_dir
+        self.playlist_title = playlist_title
+        self.output_format = output_format
+        self.max_retries = max_retries
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.host = host
+        self.port = port
+        self.token = token
+        self.verbose = verbose
+        self.on_item_state = on_item_state
+        self.on_status = on_status
+        self.scratch_dir = scratch_dir_for(output_dir, scratch_dir)
+        self.retry_policy = RetryPolicy()
+        self.metrics = get_metrics()
+        self.cancel_event = threading.Event()
+        self.server = None
+        self.failed = []
+        self.reassigned = 0
+        # worker id -> tamamladığı öğe sayısı
+        self.worker_done = collections.Counter()
+        self._tasks = [_Task(item, durations.get(item[0])) for item in self.items]
+        self._pending = collections.deque(self._tasks)
+        # Verilmiş tüm kiralar (süresi dolmuş olanlar dahil) -> öğe
+        self._leases = {}
+        self._cond = threading.Condition()
+        self._job_store = None
+        self._manifest = None
+        self._started = None
+
+    # --- bildirim yardımcıları -------------------------------------------------
+
+    def _log(self, *args):
+        if self.verbose:
+            print(*args)
+
+    def _state(self, task, state, **detail):
+        if self.on_item_state:
+            self.on_item_state(task.item, state, detail)
+
+    def _status(self, text, level="info"):
+        if self.on_status:
+            self.on_status(text, level)
+
+    def _record_job(self, task, state, **fields):
+        if self._job_store is None:
+            return
+        try:
+            self._job_store.update(self.output_dir, task.item[1], state, **fields)
+        except Exception as ex:
+            self._log("Job store error:", ex)
+
+    # --- kira yönetimi (hepsi _cond altında çağrılır) ---------------------------
+
+    def _finished(self):
+        return all(task.state not in (PENDING, LEASED) for task in self._tasks)
+
+    def _set_final(self, task, state):
+        task.state = state
+        task.lease = task.deadline = None
+        self.metrics.inc("ytmp3_items_total", state=state)
+        self._cond.notify_all()
+
+    def _expire_leases(self, now):
+        for task in self._tasks:
+            if task.state != LEASED or task.deadline > now:
+                continue
+            task.expiries += 1
+            self.reassigned += 1
+            self.metrics.log("lease_expired", item=task.item[1], worker=task.worker, expiries=task.expiries)
+            self._log(f"Lease expired: {task.item[3]} ({task.worker})")
+            if task.expiries >= self.max_retries:
+                ex = RuntimeError(f"worker lease expired {task.expiries} times")
+                self.failed.append((task.item[0], task.item[3], ex))
+                self._record_job(task, jobs.FAILED, last_error=str(ex))
+                self._set_final(task, FAILED)
+                self._state(task, FAILED, error=str(ex), friendly=describe_error(ex), category=ERROR_UNKNOWN)
+                continue
+            task.state = PENDING
+            task.lease = task.deadline = None
+            # Yeniden atanan öğe sıranın başına; yarım kalan iş en önce tamamlansın
+            self._pending.appendleft(task)
+            self._record_job(task, jobs.PENDING)
+            self._status(f"Worker yanıt vermiyor, öğe başka worker'a verilecek: {task.item[3]}")
+
+    def _next_task(self, now):
+        """Kiralanabilir ilk öğe ve (yoksa) en erken ne zaman hazır olacağı."""
+        wait = None
+        for _ in range(len(self._pending)):
+            task = self._pending.popleft()
+            if task.state != PENDING:
+                continue
+            if task.not_before <= now:
+                return task, None
+            self._pending.append(task)
+            remaining = task.not_before - now
+            wait = remaining if wait is None else min(wait, remaining)
+        return None, wait
+
+    def _task_for(self, lease):
+        """Sonuç bildirilen kiranın öğesi; öğe zaten bittiyse None.
+
+        Süresi dolmuş kiradan gelen sonuç da, öğe henüz bitmediyse kabul edilir (iş
+        zaten yapıldı); o durumda öğenin güncel kirası düşer, yenilemede 409 alır.
+        """
+        task = self._leases.get(lease)
+        if task is None or task.state not in (PENDING, LEASED):
+            return None
+        return task
+
+    # --- HTTP uçlarının çağırdığı işlemler ------------------------------------
+
+    def lease(self, worker):
+        """Bir öğe kirala: {"lease", "item", ...}; şimdilik iş yoksa {"retry_after"}; bittiyse None."""
+        now = time.monotonic()
+        with self._cond:
+            self._expire_leases(now)
+            if self.cancel_event.is_set() or self._finished():
+                return None
+            task, wait = self._next_task(now)
+            if task is None:
+                # Ertelenmiş öğeler var ama henüz zamanı gelmedi (veya hepsi kirada)
+                return {"retry_after": min(self.poll_seconds, wait) if wait is not None else self.poll_seconds}
+            task.state = LEASED
+            task.attempts += 1
+            task.lease = uuid.uuid4().hex
+            task.deadline = now + self.lease_seconds
+            task.worker = str(worker or "?")
+            self._leases[task.lease] = task
+            orig_index, order_index, video_id, title, url = task.item
+            attempts = task.attempts
+            lease = task.lease
+        self._record_job(task, jobs.DOWNLOADING, attempts=attempts)
+        self._state(task, DOWNLOADING, worker=task.worker, attempts=attempts)
+        self._status(f"{order_index + 1}/{len(self.items)} -> {task.worker} (deneme {attempts}): {title}")
+        return {
+            "lease": lease,
+            "lease_seconds": self.lease_seconds,
+            "output_format": self.output_format,
+            "output_subdir": os.path.basename(os.path.normpath(self.output_dir)),
+            "item": {
+                "order_index": order_index,
+                "video_id": video_id,
+                "title": title,
+                "url": url,
+                "duration": task.duration,
+            },
+        }
+
+    def renew(self, lease):
+        """Kirayı uzat; kira artık bu worker'da değilse False."""
+        with self._cond:
+            task = self._leases.get(lease)
+            if task is None or task.lease != lease or task.state != LEASED or self.cancel_event.is_set():
+                return False
+            task.deadline = time.monotonic() + self.lease_seconds
+            return True
+
+    def _complete(self, task, filepath):
+        orig_index, order_index, video_id, title, _url = task.item
+        if self._manifest is not None:
+            self._manifest.record(video_id, filepath, order_index=order_index, title=title)
+        self._record_job(task, jobs.DONE, output_path=filepath, last_error=None)
+        self.worker_done[task.worker] += 1
+        self._set_final(task, DONE)
+        self._state(task, DONE, filepath=filepath, worker=task.worker)
+        self._status(f"Tamamlandı ({task.worker}): {os.path.basename(filepath)}", "success")
+
+    def accept_upload(self, lease, ext, stream, length):
+        """Worker'ın yüklediği dosyayı scratch'e al ve nihai adına atomik taşı."""
+        if not _EXT_RE.match(ext or ""):
+            raise ValueError(f"geçersiz uzantı: {ext!r}")
+        with self._cond:
+            task = self._task_for(lease)
+        if task is None:
+            return False
+        staging_dir = self.scratch_dir or self.output_dir
+        os.makedirs(staging_dir, exist_ok=True)
+        tmp_path = os.path.join(staging_dir, f".upload-{lease}.{ext}")
+        try:
+            with open(tmp_path, "wb") as fh:
+                remaining = length
+                while remaining > 0:
+                    chunk = stream.read(min(_UPLOAD_CHUNK, remaining))
+                    if not chunk:
+                        raise ConnectionError("upload ended early")
+                    fh.write(chunk)
+                    remaining -= len(chunk)
+            orig_index, order_index, video_id, title, _url = task.item
+            final_path = audio_output_path(
+                self.output_dir, {"id": video_id, "title": title}, order_index=order_index, title_override=title, ext=ext
+            )
+            with self._cond:
+                # Yükleme sürerken öğe başka bir worker'dan tamamlanmış olabilir
+                if self._task_for(lease) is None:
+                    return False
+                publish_file(tmp_path, final_path)
+                self._complete(task, final_path)
+            return True
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def accept_shared(self, lease, filename):
+        """Worker dosyayı paylaşılan klasöre yazdı; varlığını doğrula ve kaydet."""
+        final_path = os.path.join(self.output_dir, os.path.basename(filename or ""))
+        with self._cond:
+            task = self._task_for(lease)
+            if task is None:
+                return False
+            if not os.path.isfile(final_path):
+                raise FileNotFoundError(f"shared output not found: {final_path}")
+            self._complete(task, final_path)
+        return True
+
+    def report_failure(self, lease, error, category):
+        """Worker'da hata: geçiciyse beklemeden sonra tekrar kirala, değilse başarısız say."""
+        with self._cond:
+            task = self._leases.get(lease)
+            if task is None or task.lease != lease or task.state != LEASED:
+                return False
+            orig_index, order_index, _video_id, title, _url = task.item
+            ex = RuntimeError(error or "worker error")
+            category = category or classify_error(ex)
+            self.metrics.inc("ytmp3_errors_total", category=category, stage="worker")
+            if category in _WORKER_LOCAL_ERRORS:
+                retryable = task.attempts < self.max_retries
+            else:
+                retryable = self.retry_policy.should_retry(category, task.attempts, self.max_retries)
+            if retryable:
+                delay = self.retry_policy.delay(category, task.attempts)
+                self.metrics.inc("ytmp3_retries_total", category=category)
+                task.state = PENDING
+                task.lease = task.deadline = None
+                task.not_before = time.monotonic() + delay
+                self._pending.append(task)
+                retry = delay
+            else:
+                self.failed.append((orig_index, title, ex))
+                self._set_final(task, FAILED)
+                retry = None
+            attempts = task.attempts
+        self._log("Worker error:", f"[{category}]", error)
+        if retry is not None:
+            self._record_job(task, jobs.PENDING, attempts=attempts, last_error=error)
+            self._state(task, RETRYING, attempts=attempts, error=error, category=category, delay=retry)
+            self._status(f"Hata, {retry:.0f} sn sonra tekrar denenecek (deneme {attempts}): {title}\n{error}", "error")
+        else:
+            self._record_job(task, jobs.FAILED, attempts=attempts, last_error=error)
+            self._state(task, FAILED, attempts=attempts, error=error, category=category)
+            self._status(f"İndirme başarısız ({attempts} deneme): {title}\n{error}", "error")
+        return True
+
+    def snapshot(self):
+        with self._cond:
+            counts = collections.Counter(task.state for task in self._tasks)
+            leases = [
+                {"order_index": task.item[1], "title": task.item[3], "worker": task.worker}
+                for task in self._tasks
+                if task.state == LEASED
+            ]
+            workers = dict(self.worker_done)
+        return {"total": len(self._tasks), "states": dict(counts), "leases": leases, "workers": workers}
+
+    # --- çalıştırma -----------------------------------------------------------
+
+    def _skip_existing(self):
+        try:
+            self._manifest = get_manifest(self.output_dir)
+        except Exception as ex:
+            self._log("Manifest error:", ex)
+            return
+        for task in self._tasks:
+            _orig, order_index, video_id, title, _url = task.item
+            existing = self._manifest.find_existing(
+                video_id, order_index, extensions=output_extensions(self.output_format)
+            )
+            if existing:
+                self._record_job(task, jobs.DONE, output_path=existing)
+                self._set_final(task, SKIPPED)
+                self._state(task, SKIPPED, filepath=existing)
+
+    def start(self):
+        """Çıktı klasörünü ve iş deposunu hazırla, HTTP sunucusunu arka planda başlat."""
+        self._started = time.monotonic()
+        os.makedirs(self.output_dir, exist_ok=True)
+        try:
+            self._job_store = get_job_store()
+            self._job_store.enqueue(
+                self.output_dir,
+                [(order_idx, video_id, title, url) for (_o, order_idx, video_id, title, url) in self.items],
+                playlist_title=self.playlist_title,
+            )
+        except Exception as ex:
+            self._log("Job store error:", ex)
+            self._job_store = None
+        with self._cond:
+            self._skip_existing()
+        self.server = ThreadingHTTPServer((self.host, int(self.port)), _CoordinatorHandler)
+        self.server.daemon_threads = True
+        self.server.coordinator = self
+        threading.Thread(target=self.server.serve_forever, name="cluster-http", daemon=True).start()
+        self.metrics.log("cluster_started", items=len(self.items), port=self.server.server_address[1])
+        return self.server.server_address
+
+    def run(self):
+        """Tüm öğeler bitene (veya iptal edilene) kadar kirala; özet sözlüğü döndür."""
+        if self.server is None:
+            self.start()
+        try:
+            with self._cond:
+                while not self._finished() and not self.cancel_event.is_set():
+                    # Süresi dolan kiralar, worker istek göndermese de geri alınsın
+                    self._expire_leases(time.monotonic())
+                    self._cond.wait(min(1.0, self.lease_seconds / 4))
+                if self.cancel_event.is_set():
+                    for task in self._tasks:
+                        if task.state in (PENDING, LEASED):
+                            self._record_job(task, jobs.CANCELLED)
+                            self._set_final(task, CANCELLED)
+                            self._state(task, CANCELLED)
+            # Bekleyen worker'lar bir sonraki sorguda 410 alıp çıksın
+            time.sleep(min(self.poll_seconds, 5.0))
+        finally:
+            self.server.shutdown()
+            self.server.server_close()
+            remove_if_empty(self.scratch_dir)
+        summary = self.summary(time.monotonic() - self._started)
+        self.metrics.log(
+            "cluster_finished",
+            **{k: summary[k] for k in ("total", "done", "skipped", "failed", "cancelled", "reassigned")},
+        )
+        return summary
+
+    def cancel(self):
+        """Yeni kira verme; aktif kiraların yenilenmesi reddedilir, worker'lar işi bırakır."""
+        self.cancel_event.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def summary(self, elapsed=None):
+        """DownloadRun.summary ile uyumlu özet; worker başına tamamlanan öğe sayısı eklidir."""
+        with self._cond:
+            counts = collections.Counter(task.state for task in self._tasks)
+            workers = dict(self.worker_done)
+        return {
+            "output_dir": self.output_dir,
+            "playlist_title": self.playlist_title,
+            "total": len(self._tasks),
+            "done": counts[DONE],
+            "skipped": counts[SKIPPED],
+            "failed": counts[FAILED],
+            "cancelled": counts[CANCELLED],
+            "failed_items": [
+                {"index": orig_index, "title": title, "error": str(ex)} for (orig_index, title, ex) in self.failed
+            ],
+            "elapsed_seconds": elapsed,
+            "reassigned": self.reassigned,
+            "workers": workers,
+        }
+
+
+class _CoordinatorHandler(BaseHTTPRequestHandler):
+    def _authorized(self):
+        token = self.server.coordinator.token
+        if token and self.headers.get("X-Cluster-Token") != token:
+            self.close_connection = True
+            self._reply(403, {"error": "forbidden"})
+            return False
+        return True
+
+    def _reply(self, code, payload=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else b""
+        self.send_response(code)
+        if body:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _json_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if urlparse(self.path).path != "/status":
+            self.send_error(404)
+            return
+        self._reply(200, self.server.coordinator.snapshot())
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        coordinator = self.server.coordinator
+        path = urlparse(self.path).path
+        try:
+            body = self._json_body()
+            if path == "/lease":
+                grant = coordinator.lease(body.get("worker"))
+                if grant is None:
+                    self._reply(410, {"finished": True})
+                else:
+                    self._reply(200, grant)
+            elif path == "/renew":
+                self._reply(200 if coordinator.renew(body.get("lease")) else 409)
+            elif path == "/done":
+                self._reply(200 if coordinator.accept_shared(body.get("lease"), body.get("filename")) else 409)
+            elif path == "/fail":
+                ok = coordinator.report_failure(body.get("lease"), body.get("error"), body.get("category"))
+                self._reply(200 if ok else 409)
+            else:
+                self.send_error(404)
+        except (ValueError, OSError) as ex:
+            self._reply(400, {"error": str(ex)})
+
+    def do_PUT(self):
+        if not self._authorized():
+            return
+        parsed = urlparse(self.path)
+        if parsed.path != "/upload":
+            self.send_error(404)
+            return
+        query = parse_qs(parsed.query)
+        lease = (query.get("lease") or [None])[0]
+        ext = (query.get("ext") or [""])[0]
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            accepted = self.server.coordinator.accept_upload(lease, ext, self.rfile, length)
+        except (ValueError, OSError) as ex:
+            # Gövde tamamen okunmamış olabilir; bağlantı tekrar kullanılmasın
+            self.close_connection = True
+            self._reply(400, {"error": str(ex)})
+            return
+        if not accepted:
+            self.close_connection = True
+        self._reply(200 if accepted else 409)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ClusterWorker:
+    """Koordinatörden öğe kiralayıp indiren/dönüştüren worker süreci.
+
+    slots: aynı anda işlenen öğe sayısı (dönüştürme CPU'ya bağlı; çekirdek başına bir).
+    shared_output verilirse dosyalar doğrudan <shared_output>/<playlist klasörü>'ne yazılır
+    (koordinatörün çıktı klasörünü gören paylaşılan bağlama noktası); verilmezse work_dir'de
+    üretilip koordinatöre yüklenir ve yerel kopya silinir.
+    """
+
+    def __init__(
+        self,
+        coordinator_url,
+        slots=1,
+        work_dir=None,
+        shared_output=None,
+        worker_id=None,
+        token=CLUSTER_TOKEN,
+        poll_seconds=CLUSTER_POLL_SECONDS,
+        verbose=VERBOSE_LOGGING,
+        on_status=None,
+    ):
+        self.base_url = coordinator_url.rstrip("/")
+        self.slots = max(1, int(slots))
+        self.work_dir = work_dir or os.path.join(os.getcwd(), "cluster-work")
+        self.shared_output = shared_output
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.token = token
+        self.poll_seconds = poll_seconds
+        self.verbose = verbose
+        self.on_status = on_status
+        self.stop_event = threading.Event()
+        self.completed = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        # İptal edilebilmesi için aktif işlerin cancel_event'leri
+        self._active = set()
+
+    def _log(self, *args):
+        if self.verbose:
+            print(*args)
+
+    def _status(self, text, level="info"):
+        if self.on_status:
+            self.on_status(text, level)
+
+    # --- HTTP ---------------------------------------------------------------
+
+    def _request(self, method, path, payload=None, data=None, length=None, timeout=30):
+        """(durum kodu, JSON gövde) döndür; bağlantı hatalarında URLError fırlatır."""
+        headers = {}
+        if self.token:
+            headers["X-Cluster-Token"] = self.token
+        if payload is not None:
+            data = json.dumps(payload).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        if length is not None:
+            headers["Content-Length"] = str(length)
+        request = Request(self.base_url + path, data=data, method=method, headers=headers)
+        try:
+            with urlopen(request, timeout=timeout) as resp:
+                body = resp.read()
+                return resp.status, json.loads(body) if body else None
+        except HTTPError as ex:
+            try:
+                body = ex.read()
+                return ex.code, json.loads(body) if body else None
+            except ValueError:
+                return ex.code, None
+            finally:
+                ex.close()
+
+    # --- iş döngüsü ---------------------------------------------------------
+
+    def _heartbeat(self, lease, interval, cancel_event, done_event):
+        while not done_event.wait(interval):
+            try:
+                code, _ = self._request("POST", "/renew", {"lease": lease})
+            except (URLError, OSError):
+                # Geçici ağ hatası: kira süresi dolana kadar tekrar denenir
+                continue
+            if code == 409:
+                cancel_event.set()
+                return
+
+    def _process(self, grant):
+        lease = grant["lease"]
+        item = grant["item"]
+        title = item["title"]
+        shared_dir = os.path.join(self.shared_output, grant["output_subdir"]) if self.shared_output else None
+        local_dir = os.path.join(self.work_dir, lease)
+        cancel_event = threading.Event()
+        done_event = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat,
+            args=(lease, max(1.0, grant["lease_seconds"] / 3), cancel_event, done_event),
+            name="cluster-heartbeat",
+            daemon=True,
+        )
+        heartbeat.start()
+        with self._lock:
+            self._active.add(cancel_event)
+        filepath = None
+        try:
+            self._status(f"İndiriliyor: {title}")
+            filepath = download_as_mp3(
+                item["url"],
+                shared_dir or local_dir,
+                verbose=self.verbose,
+                order_index=item["order_index"],
+                title_override=title,
+                video_id=item.get("video_id"),
+                cancel_event=cancel_event,
+                output_format=grant["output_format"],
+                duration=item.get("duration"),
+                scratch_dir=os.path.join(self.work_dir, ".scratch"),
+            )
+            # Kira, koordinatör sonucu (yükleme veya /done) yanıtlayana kadar yenilenmeye devam eder;
+            # uzun bir yükleme sırasında kira dolarsa öğe boşuna başka worker'a verilir
+            if shared_dir:
+                code, _ = self._request("POST", "/done", {"lease": lease, "filename": os.path.basename(filepath)})
+            else:
+                ext = os.path.splitext(filepath)[1][1:]
+                with open(filepath, "rb") as fh:
+                    code, _ = self._request(
+                        "PUT",
+                        f"/upload?lease={lease}&ext={ext}",
+                        data=fh,
+                        length=os.path.getsize(filepath),
+                        timeout=max(60, grant["lease_seconds"]),
+                    )
+            if code != 200:
+                raise LeaseLost(f"result rejected ({code}): {title}")
+            with self._lock:
+                self.completed += 1
+            self._status(f"Tamamlandı: {title}", "success")
+        except (DownloadCancelled, LeaseLost) as ex:
+            self._log("Lease lost:", ex)
+            self._status(f"İş bırakıldı (kira geri alındı): {title}")
+        except Exception as ex:
+            if isinstance(ex, (URLError, ConnectionError)) and filepath:
+                # Sonuç iletilemedi; kira dolunca öğe başka worker'a verilir
+                self._log("Upload error:", ex)
+                return
+            with self._lock:
+                self.failed += 1
+            self._log("Worker error:", ex)
+            self._status(f"Hata: {title}\n{describe_error(ex)}", "error")
+            try:
+                self._request("POST", "/fail", {"lease": lease, "error": str(ex), "category": classify_error(ex)})
+            except (URLError, OSError):
+                pass
+        finally:
+            done_event.set()
+            with self._lock:
+                self._active.discard(cancel_event)
+            shutil.rmtree(local_dir, ignore_errors=True)
+
+    def _slot_loop(self):
+        errors = 0
+        while not self.stop_event.is_set():
+            try:
+                code, grant = self._request("POST", "/lease", {"worker": self.worker_id})
+                errors = 0
+            except (URLError, OSError) as ex:
+                errors += 1
+                # Koordinatör kapandıysa (iş bitti) bir süre sonra çık
+                if errors >= 5:
+                    self._log("Coordinator unreachable:", ex)
+                    return
+                self.stop_event.wait(self.poll_seconds)
+                continue
+            if code == 410:
+                return
+            if code != 200 or "lease" not in (grant or {}):
+                self.stop_event.wait((grant or {}).get("retry_after", self.poll_seconds))
+                continue
+            self._process(grant)
+
+    def run(self):
+        """Koordinatör iş kalmadığını bildirene (410) kadar çalış; {completed, failed} döndür."""
+        os.makedirs(self.work_dir, exist_ok=True)
+        threads = [
+            threading.Thread(target=self._slot_loop, name=f"cluster-slot-{i}", daemon=True) for i in range(self.slots)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return {"worker": self.worker_id, "completed": self.completed, "failed": self.failed}
+
+    def cancel(self):
+        """Yeni kira isteme; aktif indirme/dönüştürmeleri kes (kiralar dolunca başka worker'a geçer)."""
+        self.stop_event.set()
+        with self._lock:
+            for event in self._active:
+                event.set()
+
+
+def _run_until_interrupt(target):
+    """target.run()'ı ayrı thread'de çalıştır; Ctrl+C gelirse iptal et ve durmasını bekle."""
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault("summary", target.run()), daemon=True)
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(0.2)
+    except KeyboardInterrupt:
+        target.cancel()
+        thread.join()
+    return result.get("summary")
+
+
+def _main(argv=None):
+    import config
+    from downloader import fetch_playlist_info, playlist_output_dir
+
+    parser = argparse.ArgumentParser(description="Birden çok makineye dağıtılmış indirme")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_coord = sub.add_parser("coordinator", help="playlist'i al ve öğeleri worker'lara dağıt")
+    p_coord.add_argument("url", help="playlist veya video URL'si")
+    p_coord.add_argument("-o", "--output", metavar="KLASÖR", help="ana çıktı klasörü (varsayılan: ./downloads)")
+    p_coord.add_argument("--host", default=CLUSTER_HOST, help="dinlenecek adres (yerel ağ için 0.0.0.0)")
+    p_coord.add_argument("--port", type=int, default=CLUSTER_PORT)
+    p_coord.add_argument("--token", default=CLUSTER_TOKEN, help="worker'ların göndermesi gereken ortak anahtar")
+    p_coord.add_argument("--lease-seconds", type=float, default=CLUSTER_LEASE_SECONDS)
+    p_coord.add_argument("--retries", type=int, default=MAX_RETRIES, help="öğe başına maksimum deneme")
+    p_coord.add_argument("--format", dest="output_format", choices=("mp3", "m4a", "opus", "original"))
+    p_worker = sub.add_parser("worker", help="koordinatörden öğe alıp indir/dönüştür")
+    p_worker.add_argument("coordinator", help="koordinatör adresi, ör. http://192.168.1.10:8765")
+    p_worker.add_argument("--slots", type=int, default=config.DEFAULT_TRANSCODE_WORKERS, help="aynı anda işlenen öğe")
+    p_worker.add_argument("--work-dir", metavar="KLASÖR", help="ara dosyalar ve yüklenecek çıktılar")
+    p_worker.add_argument(
+        "--shared-output",
+        metavar="KLASÖR",
+        help="koordinatörün ana çıktı klasörünün bu makinedeki bağlama noktası; dosyalar yüklenmez, buraya yazılır",
+    )
+    p_worker.add_argument("--token", default=CLUSTER_TOKEN)
+    p_worker.add_argument("--id", dest="worker_id", help="worker adı (varsayılan: makine adı-pid)")
+    for p in (p_coord, p_worker):
+        p.add_argument("-q", "--quiet", action="store_true", help="stderr'e durum satırı yazma")
+        p.add_argument("-v", "--verbose", action="store_true", help="ayrıntılı log")
+    args = parser.parse_args(argv)
+
+    def log(text, level="info"):
+        if not args.quiet:
+            print(text, file=sys.stderr, flush=True)
+
+    if args.command == "worker":
+        worker = ClusterWorker(
+            args.coordinator,
+            slots=args.slots,
+            work_dir=args.work_dir,
+            shared_output=args.shared_output,
+            worker_id=args.worker_id,
+            token=args.token,
+            verbose=args.verbose,
+            on_status=log,
+        )
+        log(f"Worker {worker.worker_id}: {worker.slots} slot -> {worker.base_url}")
+        summary = _run_until_interrupt(worker)
+        print(json.dumps(summary, ensure_ascii=False), flush=True)
+        return 0
+
+    if args.output:
+        # Önbellek, iş deposu ve scratch de seçilen klasöre (aynı dosya sistemine) taşınır
+        config.use_output_dir(args.output)
+    base_dir = config.OUTPUT_DIR
+    result = fetch_playlist_info(args.url, verbose=args.verbose, flat=config.FLAT_PLAYLIST_FETCH)
+    entries = list(result["entries"])
+    if not entries:
+        log(f"Oynatma listesi bulunamadı veya boş: {args.url}")
+        return 1
+    playlist_title = result.get("title") or ""
+    output_dir = playlist_output_dir(playlist_title, len(entries), base_dir)
+    coordinator = Coordinator(
+        [(idx, idx, ent.get("id"), ent["title"], ent["url"]) for idx, ent in enumerate(entries)],
+        output_dir,
+        playlist_title=playlist_title,
+        durations={idx: ent.get("duration") for idx, ent in enumerate(entries)},
+        output_format=args.output_format or config.OUTPUT_FORMAT,
+        max_retries=args.retries,
+        lease_seconds=args.lease_seconds,
+        host=args.host,
+        port=args.port,
+        token=args.token,
+        scratch_dir=config.SCRATCH_DIR,
+        verbose=args.verbose,
+        on_status=log,
+    )
+    host, port = coordinator.start()
+    log(f"{playlist_title} ({len(entries)} video) -> {output_dir}; worker'lar için http://{host}:{port}")
+    summary = _run_until_interrupt(coordinator)
+    print(json.dumps(summary, ensure_ascii=False), flush=True)
+    if coordinator.cancelled:
+        return 130
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
@@ -0,0 +1,235 @@
+# concurrency.py
+# Çalışma sırasında ayarlanabilen paralellik sınırı ve AIMD (additive increase /
+# multiplicative decrease) tarzı uyarlamalı denetleyici.
+#
+# Pipeline indirme havuzunu üst sınır kadar thread (asyncio motorunda görev) ile açar; kaç
+# tanesinin aynı anda indirme yapacağını AdjustableLimit belirler. AdaptiveConcurrency belirli aralıklarla
+# toplam/worker başına hızı, hata (özellikle 429/throttle) oranını ve dönüştürmelerden
+# gelen CPU yükünü ölçer:
+#   - throttle veya yüksek hata oranı  -> sınır yarıya iner
+#   - CPU doygun                        -> sınır 1 azalır
+#   - son artış hız kazandırmadıysa     -> sınır 1 geri alınır (bağlantı doygun)
+#   - bekleyen iş varsa                 -> sınır 1 artar
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+
+from config import (
+    ADAPTIVE_MIN_WORKERS,
+    ADAPTIVE_MAX_WORKERS,
+    ADAPTIVE_INTERVAL_SECONDS,
+    ADAPTIVE_ERROR_RATE_THRESHOLD,
+    ADAPTIVE_CPU_LOAD_THRESHOLD,
+    ADAPTIVE_MIN_GAIN,
+)
+
+
+class AdjustableLimit:
+    """Sınırı çalışma sırasında değiştirilebilen semafor."""
+
+    def __init__(self, limit):
+        self._cond = threading.Condition()
+        self._limit = max(1, int(limit))
+        self.active = 0
+        self.waiting = 0
+
+    @property
+    def limit(self):
+        return self._limit
+
+    def set_limit(self, limit):
+        with self._cond:
+            self._limit = max(1, int(limit))
+            self._cond.notify_all()
+
+    def acquire(self, cancel_event=None):
+        """Yer açılınca True; cancel_event set edilirse beklemeden False döndür."""
+        with self._cond:
+            self.waiting += 1
+            try:
+                while self.active >= self._limit:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return False
+                    self._cond.wait(0.1)
+                self.active += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    async def acquire_async(self, cancel_event=None):
+        """acquire()'un asyncio sürümü: yer açılana kadar event loop'u bloklamadan yoklar."""
+        with self._cond:
+            self.waiting += 1
+        try:
+            while True:
+                with self._cond:
+                    if self.active < self._limit:
+                        self.active += 1
+                        return True
+                if cancel_event is not None and cancel_event.is_set():
+                    return False
+                await asyncio.sleep(0.05)
+        finally:
+            with self._cond:
+                self.waiting -= 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+
+def cpu_load():
+    """Çekirdek başına 1 dakikalık yük ortalaması; platform desteklemiyorsa None."""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+class AdaptiveConcurrency:
+    """AdjustableLimit'i ölçümlere göre periyodik olarak ayarlayan denetleyici.
+
+    bytes_sampler() -> şimdiye kadar indirilen toplam bayt (ör. ProgressTracker)
+    on_adjust(old, new, reason, metrics) -> her değişiklikte çağrılır
+    """
+
+    def __init__(
+        self,
+        limit,
+        bytes_sampler,
+        min_workers=ADAPTIVE_MIN_WORKERS,
+        max_workers=ADAPTIVE_MAX_WORKERS,
+        interval=ADAPTIVE_INTERVAL_SECONDS,
+        error_rate_threshold=ADAPTIVE_ERROR_RATE_THRESHOLD,
+        cpu_threshold=ADAPTIVE_CPU_LOAD_THRESHOLD,
+        min_gain=ADAPTIVE_MIN_GAIN,
+        load_sampler=cpu_load,
+        on_adjust=None,
+        hold_intervals=3,
+    ):
+        self.limit = limit
+        self.bytes_sampler = bytes_sampler
+        self.min_workers = max(1, int(min_workers))
+        self.max_workers = max(self.min_workers, int(max_workers))
+        self.interval = interval
+        self.error_rate_threshold = error_rate_threshold
+        self.cpu_threshold = cpu_threshold
+        self.min_gain = min_gain
+        self.load_sampler = load_sampler
+        self.on_adjust = on_adjust
+        # Azaltmadan sonra bu kadar tur boyunca tekrar artırma denenmez (salınımı önler)
+        self.hold_intervals = hold_intervals
+        # (zaman, old, new, reason, metrics) kayıtları
+        self.history = []
+        self._lock = threading.Lock()
+        self._outcomes = deque()  # (zaman, başarılı mı, throttle mı)
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_bytes = 0
+        self._last_time = None
+        self._last_total_bps = None
+        self._last_action = None
+        self._hold = 0
+
+    # --- ölçüm girdileri ------------------------------------------------------
+
+    def record_success(self):
+        with self._lock:
+            self._outcomes.append((time.monotonic(), True, False))
+
+    def record_error(self, throttled=False):
+        with self._lock:
+            self._outcomes.append((time.monotonic(), False, bool(throttled)))
+
+    def _error_stats(self, now):
+        with self._lock:
+            while self._outcomes and now - self._outcomes[0][0] > self.interval:
+                self._outcomes.popleft()
+            total = len(self._outcomes)
+            errors = sum(1 for _t, ok, _th in self._outcomes if not ok)
+            throttled = sum(1 for _t, _ok, th in self._outcomes if th)
+        return total, errors, throttled
+
+    # --- karar -----------------------------------------------------------------
+
+    def step(self, now=None):
+        """Bir ölçüm/karar turu; sınır değiştiyse yeni değeri döndür."""
+        now = time.monotonic() if now is None else now
+        current_bytes = self.bytes_sampler()
+        if self._last_time is None:
+            self._last_time, self._last_bytes = now, current_bytes
+            return None
+        span = now - self._last_time
+        if span <= 0:
+            return None
+        total_bps = (current_bytes - self._last_bytes) / span
+        self._last_time, self._last_bytes = now, current_bytes
+
+        old = self.limit.limit
+        busy = max(1, min(old, self.limit.active))
+        total, errors, throttled = self._error_stats(now)
+        load = self.load_sampler() if self.load_sampler else None
+        metrics = {
+            "total_bps": total_bps,
+            "per_worker_bps": total_bps / busy,
+            "active": self.limit.active,
+            "waiting": self.limit.waiting,
+            "errors": errors,
+            "throttled": throttled,
+            "outcomes": total,
+            "cpu_load": load,
+        }
+
+        new, reason = old, None
+        if throttled or (total and errors / total > self.error_rate_threshold):
+            new, reason = max(self.min_workers, old // 2), "throttle" if throttled else "errors"
+        elif load is not None and load > self.cpu_threshold:
+            new, reason = max(self.min_workers, old - 1), "cpu"
+        elif (
+            self._last_action == "increase"
+            and self._last_total_bps
+            and total_bps < self._last_total_bps * (1.0 + self.min_gain)
+        ):
+            # Son eklenen worker toplam hızı artırmadı: bağlantı doygun, geri al
+            new, reason = max(self.min_workers, old - 1), "saturated"
+        elif self._hold == 0 and self.limit.waiting > 0 and self.limit.active >= old:
+            new, reason = min(self.max_workers, old + 1), "increase"
+
+        self._last_total_bps = total_bps
+        self._last_action = reason if new != old else None
+        if new < old:
+            self._hold = self.hold_intervals
+        elif self._hold:
+            self._hold -= 1
+        if new == old:
+            return None
+        self.limit.set_limit(new)
+        self.history.append((time.time(), old, new, reason, metrics))
+        if self.on_adjust:
+            try:
+                self.on_adjust(old, new, reason, metrics)
+            except Exception:
+                pass
+        return new
+
+    # --- arka plan thread'i -----------------------------------------------------
+
+    def start(self):
+        if self._thread is None:
+            self.step()
+            self._thread = threading.Thread(target=self._run, name="adaptive-concurrency", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.step()
@@ -1,8 +1,7 @@
 import os
 
-# Output folder (will be created if missing)
+# Output folder (created on first use, not at import time)
 OUTPUT_DIR = os.path.join(os.getcwd(), "downloads")
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # Default parallel worker count
 DEFAULT_MAX_WORKERS = 3
@@ -12,3 +11,188 @@ MAX_RETRIES = 3
 
 # If True, print extra debug/log lines to console
 VERBOSE_LOGGING = True
+
+# If True, playlists are enumerated flat (id/title/url only) and streamed page by page;
+# full per-video resolution is deferred to download time
+FLAT_PLAYLIST_FETCH = True
+
+# How many fetched entries to add to the list before refreshing the UI
+FETCH_RENDER_BATCH = 50
+
+# The video list renders only one page of rows (reused controls) regardless of playlist size
+LIST_PAGE_SIZE = 100
+
+# Persistent metadata cache (SQLite) for playlist listings and per-video info
+CACHE_ENABLED = True
+CACHE_PATH = os.path.join(OUTPUT_DIR, ".metadata_cache.sqlite3")
+# Playlist listings may change; keep them for an hour
+CACHE_PLAYLIST_TTL_SECONDS = 60 * 60
+# Video info contains signed stream URLs that expire after a few hours
+CACHE_VIDEO_TTL_SECONDS = 3 * 60 * 60
+# Least recently used records are evicted above this total payload size
+CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+# Download and MP3 transcode run as separate pipeline stages.
+# DEFAULT_MAX_WORKERS sizes the network (download) stage; the transcode stage is
+# CPU-bound and defaults to one worker per core.
+DEFAULT_TRANSCODE_WORKERS = os.cpu_count() or 2
+
+# Raw downloads waiting for conversion; downloaders block when the queue is full
+TRANSCODE_QUEUE_SIZE = 8
+
+# ffmpeg binary and target MP3 bitrate
+FFMPEG_BINARY = "ffmpeg"
+MP3_BITRATE = "192k"
+
+# Output format: "mp3" always re-encodes; "m4a" / "opus" prefer a stream already in that
+# codec and only remux it (no re-encode, no quality loss); "original" keeps the downloaded
+# stream as is (webm/m4a) without running ffmpeg at all
+OUTPUT_FORMAT = "mp3"
+# Bitrate used when an m4a/opus target has to be re-encoded because no matching stream exists
+TRANSCODE_FALLBACK_BITRATE = "160k"
+
+# Reuse one preconfigured YoutubeDL (and its HTTP session) per worker thread
+# instead of creating a new one for every video and retry
+REUSE_YTDLP_INSTANCES = True
+
+# Long items (multi-hour mixes) are split into concurrent ranged fragment requests that
+# share the worker's YoutubeDL HTTP session, instead of one slow single-connection stream.
+# Applies to videos at least this long (seconds, from playlist metadata); None = off
+FRAGMENTED_DOWNLOAD_MIN_SECONDS = 20 * 60
+CONCURRENT_FRAGMENTS = 4
+# Start the longest videos first so a long mix doesn't end up alone at the tail of the run
+SCHEDULE_LONGEST_FIRST = True
+
+# Download/transcode intermediates (yt-dlp .part files, raw streams, ffmpeg output) are
+# staged here and atomically moved into the playlist folder when complete, so the folder
+# only ever contains finished files. Point it at tmpfs or a fast local SSD; None = stage
+# inside the playlist folder.
+SCRATCH_DIR = os.path.join(OUTPUT_DIR, ".scratch")
+
+# Disk-space preflight: each item's need is estimated from its duration and bitrates, and
+# new downloads wait while free space minus in-flight reservations would drop below this
+DISK_RESERVE_BYTES = 512 * 1024 * 1024
+DISK_ESTIMATE_SOURCE_BITRATE = "160k"  # typical YouTube audio stream
+DISK_ESTIMATE_DEFAULT_SECONDS = 600  # used when the duration is unknown
+DISK_SPACE_RETRY_SECONDS = 15.0
+
+# Download engine: "threads" = thread-pool pipeline (pipeline.py); "asyncio" = one event
+# loop with async HTTP streams and asyncio subprocess ffmpeg (async_engine.py, needs httpx).
+# Both produce the same files, job records and summary, so they can be A/B compared.
+DOWNLOAD_ENGINE = "threads"
+# asyncio engine: bytes requested per ranged GET (YouTube throttles unranged streams);
+# used when the extractor doesn't suggest its own chunk size
+ASYNC_HTTP_CHUNK_SIZE = 10 * 1024 * 1024
+ASYNC_HTTP_TIMEOUT = 30.0
+# asyncio engine: threads for the blocking yt-dlp work (info extraction, HLS/DASH fallback)
+ASYNC_EXECUTOR_WORKERS = 4
+
+# Distributed mode (cluster.py): a coordinator fetches the playlist and leases items over
+# HTTP/JSON to worker processes on other machines, which download and transcode them and
+# upload the result (or write it to a shared folder). Bind to "0.0.0.0" to accept LAN workers.
+CLUSTER_HOST = "127.0.0.1"
+CLUSTER_PORT = 8765
+# Optional shared secret; workers must send the same token
+CLUSTER_TOKEN = None
+# A lease not renewed within this time (worker died / lost network) is reassigned
+CLUSTER_LEASE_SECONDS = 60.0
+# Idle workers ask for work again after this long
+CLUSTER_POLL_SECONDS = 2.0
+
+# Durable job store (SQLite): per-item state survives restarts so unfinished runs can be resumed
+JOBS_DB_PATH = os.path.join(OUTPUT_DIR, ".jobs.sqlite3")
+
+# After cancel, wait at most this long for in-flight work to stop before returning
+CANCEL_GRACE_SECONDS = 2.0
+
+# UI refresh rate for worker-originated updates (batched, coalesced page.update calls)
+UI_FLUSH_HZ = 10
+
+# Byte-level progress: rolling throughput window and minimum interval between
+# machine-readable progress events (per item and run-wide snapshots)
+PROGRESS_ROLLING_WINDOW_SECONDS = 10.0
+PROGRESS_EVENT_INTERVAL_SECONDS = 1.0
+
+# Progress events are appended as JSON lines to this file inside the playlist folder
+PROGRESS_LOG_ENABLED = True
+PROGRESS_LOG_FILENAME = ".progress.jsonl"
+
+# Adaptive download concurrency (AIMD): the worker count is tuned during the run from
+# measured throughput, error/throttle rate and CPU load, within these bounds
+ADAPTIVE_CONCURRENCY = False
+ADAPTIVE_MIN_WORKERS = 1
+ADAPTIVE_MAX_WORKERS = 8
+ADAPTIVE_INTERVAL_SECONDS = 5.0
+# Halve the worker count when more than this share of recent attempts failed
+ADAPTIVE_ERROR_RATE_THRESHOLD = 0.2
+# Drop a worker when the per-core load average (conversions) exceeds this
+ADAPTIVE_CPU_LOAD_THRESHOLD = 0.9
+# Keep an added worker only if it raised total throughput by at least this fraction
+ADAPTIVE_MIN_GAIN = 0.05
+
+# Retry policy: permanent errors (unavailable video, missing ffmpeg, disk/permission) are
+# not retried; transient ones are re-queued at the end of the run after an exponential
+# backoff with full jitter. Throttling (HTTP 429) starts from a longer base delay.
+RETRY_BASE_DELAY_SECONDS = 2.0
+RETRY_THROTTLE_BASE_DELAY_SECONDS = 30.0
+RETRY_MAX_DELAY_SECONDS = 300.0
+
+# Global circuit breaker: after this many consecutive transient failures (across all items)
+# new downloads pause for the cooldown, then a single probe decides whether to resume
+CIRCUIT_BREAKER_THRESHOLD = 5
+CIRCUIT_BREAKER_COOLDOWN_SECONDS = 60.0
+
+# Global bandwidth limit shared by all download workers (token bucket), e.g. "2M" or
+# "500K" bytes/s; None = unlimited. Adjustable at runtime from the GUI / CLI.
+BANDWIDTH_LIMIT = None
+# Optional time-of-day windows overriding the limit, e.g. [("09:00", "18:00", "1M")];
+# windows may wrap around midnight ("22:00" - "06:00"). Outside them BANDWIDTH_LIMIT applies.
+BANDWIDTH_SCHEDULE = []
+# Bucket capacity in seconds of traffic (short bursts above the limit)
+BANDWIDTH_BURST_SECONDS = 1.0
+
+# Global content-addressed library: each video is stored once per encode setting and
+# playlist folders get hardlinks (falling back to symlinks, then copies) named N.Title.mp3.
+# Set LIBRARY_DIR to None to write files straight into playlist folders.
+LIBRARY_DIR = os.path.join(OUTPUT_DIR, ".library")
+LIBRARY_LINK_MODE = "hardlink"  # "hardlink" | "symlink" | "copy"
+
+# Incremental sync: "download all" diffs the playlist against a stable per-playlist folder
+# (<title>__<playlist id>) by video id, downloads only new items and renames reordered ones
+SYNC_MODE = False
+# In sync mode, also delete files of videos that were removed from the playlist
+SYNC_REMOVE_DELETED = False
+
+# Per-stage timing (playlist extraction, format selection, download, ffmpeg, file finalize,
+# UI updates) recorded as Prometheus-style histograms and counters
+METRICS_ENABLED = True
+# Serve them as text at http://127.0.0.1:<port>/metrics; None = no endpoint
+METRICS_PORT = None
+# Every stage timing is also appended to this JSON-lines run log; None = off
+METRICS_LOG_PATH = os.path.join(OUTPUT_DIR, ".metrics.jsonl")
+# Above this size the log is rotated to <name>.1 (replacing the previous one); None = never
+METRICS_LOG_MAX_BYTES = 20 * 1024 * 1024
+
+
+def use_output_dir(path):
+    """Move OUTPUT_DIR to path, together with the state kept directly under it.
+
+    Metadata cache, job store, scratch, library and metrics log follow the output folder so
+    that `-o` keeps publishes and library hardlinks on one filesystem. Paths pointed elsewhere
+    are left alone. The shared stores read these values on first use, so call this before
+    starting a run.
+    """
+    global OUTPUT_DIR, CACHE_PATH, SCRATCH_DIR, JOBS_DB_PATH, LIBRARY_DIR, METRICS_LOG_PATH
+    old, path = OUTPUT_DIR, os.path.abspath(path)
+
+    def rebase(value):
+        if value and os.path.dirname(os.path.abspath(value)) == old:
+            return os.path.join(path, os.path.basename(value))
+        return value
+
+    CACHE_PATH = rebase(CACHE_PATH)
+    SCRATCH_DIR = rebase(SCRATCH_DIR)
+    JOBS_DB_PATH = rebase(JOBS_DB_PATH)
+    LIBRARY_DIR = rebase(LIBRARY_DIR)
+    METRICS_LOG_PATH = rebase(METRICS_LOG_PATH)
+    OUTPUT_DIR = path
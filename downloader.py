@@ -1,6 +1,69 @@
+import glob
 import os
 import socket
-from yt_dlp import YoutubeDL
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import date
+from urllib.parse import urlparse, parse_qs
+from cache import get_default_cache
+from config import (
+    OUTPUT_DIR,
+    FFMPEG_BINARY,
+    MP3_BITRATE,
+    REUSE_YTDLP_INSTANCES,
+    CONCURRENT_FRAGMENTS,
+    FRAGMENTED_DOWNLOAD_MIN_SECONDS,
+    OUTPUT_FORMAT,
+    TRANSCODE_FALLBACK_BITRATE,
+)
+from library import settings_tag
+from staging import publish_file
+from metrics import (
+    get_metrics,
+    STAGE_PLAYLIST_EXTRACT,
+    STAGE_FORMAT_SELECT,
+    STAGE_DOWNLOAD,
+    STAGE_TRANSCODE,
+    STAGE_FINALIZE,
+)
+from ydl_pool import YoutubeDLPool
+
+# Ham ses indirmesi için temel yt-dlp seçenekleri (çıktı klasörü çağrı başına "paths" ile verilir)
+_DOWNLOAD_OPTS = {
+    "format": "bestaudio/best",
+    "outtmpl": "%(id)s_%(title)s.%(ext)s",
+    "quiet": True,
+    "noplaylist": True,
+    # yarım kalmış .part dosyaları (ör. uygulama kapandıysa) baştan değil kaldığı yerden indirilir
+    "continuedl": True,
+}
+
+
+class DownloadCancelled(Exception):
+    """İndirme veya dönüştürme kullanıcı tarafından iptal edildi."""
+
+
+_download_pool = None
+_download_pool_lock = threading.Lock()
+
+
+def get_download_pool() -> YoutubeDLPool:
+    """download_audio'nun kullandığı, worker başına YoutubeDL havuzunu döndür."""
+    global _download_pool
+    with _download_pool_lock:
+        if _download_pool is None:
+            _download_pool = YoutubeDLPool(_DOWNLOAD_OPTS)
+        return _download_pool
+
+
+def set_download_pool(pool):
+    """download_audio'nun kullanacağı havuzu değiştir (ör. sahte extractor ile benchmark); eskisini döndür."""
+    global _download_pool
+    with _download_pool_lock:
+        old, _download_pool = _download_pool, pool
+        return old
 
 
 def sanitize_for_fs(name: str) -> str:
@@ -11,38 +74,239 @@ def sanitize_for_fs(name: str) -> str:
     return cleaned or "playlist"
 
 
-def describe_error(ex: Exception) -> str:
-    """Hataları kullanıcı için daha anlaşılır kategorilere ayır."""
+def playlist_output_dir(playlist_title, count, base_dir=OUTPUT_DIR) -> str:
+    """Playlist için alt klasör yolu: <başlık>_<adet>_video_<tarih> (klasörü oluşturmaz)."""
+    folder_name = f"{sanitize_for_fs(playlist_title or '')}_{count}_video_{date.today().isoformat()}"
+    return os.path.join(base_dir, folder_name)
+
+
+def playlist_sync_dir(playlist_title, playlist_id=None, base_dir=OUTPUT_DIR) -> str:
+    """Senkronizasyon modu için kalıcı klasör: <başlık>__<playlist_id> (klasörü oluşturmaz).
+
+    Playlist'in başlığı sonradan değişse de aynı id ile önceden açılmış klasör kullanılır.
+    """
+    safe_title = sanitize_for_fs(playlist_title or "")
+    if not playlist_id:
+        return os.path.join(base_dir, safe_title)
+    suffix = f"__{sanitize_for_fs(playlist_id)}"
+    try:
+        for name in sorted(os.listdir(base_dir)):
+            if name.endswith(suffix) and os.path.isdir(os.path.join(base_dir, name)):
+                return os.path.join(base_dir, name)
+    except FileNotFoundError:
+        pass
+    return os.path.join(base_dir, safe_title + suffix)
+
+
+# classify_error kategorileri
+ERROR_CANCELLED = "cancelled"
+ERROR_THROTTLED = "throttled"  # HTTP 429 / rate limit
+ERROR_NETWORK = "network"  # bağlantı, zaman aşımı, 5xx
+ERROR_UNAVAILABLE = "unavailable"  # silinmiş/gizli/kısıtlı video
+ERROR_FFMPEG = "ffmpeg"
+ERROR_PERMISSION = "permission"
+ERROR_DISK = "disk"
+ERROR_YOUTUBE = "youtube"  # diğer yt-dlp/YouTube hataları
+ERROR_UNKNOWN = "unknown"
+
+# Tekrar denemekle düzelmeyecek hatalar
+PERMANENT_ERRORS = (ERROR_CANCELLED, ERROR_UNAVAILABLE, ERROR_FFMPEG, ERROR_PERMISSION, ERROR_DISK)
+
+
+def classify_error(ex: Exception) -> str:
+    """Hatanın kategorisini döndür (retry politikası ve describe_error için)."""
     msg = str(ex) if ex else ""
     lower = msg.lower()
 
+    if isinstance(ex, DownloadCancelled):
+        return ERROR_CANCELLED
+
+    # Rate limit / throttle
+    if any(k in lower for k in ["http error 429", "too many requests", "rate limit", "rate-limit"]):
+        return ERROR_THROTTLED
+
     # İnternet / bağlantı
     if isinstance(ex, (socket.gaierror, ConnectionError, TimeoutError)) or any(
-        k in lower for k in ["timed out", "connection reset", "name or service not known", "network is unreachable"]
+        k in lower
+        for k in [
+            "timed out",
+            "connection reset",
+            "name or service not known",
+            "network is unreachable",
+            "incompleteread",
+            "http error 500",
+            "http error 502",
+            "http error 503",
+            "http error 504",
+        ]
     ):
-        return "İnternet veya bağlantı hatası. Lütfen bağlantınızı kontrol edin ve tekrar deneyin."
+        return ERROR_NETWORK
 
     # ffmpeg bulunamadı / çalıştırılamadı
     if "ffmpeg" in lower and any(k in lower for k in ["not found", "is not recognized", "no such file"]):
-        return "FFmpeg bulunamadı. Lütfen ffmpeg'in sisteminizde kurulu ve PATH içinde olduğundan emin olun."
+        return ERROR_FFMPEG
 
     # Disk / izin
     if isinstance(ex, PermissionError) or "permission denied" in lower:
-        return "Dosya yazma izni yok. Uygulamayı yeterli yetki ile çalıştırın veya çıktı klasörünüzün izinlerini kontrol edin."
+        return ERROR_PERMISSION
 
     if isinstance(ex, OSError) and any(k in lower for k in ["no space left on device", "disk full"]):
-        return "Disk dolu. Lütfen biraz yer açıp tekrar deneyin."
+        return ERROR_DISK
+
+    # Kalıcı olarak erişilemeyen videolar
+    if any(
+        k in lower
+        for k in [
+            "video unavailable",
+            "private video",
+            "has been removed",
+            "copyright",
+            "members-only",
+            "confirm your age",
+            "not available in your country",
+        ]
+    ):
+        return ERROR_UNAVAILABLE
 
     # yt-dlp / YouTube spesifik
-    if "yt-dlp" in lower or "youtube" in lower or "video unavailable" in lower:
+    if "yt-dlp" in lower or "youtube" in lower:
+        return ERROR_YOUTUBE
+
+    return ERROR_UNKNOWN
+
+
+def describe_error(ex: Exception) -> str:
+    """Hataları kullanıcı için daha anlaşılır kategorilere ayır."""
+    category = classify_error(ex)
+
+    if category == ERROR_CANCELLED:
+        return "İndirme iptal edildi."
+
+    if category == ERROR_THROTTLED:
+        return "YouTube çok fazla istek nedeniyle indirmeleri geçici olarak sınırladı. Bir süre beklenip tekrar denenecek."
+
+    if category == ERROR_NETWORK:
+        return "İnternet veya bağlantı hatası. Lütfen bağlantınızı kontrol edin ve tekrar deneyin."
+
+    if category == ERROR_FFMPEG:
+        return "FFmpeg bulunamadı. Lütfen ffmpeg'in sisteminizde kurulu ve PATH içinde olduğundan emin olun."
+
+    if category == ERROR_PERMISSION:
+        return "Dosya yazma izni yok. Uygulamayı yeterli yetki ile çalıştırın veya çıktı klasörünüzün izinlerini kontrol edin."
+
+    if category == ERROR_DISK:
+        return "Disk dolu. Lütfen biraz yer açıp tekrar deneyin."
+
+    if category == ERROR_UNAVAILABLE:
+        return "Video kullanılamıyor (silinmiş, gizli veya erişimi kısıtlı). Tekrar denenmeyecek."
+
+    if category == ERROR_YOUTUBE:
         return "YouTube/yt-dlp kaynaklı bir hata oluştu. Video kısıtlı veya geçici bir sorun olabilir. Bir süre sonra tekrar deneyin."
 
     # Varsayılan
+    msg = str(ex) if ex else ""
     return f"Beklenmeyen bir hata oluştu: {msg}"
 
 
-def fetch_playlist_info(playlist_url, verbose: bool = False):
-    """Return a dict: {'title': playlist_title, 'entries': [{'id':..., 'title':..., 'url':...}, ...]}"""
+def _entry_from_info(e):
+    """yt-dlp girdisinden hafif {'id', 'title', 'url', 'duration'} kaydı üret."""
+    video_id = e.get("id")
+    title = e.get("title") or video_id
+    if video_id:
+        url = f"https://www.youtube.com/watch?v={video_id}"
+    else:
+        url = e.get("webpage_url") or e.get("url") or ""
+    return {"id": video_id, "title": title, "url": url, "duration": e.get("duration")}
+
+
+def _fetch_playlist_flat(playlist_url, verbose: bool = False, cache=None):
+    """Playlist'i videoları tek tek çözmeden, sayfa sayfa ve tembel (lazy) şekilde listele."""
+    ydl_opts = {
+        "quiet": True,
+        "skip_download": True,
+        "ignoreerrors": True,
+        "noplaylist": False,
+        # sadece id/başlık/url; format ve manifest çözümü indirme anına bırakılır
+        "extract_flat": "in_playlist",
+        "lazy_playlist": True,
+    }
+    from yt_dlp import YoutubeDL
+
+    started = time.perf_counter()
+    ydl = YoutubeDL(ydl_opts)
+    if verbose:
+        print("[downloader] Fetching playlist info (flat):", playlist_url)
+    try:
+        # process=False: entries, yt-dlp sayfaları çektikçe dolan bir generator olarak kalır
+        info = ydl.extract_info(playlist_url, download=False, process=False)
+        # watch?v=..&list=.. gibi linkler önce playlist sayfasına yönlendiren bir url sonucu döner
+        hops = 0
+        while info and info.get("_type") in ("url", "url_transparent") and hops < 3:
+            info = ydl.extract_info(info["url"], download=False, process=False, ie_key=info.get("ie_key"))
+            hops += 1
+    except Exception:
+        ydl.close()
+        raise
+
+    if info is None:
+        ydl.close()
+        return {"title": "", "id": None, "entries": iter(())}
+
+    playlist_title = info.get("title") or "Oynatma listesi"
+    playlist_id = info.get("id") if info.get("_type") == "playlist" else None
+    playlist_id = playlist_id or _playlist_id_from_url(playlist_url)
+
+    def _generate():
+        collected = []
+        try:
+            if info.get("_type") != "playlist":
+                entry = _entry_from_info(info)
+                collected.append(entry)
+                yield entry
+            else:
+                for e in info.get("entries") or []:
+                    if not e:
+                        continue
+                    entry = _entry_from_info(e)
+                    collected.append(entry)
+                    yield entry
+            # Sadece liste sonuna kadar okunduysa önbelleğe yaz
+            if cache is not None and collected:
+                cache.put_playlist(playlist_url, playlist_title, collected, playlist_id=playlist_id)
+            # Süre, tüketicinin (UI) girdileri işleme süresini de içerir: listenin tamamlanma süresi
+            get_metrics().record_stage(
+                STAGE_PLAYLIST_EXTRACT, time.perf_counter() - started, source="flat", details={"entries": len(collected)}
+            )
+        finally:
+            ydl.close()
+
+    return {"title": playlist_title, "id": playlist_id, "entries": _generate()}
+
+
+def fetch_playlist_info(playlist_url, verbose: bool = False, flat: bool = False, use_cache: bool = True):
+    """Return a dict: {'title': playlist_title, 'id': playlist_id, 'entries': [{'id':..., 'title':..., 'url':...}, ...]}
+
+    flat=True ise 'entries' bir generator'dır; girdiler playlist sayfaları geldikçe üretilir
+    ve her videonun tam çözümü download_as_mp3 çağrılana kadar ertelenir.
+    use_cache=True ise süresi dolmamış önbellek kaydı varsa yt-dlp hiç çağrılmaz.
+    """
+    started = time.perf_counter()
+    cache = get_default_cache() if use_cache else None
+    if cache is not None:
+        cached = cache.get_playlist(playlist_url)
+        if cached:
+            if verbose:
+                print("[downloader] Playlist info from cache:", playlist_url)
+            entries = cached["entries"]
+            playlist_id = cached.get("id") or _playlist_id_from_url(playlist_url)
+            get_metrics().record_stage(
+                STAGE_PLAYLIST_EXTRACT, time.perf_counter() - started, source="cache", details={"entries": len(entries)}
+            )
+            return {"title": cached["title"], "id": playlist_id, "entries": iter(entries) if flat else entries}
+
+    if flat:
+        return _fetch_playlist_flat(playlist_url, verbose=verbose, cache=cache)
+
     ydl_opts = {
         "quiet": True,
         # playlist bilgilerini indirir, video dosyalarını indirmez
@@ -52,131 +316,681 @@ def fetch_playlist_info(playlist_url, verbose: bool = False):
         # tam playlist bilgisini al (entries listesi dolsun)
         # "extract_flat" kullanmıyoruz ki yt-dlp playlist'i tam açsın
     }
+    from yt_dlp import YoutubeDL
+
     with YoutubeDL(ydl_opts) as ydl:
         if verbose:
             print("[downloader] Fetching playlist info:", playlist_url)
-        info = ydl.extract_info(playlist_url, download=False)
+        with get_metrics().stage(STAGE_PLAYLIST_EXTRACT, source="full"):
+            info = ydl.extract_info(playlist_url, download=False)
+
+        entries = []
+        if info is None:
+            return {"title": "", "id": None, "entries": entries}
+
+        playlist_title = info.get("title") or "Oynatma listesi"
+        playlist_id = (info.get("id") if info.get("entries") is not None else None) or _playlist_id_from_url(playlist_url)
+        raw_entries = info.get("entries") or [info]
+        for e in raw_entries:
+            if not e:
+                continue
+            entries.append(_entry_from_info(e))
+            # Tam çözülmüş video bilgisini sakla; download_as_mp3 tekrar extract etmesin
+            if cache is not None and e.get("id") and e.get("formats"):
+                cache.put_video(e["id"], ydl.sanitize_info(e))
 
-    entries = []
-    if info is None:
-        return {"title": "", "entries": entries}
+    if cache is not None and entries:
+        cache.put_playlist(playlist_url, playlist_title, entries, playlist_id=playlist_id)
+    return {"title": playlist_title, "id": playlist_id, "entries": entries}
 
-    playlist_title = info.get("title") or "Oynatma listesi"
-    raw_entries = info.get("entries") or [info]
-    for e in raw_entries:
-        if not e:
-            continue
-        video_id = e.get("id")
-        title = e.get("title") or video_id
-        if video_id:
-            url = f"https://www.youtube.com/watch?v={video_id}"
-        else:
-            url = e.get("webpage_url") or e.get("url") or ""
-        entries.append({"id": video_id, "title": title, "url": url})
-    return {"title": playlist_title, "entries": entries}
-
-
-def download_as_mp3(url, output_dir, progress_callback=None, verbose: bool = False, order_index=None, title_override=None):
-    """Download single youtube video and convert to mp3 using yt-dlp + ffmpeg.
 
-    progress_callback(percent, status_text) is optional.
-    Returns filepath on success, raises on error.
+def _playlist_id_from_url(url):
+    """playlist?list=ID / watch?v=..&list=ID biçimindeki URL'lerden playlist id'sini çıkar."""
+    try:
+        parsed = urlparse(url)
+    except ValueError:
+        return None
+    return (parse_qs(parsed.query).get("list") or [None])[0]
+
+
+def _video_id_from_url(url):
+    """watch?v=ID / youtu.be/ID biçimindeki URL'lerden video id'sini çıkar."""
+    try:
+        parsed = urlparse(url)
+    except ValueError:
+        return None
+    if parsed.netloc.endswith("youtu.be"):
+        return parsed.path.strip("/") or None
+    return (parse_qs(parsed.query).get("v") or [None])[0]
+
+
+def _downloaded_filepath(ydl, info):
+    """yt-dlp'nin indirdiği ham dosyanın yolunu döndür (klasör taranmaz); bulunamazsa None."""
+    for d in info.get("requested_downloads") or []:
+        filepath = d.get("filepath")
+        if filepath and os.path.exists(filepath):
+            return filepath
+    for filepath in (info.get("filepath"), ydl.prepare_filename(info)):
+        if filepath and os.path.exists(filepath):
+            return filepath
+    return None
+
+
+# stats_callback'e iletilen yt-dlp progress hook alanları
+_STATS_KEYS = ("status", "downloaded_bytes", "total_bytes", "total_bytes_estimate", "speed", "eta", "elapsed")
+
+
+def fragment_count(duration, fragments=CONCURRENT_FRAGMENTS, min_seconds=FRAGMENTED_DOWNLOAD_MIN_SECONDS):
+    """Bu uzunluktaki video kaç eşzamanlı fragment ile indirilmeli (None = tek bağlantı)."""
+    if not duration or min_seconds is None or not fragments or fragments < 2:
+        return None
+    return fragments if duration >= min_seconds else None
+
+
+def _fragmented_params(fragments):
+    """Tek dosyalık HTTP akışını eşzamanlı aralıklı isteklere bölen yt-dlp parametreleri.
+
+    'dashy' ile YouTube'un https formatları 10 MB'lık Range fragment'lerine bölünür;
+    fragment'ler worker'ın YoutubeDL örneği (aynı HTTP oturumu) üzerinden, fragments
+    adet thread ile paralel çekilir. Boyutu bilinmeyen formatlar tek bağlantıyla iner.
     """
-    outtmpl = os.path.join(output_dir, "%(id)s_%(title)s.%(ext)s")
-    ydl_opts = {
-        "format": "bestaudio/best",
-        "outtmpl": outtmpl,
-        "quiet": True,
-        "noplaylist": True,
-        "postprocessors": [
-            {
-                "key": "FFmpegExtractAudio",
-                "preferredcodec": "mp3",
-                "preferredquality": "192",
-            }
-        ],
+    return {
+        "concurrent_fragment_downloads": fragments,
+        "extractor_args": {"youtube": {"formats": ["dashy"]}},
     }
 
+
+def _remove_partial(tmp_path):
+    """İptal edilen indirmenin yarım dosyalarını (.part, fragment'ler ve yt-dlp'nin .ytdl kaydı) sil."""
+    if not tmp_path:
+        return
+    for path in [tmp_path, tmp_path + ".ytdl"] + glob.glob(glob.escape(tmp_path) + "-Frag*"):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def download_audio(
+    url,
+    output_dir,
+    progress_callback=None,
+    verbose: bool = False,
+    video_id=None,
+    use_cache: bool = True,
+    cancel_event=None,
+    stats_callback=None,
+    rate_limiter=None,
+    format_selector=None,
+    concurrent_fragments=None,
+):
+    """Sadece ham ses akışını indir (dönüştürme yapılmaz).
+
+    Pipeline'ın I/O aşamasıdır; dönüştürme transcode_to_mp3 ile ayrıca yapılır.
+    progress_callback(percent, status_text) is optional.
+    stats_callback(dict) her progress hook çağrısında bayt düzeyinde bilgiyle çağrılır
+    (status, downloaded_bytes, total_bytes, total_bytes_estimate, speed, eta, elapsed).
+    cancel_event (threading.Event) set edilirse aktif aktarım bir sonraki veri
+    bloğunda kesilir, yarım dosyalar silinir ve DownloadCancelled fırlatılır.
+    rate_limiter (bandwidth.BandwidthLimiter) verilirse her blokta inen bayt kadar token
+    tüketilir; paylaşılan sınır aşılıyorsa hook bekleyerek aktarımı yavaşlatır.
+    format_selector verilirse varsayılan 'bestaudio/best' yerine kullanılır
+    (ör. dönüştürmesiz çıktı için audio_format_selector('opus')).
+    concurrent_fragments (bkz. fragment_count) verilirse akış o kadar eşzamanlı aralıklı
+    istekle indirilir; progress hook'ları bu durumda fragment thread'lerinden gelir.
+    Returns (raw_filepath, info) on success, raises on error.
+    """
+    partial = {}
+    partial_lock = threading.Lock()
+    metrics = get_metrics()
+    # İlk hook'a kadar geçen süre bilgi çözümü + format seçimi, sonrası ağ aktarımıdır
+    timing = {"started": time.perf_counter(), "first_byte": None, "finished": False, "source": "extract"}
+
+    def _cancelled():
+        return cancel_event is not None and cancel_event.is_set()
+
+    def _record_timing(d):
+        status = d.get("status")
+        if status not in ("downloading", "finished"):
+            return
+        now = time.perf_counter()
+        with partial_lock:
+            first = timing["first_byte"] is None
+            if first:
+                timing["first_byte"] = now
+            finished = status == "finished" and not timing["finished"]
+            if finished:
+                timing["finished"] = True
+        if first:
+            metrics.record_stage(STAGE_FORMAT_SELECT, now - timing["started"], source=timing["source"])
+        if finished:
+            nbytes = d.get("downloaded_bytes") or d.get("total_bytes") or 0
+            metrics.record_stage(
+                STAGE_DOWNLOAD,
+                now - timing["first_byte"],
+                details={"bytes": nbytes, "fragments": concurrent_fragments or 1},
+            )
+            metrics.inc("ytmp3_downloaded_bytes_total", nbytes)
+
     def _hook(d):
+        if d.get("tmpfilename") and "tmp" not in partial:
+            partial["tmp"] = d["tmpfilename"]
+        # yt-dlp hook'u her veri bloğunda çağırır; buradan fırlatılan hata aktarımı keser
+        if _cancelled():
+            raise DownloadCancelled("Download cancelled")
+        _record_timing(d)
+        if rate_limiter is not None and d.get("status") == "downloading":
+            downloaded = d.get("downloaded_bytes") or 0
+            # İlk bildirim taban alınır (continuedl ile diskte zaten olan kısım sayılmaz);
+            # fragment thread'leri aynı toplamı güncellediği için fark kilit altında alınır
+            with partial_lock:
+                last = partial.get("bytes", downloaded)
+                partial["bytes"] = max(last, downloaded)
+            if downloaded > last:
+                rate_limiter.consume(downloaded - last, cancel_event)
+                if _cancelled():
+                    raise DownloadCancelled("Download cancelled")
+        if stats_callback:
+            stats_callback({k: d.get(k) for k in _STATS_KEYS})
         if progress_callback:
             status = d.get("status")
             if status == "downloading":
                 percent = d.get("_percent_str") or d.get("percent")
                 progress_callback(percent, "downloading")
             elif status == "finished":
-                progress_callback("100.0", "converting")
+                progress_callback("100.0", "downloaded")
             elif status == "error":
                 progress_callback("0", "error")
 
-    ydl_opts["progress_hooks"] = [_hook]
-
-    with YoutubeDL(ydl_opts) as ydl:
-        if verbose:
-            print("[downloader] Downloading:", url)
-        info = ydl.extract_info(url, download=True)
-
+    if _cancelled():
+        raise DownloadCancelled("Download cancelled")
+
+    cache = get_default_cache() if use_cache else None
+    cache_key = video_id or _video_id_from_url(url)
+
+    pool = get_download_pool() if REUSE_YTDLP_INSTANCES else None
+    params = {"format": format_selector} if format_selector else {}
+    if concurrent_fragments:
+        params.update(_fragmented_params(concurrent_fragments))
+        # Önbellekteki bilgi tek bağlantılı formatlarla çözülmüştür; fragment'li formatlar
+        # için yeniden çözülür (saatlik bir indirmede bir extract ihmal edilebilir)
+        cache = None
+    if pool is not None:
+        ydl_ctx = pool.session(progress_hook=_hook, output_dir=output_dir, **params)
+    else:
+        from yt_dlp import YoutubeDL
+
+        ydl_opts = dict(_DOWNLOAD_OPTS, paths={"home": output_dir}, progress_hooks=[_hook], **params)
+        ydl_ctx = YoutubeDL(ydl_opts)
+
+    try:
+        with ydl_ctx as ydl:
+            info = None
+            cached = cache.get_video(cache_key) if cache is not None and cache_key else None
+            if cached:
+                if verbose:
+                    print("[downloader] Downloading (cached info):", url)
+                timing["source"] = "cache"
+                try:
+                    # --load-info-json akışı ile aynı: format seçimi + indirme, extract yok
+                    info = ydl.process_ie_result(cached, download=True)
+                except Exception as ex:
+                    if _cancelled():
+                        raise
+                    # Akış URL'lerinin süresi dolmuş olabilir; kaydı at ve baştan çöz
+                    if verbose:
+                        print("[downloader] Cached info failed, re-extracting:", ex)
+                    cache.invalidate_video(cache_key)
+                    info = None
+            if info is None:
+                if verbose:
+                    print("[downloader] Downloading:", url)
+                timing["source"] = "extract"
+                try:
+                    info = ydl.extract_info(url, download=True)
+                except Exception:
+                    # Hatalı bir indirmeden sonra oturumu yeniden kullanma; bir sonraki deneme temiz başlasın
+                    if pool is not None:
+                        pool.discard()
+                    raise
+                if cache is not None and info and info.get("id"):
+                    cache.put_video(info["id"], ydl.sanitize_info(info))
+
+            raw_path = _downloaded_filepath(ydl, info)
+    except Exception as ex:
+        if _cancelled():
+            _remove_partial(partial.get("tmp"))
+            if isinstance(ex, DownloadCancelled):
+                raise
+            raise DownloadCancelled("Download cancelled") from ex
+        raise
+
+    if raw_path is None:
+        raise FileNotFoundError("Downloaded audio file not found.")
+    return raw_path, info
+
+
+def resolve_audio(url, output_dir, verbose: bool = False, video_id=None, use_cache: bool = True, format_selector=None):
+    """Video bilgisini çöz ve formatı seç, indirme yapma: (info, filename, source).
+
+    asyncio motoru akışı kendi HTTP istemcisiyle indirir; bu çağrı download_audio ile
+    aynı havuzu ve önbelleği kullanır. filename ham dosyanın output_dir altındaki adıdır
+    (yt-dlp'nin indireceği adla aynı), source 'cache' veya 'extract'. Önbellekteki akış
+    URL'sinin süresi dolmuşsa hata indirme sırasında çıkar; çağıran kaydı geçersiz kılar.
+    """
+    cache = get_default_cache() if use_cache else None
+    cache_key = video_id or _video_id_from_url(url)
+    pool = get_download_pool() if REUSE_YTDLP_INSTANCES else None
+    params = {"format": format_selector} if format_selector else {}
+    if pool is not None:
+        ydl_ctx = pool.session(output_dir=output_dir, **params)
+    else:
+        from yt_dlp import YoutubeDL
+
+        ydl_ctx = YoutubeDL(dict(_DOWNLOAD_OPTS, paths={"home": output_dir}, **params))
+
+    with ydl_ctx as ydl:
+        cached = cache.get_video(cache_key) if cache is not None and cache_key else None
+        info, source = None, "cache"
+        if cached:
+            try:
+                info = ydl.process_ie_result(cached, download=False)
+            except Exception as ex:
+                if verbose:
+                    print("[downloader] Cached info failed, re-extracting:", ex)
+                cache.invalidate_video(cache_key)
+        if info is None:
+            if verbose:
+                print("[downloader] Resolving:", url)
+            source = "extract"
+            try:
+                info = ydl.extract_info(url, download=False)
+            except Exception:
+                if pool is not None:
+                    pool.discard()
+                raise
+            if cache is not None and info and info.get("id"):
+                cache.put_video(info["id"], ydl.sanitize_info(info))
+        return info, ydl.prepare_filename(info), source
+
+
+# Çıktı biçimleri (OUTPUT_FORMAT). mp3 her zaman yeniden kodlanır; m4a/opus için kaynak
+# akış zaten o kodekteyse ffmpeg ile sadece kap değiştirilir (remux, -c:a copy), değilse
+# o kodeğe dönüştürülür; original indirilen akışı ffmpeg'e hiç sokmadan saklar.
+FORMAT_MP3 = "mp3"
+FORMAT_M4A = "m4a"
+FORMAT_OPUS = "opus"
+FORMAT_ORIGINAL = "original"
+OUTPUT_FORMATS = (FORMAT_MP3, FORMAT_M4A, FORMAT_OPUS, FORMAT_ORIGINAL)
+
+# convert_audio sonucu
+CONVERT_TRANSCODE = "transcode"
+CONVERT_REMUX = "remux"
+CONVERT_PASSTHROUGH = "passthrough"
+
+# Dönüştürmeye gerek kalmasın diye biçime uygun akış tercih edilir; yoksa en iyi ses
+_FORMAT_SELECTORS = {
+    FORMAT_M4A: "bestaudio[ext=m4a]/bestaudio/best",
+    FORMAT_OPUS: "bestaudio[acodec=opus]/bestaudio/best",
+}
+
+# biçim -> (ffmpeg muxer, yeniden kodlama codec'i, kopyalanabilen kaynak codec önekleri)
+_CONTAINERS = {
+    FORMAT_MP3: ("mp3", "libmp3lame", ()),
+    FORMAT_M4A: ("ipod", "aac", ("mp4a", "aac")),
+    FORMAT_OPUS: ("opus", "libopus", ("opus",)),
+}
+
+
+def audio_format_selector(output_format=OUTPUT_FORMAT) -> str:
+    """yt-dlp 'format' seçicisi: biçim dönüştürmesiz saklanabiliyorsa ona uygun akışı seç."""
+    return _FORMAT_SELECTORS.get(output_format, _DOWNLOAD_OPTS["format"])
+
+
+def output_extension(output_format=OUTPUT_FORMAT, info=None) -> str:
+    """Nihai dosya uzantısı; original için indirilen akışın kendi uzantısı."""
+    if output_format == FORMAT_ORIGINAL:
+        return (info or {}).get("ext") or "webm"
+    return output_format
+
+
+def output_extensions(output_format=OUTPUT_FORMAT):
+    """Bu biçim için 'zaten indirildi' sayılan uzantılar; original için None (hepsi)."""
+    if output_format == FORMAT_ORIGINAL:
+        return None
+    return (output_format,)
+
+
+def output_bitrate(output_format=OUTPUT_FORMAT):
+    """Disk alanı tahmini için çıktının bit hızı; original'de None (çıktı ham dosyadır)."""
+    if output_format == FORMAT_ORIGINAL:
+        return None
+    return MP3_BITRATE if output_format == FORMAT_MP3 else TRANSCODE_FALLBACK_BITRATE
+
+
+def library_tag(output_format=OUTPUT_FORMAT) -> str:
+    """Global kütüphanedeki ayar etiketi (ör. 'mp3-192k', 'opus', 'original')."""
+    if output_format == FORMAT_MP3:
+        return settings_tag(FORMAT_MP3, MP3_BITRATE)
+    return settings_tag(output_format, None)
+
+
+def audio_output_path(output_dir, info, order_index=None, title_override=None, ext="mp3"):
+    """Nihai dosya yolunu üret.
+
+    order_index verilirse playlist sırasına göre: 1.Video Başlığı.<ext>,
+    verilmezse yt-dlp'nin varsayılanına benzer şekilde: videoId_title.<ext>
+    """
     title = info.get("title", "unknown")
     vid_id = info.get("id", "")
-
     if order_index is not None:
-        # Playlist sırasına göre nihai dosya adı: 1.Video Başlığı.mp3
         final_title = title_override or title or "unknown"
-        final_filename = f"{order_index + 1}.{final_title}.mp3"
-        final_path = os.path.join(output_dir, final_filename)
+        return os.path.join(output_dir, f"{order_index + 1}.{final_title}.{ext}")
+    filename = f"{vid_id}_{title}.{ext}" if vid_id else f"{title}.{ext}"
+    return os.path.join(output_dir, filename)
+
+
+def mp3_output_path(output_dir, info, order_index=None, title_override=None):
+    """Nihai mp3 yolunu üret (audio_output_path, ext='mp3')."""
+    return audio_output_path(output_dir, info, order_index=order_index, title_override=title_override)
+
+
+def ffmpeg_job(src_path, dst_path, codec_args, work_dir=None):
+    """ffmpeg komutu ve geçici çıktı yolu: (cmd, tmp_path).
+
+    work_dir verilirse .part dosyası orada (scratch) üretilir, aksi halde dst_path'in
+    yanında. _run_ffmpeg ve asyncio motoru (async_engine.py) aynı komutu kullanır.
+    """
+    if work_dir:
+        os.makedirs(work_dir, exist_ok=True)
+        tmp_path = os.path.join(work_dir, os.path.basename(dst_path) + ".part")
     else:
-        final_path = None
+        tmp_path = dst_path + ".part"
+    cmd = [FFMPEG_BINARY, "-y", "-hide_banner", "-loglevel", "error", "-i", src_path, "-vn", *codec_args, tmp_path]
+    return cmd, tmp_path
 
-    # yt-dlp tarafından oluşturulmuş olabilecek birkaç olası isim için temel mp3 yolu tahmini
-    default_filename = f"{vid_id}_{title}.mp3" if vid_id else f"{title}.mp3"
-    default_path = os.path.join(output_dir, default_filename)
 
-    # Eğer varsayılan isimde dosya varsa ve sıra bilgisi yoksa direkt onu döndür
-    if order_index is None:
-        if os.path.exists(default_path):
-            return default_path
+def ffmpeg_failed(returncode, stderr, tmp_path):
+    """Başarısız dönüşümün yarım çıktısını sil; fırlatılacak hatayı döndür."""
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    stderr = stderr.decode("utf-8", errors="replace").strip()
+    return RuntimeError(f"ffmpeg conversion failed ({returncode}): {stderr[-500:]}")
 
-        id_prefix = (vid_id or "")
-        title_prefix = (title or "")[:8].lower()
-        for f in os.listdir(output_dir):
-            if not f.lower().endswith(".mp3"):
-                continue
-            lower = f.lower()
-            if id_prefix and lower.startswith(id_prefix.lower() + "_"):
-                return os.path.join(output_dir, f)
-            if not id_prefix and title_prefix and title_prefix in lower:
-                return os.path.join(output_dir, f)
-
-        raise FileNotFoundError("MP3 file not found after conversion.")
-
-    # order_index verilmişse, önce mevcut mp3 dosyasını bul, ardından N.Title.mp3 olarak yeniden adlandır
-    candidate_paths = []
-    if os.path.exists(default_path):
-        candidate_paths.append(default_path)
-
-    id_prefix = (vid_id or "")
-    title_prefix = (title or "")[:8].lower()
-    for f in os.listdir(output_dir):
-        if not f.lower().endswith(".mp3"):
-            continue
-        full_path = os.path.join(output_dir, f)
-        if full_path in candidate_paths:
-            continue
-        lower = f.lower()
-        if id_prefix and lower.startswith(id_prefix.lower() + "_"):
-            candidate_paths.append(full_path)
-        elif not id_prefix and title_prefix and title_prefix in lower:
-            candidate_paths.append(full_path)
-
-    if not candidate_paths and not os.path.exists(final_path):
-        raise FileNotFoundError("MP3 file not found after conversion.")
-
-    # Eğer hedef isim zaten mevcutsa onu döndür, aksi halde ilk bulunanı yeniden adlandır
-    if final_path and os.path.exists(final_path):
-        return final_path
-
-    src = candidate_paths[0] if candidate_paths else default_path
-    if src == final_path:
-        return final_path
-
-    os.replace(src, final_path)
+
+def publish_conversion(src_path, tmp_path, dst_path):
+    """Dönüşüm çıktısını dst_path'e atomik taşı ve kaynak dosyayı sil."""
+    publish_file(tmp_path, dst_path)
+    if os.path.abspath(src_path) != os.path.abspath(dst_path):
+        os.remove(src_path)
+    return dst_path
+
+
+def _run_ffmpeg(src_path, dst_path, codec_args, verbose=False, cancel_event=None, work_dir=None):
+    """ffmpeg'i çalıştır; çıktı önce <ad>.part'a yazılır, bitince dst_path'e atomik taşınır.
+
+    work_dir verilirse .part dosyası orada (scratch) üretilir, aksi halde dst_path'in
+    yanında. Başarılı dönüşümden sonra kaynak dosya silinir. cancel_event set edilirse ffmpeg
+    süreci öldürülür, geçici çıktı silinir (kaynak korunur) ve DownloadCancelled fırlatılır.
+    """
+    cmd, tmp_path = ffmpeg_job(src_path, dst_path, codec_args, work_dir)
+    if verbose:
+        print("[downloader] Converting:", os.path.basename(src_path))
+    if cancel_event is not None and cancel_event.is_set():
+        raise DownloadCancelled("Conversion cancelled")
+    # stderr geçici dosyaya yazılır; PIPE dolup ffmpeg'i kilitlemesin
+    with tempfile.TemporaryFile() as stderr_file:
+        proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=stderr_file)
+        while True:
+            try:
+                proc.wait(timeout=0.1)
+                break
+            except subprocess.TimeoutExpired:
+                if cancel_event is not None and cancel_event.is_set():
+                    proc.kill()
+                    proc.wait()
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise DownloadCancelled("Conversion cancelled")
+        if proc.returncode != 0:
+            stderr_file.seek(0)
+            raise ffmpeg_failed(proc.returncode, stderr_file.read(), tmp_path)
+    return publish_conversion(src_path, tmp_path, dst_path)
+
+
+def _mp3_codec_args(bitrate=MP3_BITRATE):
+    return ["-codec:a", "libmp3lame", "-b:a", bitrate, "-f", "mp3"]
+
+
+def transcode_to_mp3(
+    src_path,
+    dst_path,
+    bitrate: str = MP3_BITRATE,
+    verbose: bool = False,
+    cancel_event=None,
+    work_dir=None,
+):
+    """Ham ses dosyasını ffmpeg ile mp3'e dönüştür (pipeline'ın CPU aşaması).
+
+    Returns dst_path, raises on error.
+    """
+    codec_args = _mp3_codec_args(bitrate)
+    return _run_ffmpeg(src_path, dst_path, codec_args, verbose=verbose, cancel_event=cancel_event, work_dir=work_dir)
+
+
+# Kodek bilgisi olmayan ham dosyalar için (ör. iş deposundan sürdürülen indirme) uzantıdan
+# tahmin; YouTube'un webm ses akışları opus'tur
+_EXT_CODECS = {"m4a": "aac", "aac": "aac", "webm": "opus", "opus": "opus"}
+
+
+def source_codec(info):
+    """İndirilen akışın ses kodeği (ör. 'opus', 'mp4a.40.2'); yoksa uzantıdan tahmin, o da yoksa None."""
+    for d in info.get("requested_downloads") or []:
+        if d.get("acodec"):
+            return d["acodec"]
+    return info.get("acodec") or _EXT_CODECS.get((info.get("ext") or "").lower())
+
+
+def conversion_plan(output_format=OUTPUT_FORMAT, source_codec=None):
+    """Biçim ve kaynak kodeğe göre (yöntem, ffmpeg codec argümanları); passthrough'da argümanlar None.
+
+    mp3 -> her zaman yeniden kodlama (MP3_BITRATE)
+    m4a/opus -> kaynak aynı kodekteyse remux, değilse TRANSCODE_FALLBACK_BITRATE ile kodlama
+    original -> ffmpeg çalıştırılmaz
+    """
+    if output_format == FORMAT_ORIGINAL:
+        return CONVERT_PASSTHROUGH, None
+    if output_format == FORMAT_MP3:
+        return CONVERT_TRANSCODE, _mp3_codec_args()
+    muxer, codec, copyable = _CONTAINERS[output_format]
+    codec_name = (source_codec or "").lower()
+    if codec_name and codec_name.startswith(copyable):
+        return CONVERT_REMUX, ["-c:a", "copy", "-f", muxer]
+    return CONVERT_TRANSCODE, ["-c:a", codec, "-b:a", TRANSCODE_FALLBACK_BITRATE, "-f", muxer]
+
+
+def convert_audio(
+    src_path,
+    dst_path,
+    output_format=OUTPUT_FORMAT,
+    source_codec=None,
+    verbose: bool = False,
+    cancel_event=None,
+    work_dir=None,
+):
+    """Ham dosyayı istenen biçimde dst_path'e yaz; kullanılan yöntemi döndür (bkz. conversion_plan).
+
+    original'de dosya ffmpeg'e sokulmadan atomik olarak taşınır.
+    work_dir: ffmpeg'in ara çıktısı için scratch klasörü (bkz. _run_ffmpeg).
+    """
+    mode, codec_args = conversion_plan(output_format, source_codec)
+    if codec_args is None:
+        if cancel_event is not None and cancel_event.is_set():
+            raise DownloadCancelled("Conversion cancelled")
+        publish_file(src_path, dst_path)
+        return mode
+    _run_ffmpeg(src_path, dst_path, codec_args, verbose=verbose, cancel_event=cancel_event, work_dir=work_dir)
+    return mode
+
+
+def finalize_target(
+    info,
+    output_dir,
+    order_index=None,
+    title_override=None,
+    video_id=None,
+    library=None,
+    output_format=OUTPUT_FORMAT,
+):
+    """finalize_audio'nun hedefleri: (final_path, store_path, library_id).
+
+    library verilmemişse veya video id'si bilinmiyorsa store_path ve library_id None'dır.
+    """
+    ext = output_extension(output_format, info)
+    final_path = audio_output_path(output_dir, info, order_index=order_index, title_override=title_override, ext=ext)
+    library_id = (info.get("id") or video_id) if library is not None else None
+    store_path = library.path_for(library_id, library_tag(output_format), ext) if library_id else None
+    return final_path, store_path, library_id
+
+
+def record_finalized(manifest, info, final_path, video_id=None, order_index=None, title_override=None):
+    """Tamamlanan dosyayı manifest'e işle (manifest None ise bir şey yapmaz)."""
+    if manifest is not None:
+        manifest.record(
+            info.get("id") or video_id,
+            final_path,
+            order_index=order_index,
+            title=title_override or info.get("title"),
+        )
+
+
+def finalize_audio(
+    raw_path,
+    info,
+    output_dir,
+    order_index=None,
+    title_override=None,
+    video_id=None,
+    manifest=None,
+    progress_callback=None,
+    verbose: bool = False,
+    cancel_event=None,
+    library=None,
+    output_format=OUTPUT_FORMAT,
+    scratch_dir=None,
+):
+    """İndirilmiş ham dosyayı output_format biçiminde nihai adına yaz ve manifest'e işle.
+
+    Sıra numaralı hedef dosya zaten varsa dönüştürme yapılmaz, ham dosya silinir.
+    library (library.MediaLibrary) verilirse dosya kütüphaneye yazılır (orada zaten
+    varsa dönüştürme atlanır) ve final_path kütüphane dosyasına bağlanır.
+    scratch_dir verilirse dönüştürme çıktısı orada üretilip hedefe atomik taşınır.
+    Returns final filepath, raises on error.
+    """
+    started = time.perf_counter()
+    transcode_seconds = 0.0
+    metrics = get_metrics()
+    final_path, store_path, library_id = finalize_target(
+        info, output_dir, order_index, title_override, video_id, library, output_format
+    )
+
+    def _convert(dst_path):
+        if progress_callback:
+            progress_callback("100.0", "converting")
+        with metrics.stage(STAGE_TRANSCODE, output=output_format) as timer:
+            mode = convert_audio(
+                raw_path,
+                dst_path,
+                output_format,
+                source_codec(info),
+                verbose=verbose,
+                cancel_event=cancel_event,
+                work_dir=scratch_dir,
+            )
+        metrics.inc("ytmp3_conversions_total", output=output_format, mode=mode)
+        return timer.seconds
+
+    # Eğer hedef isim zaten mevcutsa onu döndür, aksi halde dönüştür
+    if order_index is not None and os.path.exists(final_path):
+        os.remove(raw_path)
+    elif library_id:
+        with library.key_lock(library_id, library_tag(output_format)):
+            if os.path.exists(store_path):
+                os.remove(raw_path)
+            else:
+                os.makedirs(os.path.dirname(store_path), exist_ok=True)
+                transcode_seconds = _convert(store_path)
+        library.materialize(store_path, final_path)
+    else:
+        transcode_seconds = _convert(final_path)
+
+    record_finalized(manifest, info, final_path, video_id, order_index, title_override)
+    # Dönüştürme hariç: hedef ad üretimi, kütüphane bağlantısı, manifest kaydı
+    metrics.record_stage(STAGE_FINALIZE, time.perf_counter() - started - transcode_seconds)
     return final_path
+
+
+def finalize_mp3(raw_path, info, output_dir, **kwargs):
+    """finalize_audio, output_format='mp3'."""
+    return finalize_audio(raw_path, info, output_dir, output_format=FORMAT_MP3, **kwargs)
+
+
+def download_as_mp3(
+    url,
+    output_dir,
+    progress_callback=None,
+    verbose: bool = False,
+    order_index=None,
+    title_override=None,
+    video_id=None,
+    use_cache: bool = True,
+    manifest=None,
+    cancel_event=None,
+    stats_callback=None,
+    rate_limiter=None,
+    output_format=FORMAT_MP3,
+    duration=None,
+    scratch_dir=None,
+):
+    """Download single youtube video and convert to mp3 using yt-dlp + ffmpeg.
+
+    download_audio + finalize_audio adımlarını tek çağrıda sırayla çalıştırır.
+    output_format ile mp3 yerine m4a/opus (kaynak uygunsa remux) veya original
+    (dönüştürmesiz) çıktı alınabilir.
+    progress_callback(percent, status_text) is optional.
+    use_cache=True ise önbellekteki video bilgisi kullanılır (extract adımı atlanır).
+    manifest (manifest.LibraryManifest) verilirse tamamlanan dosya manifest'e işlenir.
+    cancel_event set edilirse indirme/dönüştürme kesilir (DownloadCancelled).
+    duration (saniye, playlist bilgisinden) FRAGMENTED_DOWNLOAD_MIN_SECONDS'i aşıyorsa
+    akış eşzamanlı fragment'lerle indirilir.
+    scratch_dir verilirse ham dosya ve dönüştürme ara çıktısı orada tutulur; output_dir'e
+    sadece tamamlanmış dosya taşınır.
+    Returns filepath on success, raises on error.
+    """
+    raw_path, info = download_audio(
+        url,
+        scratch_dir or output_dir,
+        progress_callback=progress_callback,
+        verbose=verbose,
+        video_id=video_id,
+        use_cache=use_cache,
+        cancel_event=cancel_event,
+        stats_callback=stats_callback,
+        rate_limiter=rate_limiter,
+        format_selector=audio_format_selector(output_format),
+        concurrent_fragments=fragment_count(duration),
+    )
+    return finalize_audio(
+        raw_path,
+        info,
+        output_dir,
+        order_index=order_index,
+        title_override=title_override,
+        video_id=video_id,
+        manifest=manifest,
+        progress_callback=progress_callback,
+        verbose=verbose,
+        cancel_event=cancel_event,
+        output_format=output_format,
+        scratch_dir=scratch_dir,
+    )
@@ -0,0 +1,135 @@
+# entry_store.py
+# Playlist girdilerinin arayüzden bağımsız, sıkı (compact) deposu. Her video için ayrı bir
+# dict ve ayrı bir Checkbox tutmak yerine alanlar sütun dizilerinde saklanır (id, başlık,
+# url, süre, durum, seçim); arayüz sadece görünen sayfadaki satırlar için kontrol üretir.
+# Böylece 5.000 öğelik bir playlist'te bellek ve çizim süresi öğe sayısıyla büyümez.
+#
+# - YouTube izleme URL'si id'den türetilebildiği için ayrıca saklanmaz.
+# - Durum (state + etiket + renk) tek bir tuple olarak yazılır; worker thread'lerinden
+#   güncellenirken yarım okunmaz. None = henüz işlenmedi (bekliyor).
+# - search() başlık/id üzerinde büyük-küçük harf duyarsız arar, durum kümesiyle süzer.
+import math
+from array import array
+
+_WATCH_URL = "https://www.youtube.com/watch?v="
+
+
+class EntryStore:
+    """Sütun dizilerinde tutulan playlist girdileri; indeks = playlist sırası (orig_index)."""
+
+    __slots__ = ("_ids", "_titles", "_urls", "_durations", "_status", "_checked")
+
+    def __init__(self, entries=()):
+        self._ids = []
+        self._titles = []
+        # Sadece id'den türetilemeyen URL'ler (diğerleri None)
+        self._urls = []
+        # Saniye; bilinmiyorsa NaN
+        self._durations = array("d")
+        # (state, etiket, renk) veya None
+        self._status = []
+        self._checked = bytearray()
+        self.extend(entries)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def append(self, entry):
+        """fetch_playlist_info girdisini ({'id', 'title', 'url', 'duration'}) ekle; indeksini döndür."""
+        video_id = entry.get("id")
+        url = entry.get("url") or ""
+        self._ids.append(video_id)
+        self._titles.append(entry.get("title") or video_id or "")
+        self._urls.append(None if video_id and url == _WATCH_URL + video_id else url)
+        duration = entry.get("duration")
+        self._durations.append(float(duration) if duration else math.nan)
+        self._status.append(None)
+        self._checked.append(0)
+        return len(self._ids) - 1
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry)
+
+    # --- alanlar --------------------------------------------------------------
+
+    def video_id(self, index):
+        return self._ids[index]
+
+    def title(self, index):
+        return self._titles[index]
+
+    def url(self, index):
+        url = self._urls[index]
+        return _WATCH_URL + self._ids[index] if url is None else url
+
+    def duration(self, index):
+        value = self._durations[index]
+        return None if math.isnan(value) else value
+
+    def entry(self, index):
+        """Girdinin dict kopyası (plan_sync, DownloadRun gibi dict bekleyen kodlar için)."""
+        return {
+            "id": self._ids[index],
+            "title": self._titles[index],
+            "url": self.url(index),
+            "duration": self.duration(index),
+        }
+
+    def entries(self):
+        """Tüm girdilerin dict listesi (her çağrıda yeni kopya)."""
+        return [self.entry(i) for i in range(len(self._ids))]
+
+    def item(self, index):
+        """runner için (orig_index, video_id, title, url)."""
+        return index, self._ids[index], self._titles[index], self.url(index)
+
+    def durations(self, indices=None):
+        """{orig_index: saniye} (DownloadRun durations parametresi)."""
+        indices = range(len(self._ids)) if indices is None else indices
+        return {i: self.duration(i) for i in indices}
+
+    # --- durum ve seçim ---------------------------------------------------------
+
+    def set_status(self, index, state, label, color=None):
+        self._status[index] = (state, label, color)
+
+    def status(self, index):
+        """(state, etiket, renk) veya None (bekliyor)."""
+        return self._status[index]
+
+    def set_checked(self, index, value):
+        self._checked[index] = 1 if value else 0
+
+    def is_checked(self, index):
+        return bool(self._checked[index])
+
+    def set_all_checked(self, value, indices=None):
+        flag = 1 if value else 0
+        if indices is None:
+            self._checked = bytearray([flag]) * len(self._ids)
+            return
+        for i in indices:
+            self._checked[i] = flag
+
+    def checked_indices(self):
+        return [i for i, flag in enumerate(self._checked) if flag]
+
+    # --- arama ------------------------------------------------------------------
+
+    def search(self, query="", states=None):
+        """Başlığında veya id'sinde query geçen (ve durumu states içinde olan) indeksler.
+
+        states kümesinde None, henüz işlenmemiş (bekleyen) öğeleri temsil eder.
+        """
+        needle = (query or "").strip().casefold()
+        result = []
+        for i, title in enumerate(self._titles):
+            if states is not None:
+                status = self._status[i]
+                if (status[0] if status else None) not in states:
+                    continue
+            if needle and needle not in title.casefold() and needle != (self._ids[i] or "").casefold():
+                continue
+            result.append(i)
+        return result
@@ -0,0 +1,158 @@
+# jobs.py
+# Kalıcı (SQLite) iş deposu: her indirme öğesinin durumu, deneme sayısı, son hatası ve
+# çıktı yolu diske yazılır. Uygulama yarıda kapanırsa bir sonraki açılışta sadece
+# bitmemiş (pending/failed, yarıda kalmış) öğeler yeniden kuyruğa alınır.
+import os
+import sqlite3
+import threading
+import time
+
+import config
+from config import JOBS_DB_PATH
+
+# Öğe durumları
+PENDING = "pending"
+DOWNLOADING = "downloading"
+DOWNLOADED = "downloaded"  # ham dosya diskte, dönüştürme bekliyor
+TRANSCODING = "transcoding"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+# Bir sonraki açılışta sürdürülecek, yarıda kesilmiş durumlar. downloading/transcoding
+# kayıtları sadece süreç yarıda öldüyse kalır. Kalıcı hatayla biten (failed) veya
+# kullanıcının iptal ettiği (cancelled) öğeler kendiliğinden sürdürülmez; hatalılar
+# GUI'de ayrıca "Hatalıları tekrar dene" ile yeniden kuyruğa alınır.
+RESUMABLE_STATES = (PENDING, DOWNLOADING, DOWNLOADED, TRANSCODING)
+
+
+class JobStore:
+    """Çıktı klasörü + playlist sırası ile anahtarlanan, thread-safe iş deposu."""
+
+    def __init__(self, path=JOBS_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    output_dir TEXT NOT NULL,
+                    order_index INTEGER NOT NULL,
+                    video_id TEXT,
+                    title TEXT,
+                    url TEXT NOT NULL,
+                    playlist_title TEXT,
+                    state TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    raw_path TEXT,
+                    output_path TEXT,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (output_dir, order_index)
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state)")
+
+    def enqueue(self, output_dir, items, playlist_title=None):
+        """items: (order_index, video_id, title, url) listesi.
+
+        Bitmiş öğeler yeniden açılmaz; ham dosyası inmiş (downloaded/transcoding) öğeler
+        durumlarını korur ki tekrar indirilmeden doğrudan dönüştürülsünler. Sıra numarasındaki
+        video değiştiyse (ör. playlist yeniden sıralandı) kayıt sıfırdan başlar.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            for order_index, video_id, title, url in items:
+                self._conn.execute(
+                    """
+                    INSERT INTO jobs (output_dir, order_index, video_id, title, url, playlist_title, state, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (output_dir, order_index) DO UPDATE SET
+                        video_id = excluded.video_id,
+                        title = excluded.title,
+                        url = excluded.url,
+                        playlist_title = COALESCE(excluded.playlist_title, jobs.playlist_title),
+                        state = CASE
+                            WHEN jobs.video_id IS excluded.video_id
+                                AND jobs.state IN ('done', 'downloaded', 'transcoding') THEN jobs.state
+                            ELSE 'pending'
+                        END,
+                        attempts = CASE
+                            WHEN jobs.video_id IS excluded.video_id AND jobs.state = 'done' THEN jobs.attempts
+                            ELSE 0
+                        END,
+                        updated_at = excluded.updated_at
+                    """,
+                    (output_dir, order_index, video_id, title, url, playlist_title, PENDING, now),
+                )
+
+    def update(self, output_dir, order_index, state, **fields):
+        """Öğenin durumunu (ve attempts/last_error/raw_path/output_path alanlarını) güncelle."""
+        allowed = {"attempts", "last_error", "raw_path", "output_path"}
+        columns = {k: v for k, v in fields.items() if k in allowed}
+        columns["state"] = state
+        columns["updated_at"] = time.time()
+        assignments = ", ".join(f"{k} = ?" for k in columns)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE output_dir = ? AND order_index = ?",
+                (*columns.values(), output_dir, order_index),
+            )
+
+    def get(self, output_dir, order_index):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE output_dir = ? AND order_index = ?", (output_dir, order_index)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def jobs_for(self, output_dir):
+        """Bir klasörün tüm işlerini sıra numarasına göre döndür."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE output_dir = ? ORDER BY order_index", (output_dir,)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def resumable(self):
+        """Bitmemiş işi olan klasörleri {output_dir: [job, ...]} olarak döndür (en yeni önce)."""
+        placeholders = ", ".join("?" for _ in RESUMABLE_STATES)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs WHERE state IN ({placeholders}) ORDER BY updated_at DESC, order_index",
+                RESUMABLE_STATES,
+            ).fetchall()
+        result = {}
+        for row in rows:
+            result.setdefault(row["output_dir"], []).append(dict(row))
+        for jobs in result.values():
+            jobs.sort(key=lambda j: j["order_index"])
+        return result
+
+    def forget(self, output_dir):
+        """Bir klasörün tüm iş kayıtlarını sil (kullanıcı sürdürmek istemezse)."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM jobs WHERE output_dir = ?", (output_dir,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """Proje geneli paylaşılan iş deposunu döndür."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            # Yol ilk kullanımda okunur: config.use_output_dir (-o) onu taşımış olabilir
+            _default_store = JobStore(config.JOBS_DB_PATH)
+        return _default_store
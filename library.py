@@ -0,0 +1,175 @@
+# library.py
+# Playlist'ler arası, içerik adresli global kütüphane: her video, kodlama ayarlarıyla
+# (ör. mp3-192k) birlikte anahtarlanarak tek bir kez saklanır. Playlist klasörlerindeki
+# "N.Başlık.mp3" dosyaları kütüphanedeki dosyaya hardlink (olmazsa symlink, o da olmazsa
+# kopya) olarak oluşturulur. Aynı video on playlist'te geçse de bir kez indirilip
+# dönüştürülür; tekrar eden içerik ağ ve CPU harcamaz.
+#
+# Yerleşim: <LIBRARY_DIR>/<id'nin ilk 2 karakteri>/<video_id>.<ayar_etiketi>.<uzantı>
+#
+# Bakım:
+#   python library.py stats   # dosya sayısı ve toplam boyut
+#   python library.py gc      # hiçbir playlist klasöründen bağlanmamış dosyaları sil (hardlink modu)
+import argparse
+import os
+import re
+import shutil
+import threading
+
+import config
+from config import LIBRARY_DIR, LIBRARY_LINK_MODE, MP3_BITRATE
+
+_SAFE_ID_RE = re.compile(r"[^A-Za-z0-9_-]")
+
+LINK_HARDLINK = "hardlink"
+LINK_SYMLINK = "symlink"
+LINK_COPY = "copy"
+
+
+def settings_tag(fmt="mp3", bitrate=MP3_BITRATE):
+    """Kodlama ayarlarını dosya adına uygun kısa bir etikete çevir (ör. 'mp3-192k')."""
+    return f"{fmt}-{bitrate}" if bitrate else fmt
+
+
+class MediaLibrary:
+    """Video id + kodlama ayarı ile anahtarlanan paylaşılan dosya deposu. Thread-safe'tir."""
+
+    def __init__(self, directory=LIBRARY_DIR, link_mode=LIBRARY_LINK_MODE):
+        self.directory = directory
+        self.link_mode = link_mode
+        self._lock = threading.Lock()
+        # Aynı anahtara aynı anda iki dönüştürme yazmasın
+        self._key_locks = {}
+
+    def path_for(self, video_id, tag=None, ext="mp3"):
+        safe_id = _SAFE_ID_RE.sub("_", video_id)
+        tag = tag or settings_tag()
+        return os.path.join(self.directory, safe_id[:2] or "__", f"{safe_id}.{tag}.{ext}")
+
+    def lookup(self, video_id, tag=None, ext="mp3"):
+        """Kütüphanede varsa dosya yolunu, yoksa None döndür.
+
+        ext=None ise uzantısı önceden bilinmeyen (ör. 'original' biçimi) dosya aranır.
+        """
+        if not video_id:
+            return None
+        if ext is not None:
+            path = self.path_for(video_id, tag, ext)
+            return path if os.path.exists(path) else None
+        prefix = os.path.basename(self.path_for(video_id, tag, ""))
+        shard = os.path.dirname(self.path_for(video_id, tag))
+        try:
+            names = os.listdir(shard)
+        except FileNotFoundError:
+            return None
+        for name in sorted(names):
+            if name.startswith(prefix) and not name.endswith(".part"):
+                return os.path.join(shard, name)
+        return None
+
+    def key_lock(self, video_id, tag=None):
+        key = (video_id, tag or settings_tag())
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def materialize(self, store_path, target_path):
+        """Kütüphane dosyasını playlist klasöründe target_path adıyla görünür yap.
+
+        link_mode sırasıyla denenir: hardlink -> symlink -> kopya (farklı dosya sistemi,
+        link desteklemeyen sürücü vb.). Kullanılan yöntemi döndürür.
+        """
+        os.makedirs(os.path.dirname(target_path) or ".", exist_ok=True)
+        if os.path.lexists(target_path):
+            try:
+                if os.path.samefile(store_path, target_path):
+                    return None
+            except OSError:
+                pass
+            os.remove(target_path)
+
+        modes = [LINK_HARDLINK, LINK_SYMLINK, LINK_COPY]
+        if self.link_mode in modes:
+            modes = modes[modes.index(self.link_mode):]
+        last_error = None
+        for mode in modes:
+            try:
+                if mode == LINK_HARDLINK:
+                    os.link(store_path, target_path)
+                elif mode == LINK_SYMLINK:
+                    os.symlink(os.path.abspath(store_path), target_path)
+                else:
+                    tmp_path = target_path + ".part"
+                    shutil.copyfile(store_path, tmp_path)
+                    os.replace(tmp_path, target_path)
+                return mode
+            except (OSError, NotImplementedError) as ex:
+                last_error = ex
+        raise last_error
+
+    def _files(self):
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".part"):
+                    yield os.path.join(root, name)
+
+    def stats(self):
+        count = size = 0
+        for path in self._files():
+            count += 1
+            size += os.path.getsize(path)
+        return {"files": count, "bytes": size}
+
+    def gc(self):
+        """Hiçbir yere hardlink'lenmemiş (bağlantı sayısı 1) dosyaları sil; silinen sayısını döndür.
+
+        Symlink/kopya modunda bağlantılar izlenemediği için hiçbir şey silinmez.
+        """
+        if self.link_mode != LINK_HARDLINK:
+            return 0
+        removed = 0
+        for path in self._files():
+            try:
+                if os.stat(path).st_nlink <= 1:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+
+_default_library = None
+_default_library_lock = threading.Lock()
+
+
+def get_library():
+    """Proje geneli paylaşılan kütüphaneyi döndür; LIBRARY_DIR None ise None."""
+    global _default_library
+    if not config.LIBRARY_DIR:
+        return None
+    with _default_library_lock:
+        if _default_library is None:
+            _default_library = MediaLibrary(config.LIBRARY_DIR)
+        return _default_library
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Global içerik kütüphanesi araçları")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Dosya sayısı ve toplam boyut")
+    sub.add_parser("gc", help="Hiçbir playlist klasöründen bağlanmamış dosyaları sil")
+    args = parser.parse_args(argv)
+
+    library = MediaLibrary()
+    if args.command == "stats":
+        stats = library.stats()
+        print(f"{stats['files']} dosya, {stats['bytes'] / (1024 * 1024):.1f} MB: {library.directory}")
+    elif args.command == "gc":
+        print(f"{library.gc()} dosya silindi: {library.directory}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
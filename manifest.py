@@ -0,0 +1,246 @@
+# manifest.py
+# Çıktı klasörü başına kütüphane manifest'i: video id -> nihai dosya adı, boyut, mtime, durum.
+# Klasör her indirmede os.listdir ile taranmak yerine manifest bir kez yüklenir ve
+# her tamamlanan dosyadan sonra güncellenir.
+#
+# Manifest, klasör içinde JSON-lines dosyası olarak tutulur (.manifest.jsonl). Her güncelleme
+# tek satır olarak eklenir (append + fsync); dosya yüklenirken satırlar sırayla uygulanır,
+# çok büyüdüğünde geçici dosyaya yazılıp os.replace ile atomik olarak sıkıştırılır.
+#
+# Klasör elle düzenlendiyse yeniden oluşturmak için:
+#   python manifest.py rebuild downloads/playlist_adi_25_video_2025-11-18
+import argparse
+import json
+import os
+import re
+import tempfile
+import threading
+
+MANIFEST_FILENAME = ".manifest.jsonl"
+
+# "12.Video Başlığı.mp3" -> 12
+_ORDER_PREFIX_RE = re.compile(r"^(\d+)\.")
+
+# Klasör taranırken çıktı dosyası sayılan uzantılar (mp3 ve dönüştürmesiz biçimler)
+AUDIO_EXTENSIONS = (".mp3", ".m4a", ".opus", ".webm", ".ogg", ".mp4")
+
+
+def _order_key(order_index):
+    return f"order:{order_index}"
+
+
+class LibraryManifest:
+    """Tek bir çıktı klasörünün manifest'i. Thread-safe'tir."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, MANIFEST_FILENAME)
+        self._lock = threading.Lock()
+        self._records = {}
+        self._journal_lines = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            # Eski sürümlerle oluşturulmuş klasörler için tek seferlik tarama
+            if os.path.isdir(self.directory):
+                self.rebuild()
+            return
+        with open(self.path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    # yarım yazılmış son satır (ör. çökme) yok sayılır
+                    continue
+                self._journal_lines += 1
+                key = item.pop("key", None)
+                if not key:
+                    continue
+                if item.get("status") == "removed":
+                    self._records.pop(key, None)
+                else:
+                    self._records[key] = item
+        if self._journal_lines > 2 * max(len(self._records), 50):
+            with self._lock:
+                self._compact()
+
+    def _append(self, key, record):
+        line = json.dumps({"key": key, **record}, ensure_ascii=False)
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        self._journal_lines += 1
+
+    def _compact(self):
+        """Manifest'i güncel kayıtlarla yeniden yaz (geçici dosya + os.replace)."""
+        fd, tmp_path = tempfile.mkstemp(prefix=".manifest.", dir=self.directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                for key, record in self._records.items():
+                    fh.write(json.dumps({"key": key, **record}, ensure_ascii=False) + "\n")
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._journal_lines = len(self._records)
+
+    def get(self, video_id):
+        with self._lock:
+            record = self._records.get(video_id)
+            return dict(record) if record else None
+
+    def items(self):
+        """(anahtar, kayıt) çiftlerinin kopyası."""
+        with self._lock:
+            return [(key, dict(record)) for key, record in self._records.items()]
+
+    def find_existing(self, video_id=None, order_index=None, extensions=None):
+        """Tamamlanmış ve diskte duran dosyanın tam yolunu döndür; yoksa None.
+
+        Önce video id'sine, bulunamazsa playlist sırasına (N. öneki) bakılır.
+        extensions (ör. ("opus",)) verilirse sadece bu uzantılardaki dosyalar sayılır;
+        böylece çıktı biçimi değiştiğinde eski biçimdeki dosya "zaten indirildi" sayılmaz.
+        """
+        with self._lock:
+            candidates = []
+            if video_id and video_id in self._records:
+                candidates.append(self._records[video_id])
+            if order_index is not None:
+                candidates.append(self._records.get(_order_key(order_index)))
+                if not video_id:
+                    candidates.extend(r for r in self._records.values() if r.get("order") == order_index)
+            for record in candidates:
+                if not record or record.get("status") != "done":
+                    continue
+                if extensions and os.path.splitext(record["filename"])[1][1:].lower() not in extensions:
+                    continue
+                path = os.path.join(self.directory, record["filename"])
+                if os.path.exists(path):
+                    return path
+        return None
+
+    def record(self, video_id, filepath, status="done", order_index=None, title=None):
+        """Tamamlanan (veya hatalı) bir dosyayı manifest'e işle."""
+        key = video_id or _order_key(order_index)
+        try:
+            st = os.stat(filepath)
+            size, mtime = st.st_size, st.st_mtime
+        except OSError:
+            size, mtime = None, None
+        record = {
+            "filename": os.path.basename(filepath) if filepath else None,
+            "size": size,
+            "mtime": mtime,
+            "status": status,
+            "order": order_index,
+            "title": title,
+        }
+        with self._lock:
+            self._records[key] = record
+            # id ile kaydedilen dosya için eski sıra tabanlı kaydı kaldır
+            if video_id and order_index is not None:
+                self._records.pop(_order_key(order_index), None)
+            self._append(key, record)
+
+    def remove(self, video_id):
+        with self._lock:
+            if self._records.pop(video_id, None) is not None:
+                self._append(video_id, {"status": "removed"})
+
+    def rebuild(self, entries=None):
+        """Klasörü tek seferde tarayıp manifest'i yeniden oluştur.
+
+        entries (playlist girdileri, sırasıyla) verilirse "N.Başlık.<uzantı>" dosyaları
+        N. girdinin video id'si ile eşleştirilir; verilmezse sıra anahtarıyla kaydedilir.
+        Diskte artık olmayan dosyaların kayıtları silinir.
+        """
+        with self._lock:
+            try:
+                names = os.listdir(self.directory)
+            except FileNotFoundError:
+                names = []
+            present = {}
+            for name in names:
+                full = os.path.join(self.directory, name)
+                if name.startswith(".") or not os.path.isfile(full):
+                    continue
+                present[name] = os.stat(full)
+
+            records = {}
+            for key, record in self._records.items():
+                st = present.get(record.get("filename") or "")
+                if st is None:
+                    continue
+                order_index = record.get("order")
+                if key.startswith("order:") and entries is not None and order_index is not None:
+                    if 0 <= order_index < len(entries) and entries[order_index].get("id"):
+                        key = entries[order_index]["id"]
+                records[key] = {**record, "size": st.st_size, "mtime": st.st_mtime}
+
+            tracked = {r["filename"] for r in records.values()}
+            for name, st in present.items():
+                if name in tracked or not name.lower().endswith(AUDIO_EXTENSIONS):
+                    continue
+                match = _ORDER_PREFIX_RE.match(name)
+                if not match:
+                    continue
+                order_index = int(match.group(1)) - 1
+                key = _order_key(order_index)
+                title = None
+                if entries is not None and 0 <= order_index < len(entries):
+                    ent = entries[order_index]
+                    key = ent.get("id") or key
+                    title = ent.get("title")
+                records[key] = {
+                    "filename": name,
+                    "size": st.st_size,
+                    "mtime": st.st_mtime,
+                    "status": "done",
+                    "order": order_index,
+                    "title": title,
+                }
+
+            self._records = records
+            if os.path.isdir(self.directory):
+                self._compact()
+            return len(records)
+
+
+_manifests = {}
+_manifests_lock = threading.Lock()
+
+
+def get_manifest(directory) -> LibraryManifest:
+    """Klasör başına paylaşılan manifest örneğini döndür (ilk çağrıda yüklenir)."""
+    key = os.path.abspath(directory)
+    with _manifests_lock:
+        manifest = _manifests.get(key)
+        if manifest is None:
+            manifest = LibraryManifest(key)
+            _manifests[key] = manifest
+        return manifest
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Çıktı klasörü manifest araçları")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_rebuild = sub.add_parser("rebuild", help="Klasörü tarayıp manifest'i yeniden oluştur")
+    p_rebuild.add_argument("directory")
+    args = parser.parse_args(argv)
+
+    if args.command == "rebuild":
+        count = get_manifest(args.directory).rebuild()
+        print(f"{count} kayıt: {os.path.join(args.directory, MANIFEST_FILENAME)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
@@ -0,0 +1,335 @@
+# metrics.py
+# Aşama bazlı süre ölçümü ve sayaçlar. Her aşama (playlist çıkarma, format seçimi, ağ
+# indirmesi, ffmpeg dönüştürmesi, dosya adlandırma/bağlama, UI güncellemesi) süresini
+# Prometheus tarzı histogramlara işler; aynı ölçümler ayrıca JSON-lines çalıştırma
+# log'una satır satır yazılır. Böylece gerçek bir çalıştırmada zamanın nereye gittiği
+# (en sıcak aşama) görülebilir.
+#
+#   http://127.0.0.1:<METRICS_PORT>/metrics   # Prometheus text formatı (METRICS_PORT verilirse)
+#   python metrics.py summary [log.jsonl]     # log'daki aşamaları toplam süreye göre sırala
+import argparse
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+from config import METRICS_ENABLED, METRICS_LOG_PATH, METRICS_LOG_MAX_BYTES, METRICS_PORT
+
+# Ölçülen aşamalar (histogramdaki "stage" etiketi)
+STAGE_PLAYLIST_EXTRACT = "playlist_extract"
+STAGE_FORMAT_SELECT = "format_select"  # video bilgisinin çözümü + format seçimi, ilk bayta kadar
+STAGE_DOWNLOAD = "download"  # ilk bayttan son bayta ağ aktarımı
+STAGE_TRANSCODE = "transcode"
+STAGE_FINALIZE = "finalize"  # hedef adın üretimi, kütüphane bağlantısı, manifest kaydı
+STAGE_UI_UPDATE = "ui_update"
+
+STAGE_METRIC = "ytmp3_stage_duration_seconds"
+
+# Histogram üst sınırları (saniye)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_HELP = {
+    STAGE_METRIC: "Aşama başına süre",
+    "ytmp3_items_total": "Bitiş durumuna göre işlenen öğeler",
+    "ytmp3_errors_total": "Kategoriye göre indirme/dönüştürme hataları",
+    "ytmp3_retries_total": "Ertelenen (tekrar denenecek) öğeler",
+    "ytmp3_downloaded_bytes_total": "İndirilen toplam bayt",
+    "ytmp3_ui_updates_total": "UI dağıtıcısına gelen güncellemeler (applied/coalesced)",
+}
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _StageTimer:
+    """stage() bağlamının döndürdüğü nesne; çıkıştan sonra seconds ölçülen süredir."""
+
+    __slots__ = ("started", "seconds")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.seconds = None
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe histogram/sayaç deposu ve JSON-lines çalıştırma log'u.
+
+    Histogram/sayaç etiketleri düşük kardinaliteli tutulur (aşama, durum, kategori);
+    öğe/çalıştırma gibi ayrıntılar sadece log satırlarına, context() ile eklenir.
+    """
+
+    def __init__(
+        self,
+        enabled=METRICS_ENABLED,
+        log_path=METRICS_LOG_PATH,
+        buckets=DEFAULT_BUCKETS,
+        log_max_bytes=METRICS_LOG_MAX_BYTES,
+    ):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        # Thread'lere ve asyncio görevlerine ayrı ayrı bağlı log alanları (bkz. context)
+        self._fields = contextvars.ContextVar(f"metrics_fields_{id(self)}", default={})
+        self._log_lock = threading.Lock()
+        self._log_path = log_path
+        self._log_fh = None
+        self.log_max_bytes = log_max_bytes
+
+    # --- log ---------------------------------------------------------------------
+
+    def set_log_path(self, path):
+        """Log dosyasını değiştir (None = log kapalı); açık dosya kapatılır."""
+        with self._log_lock:
+            if self._log_fh is not None:
+                self._log_fh.close()
+                self._log_fh = None
+            self._log_path = path
+
+    @property
+    def log_path(self):
+        return self._log_path
+
+    @contextmanager
+    def context(self, **fields):
+        """Bu thread'de (veya asyncio görevinde) yazılan log satırlarına alan ekle (ör. run, item).
+
+        Alanlar contextvars ile tutulur: aynı event loop'ta dönüşümlü çalışan görevlerin
+        etiketleri birbirine karışmaz.
+        """
+        token = self._fields.set({**self._fields.get(), **fields})
+        try:
+            yield
+        finally:
+            self._fields.reset(token)
+
+    def log(self, event, **fields):
+        if not self.enabled or not self._log_path:
+            return
+        record = {"ts": time.time(), "event": event, **self._fields.get(), **fields}
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._log_lock:
+            try:
+                if self._log_fh is None:
+                    os.makedirs(os.path.dirname(self._log_path) or ".", exist_ok=True)
+                    self._log_fh = open(self._log_path, "a", encoding="utf-8")
+                self._log_fh.write(line + "\n")
+                self._log_fh.flush()
+                if self.log_max_bytes and self._log_fh.tell() >= self.log_max_bytes:
+                    # Her çalıştırma log'u büyütür; sınırı aşınca bir önceki yedeğin yerine geçer
+                    self._log_fh.close()
+                    self._log_fh = None
+                    os.replace(self._log_path, self._log_path + ".1")
+            except OSError:
+                # Log yazılamıyorsa (disk dolu, izin) ölçüm indirmeyi durdurmamalı
+                self._log_path = None
+
+    # --- ölçüm -------------------------------------------------------------------
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = _Histogram(self.buckets)
+            hist.observe(value)
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def record_stage(self, stage, seconds, details=None, **labels):
+        """Dışarıda ölçülmüş bir aşama süresini histograma ve log'a işle.
+
+        details (sözlük) sadece log satırına yazılır (ör. bayt, öğe sayısı); etiket olmaz.
+        """
+        if not self.enabled:
+            return
+        self.observe(STAGE_METRIC, seconds, stage=stage, **labels)
+        self.log("stage", stage=stage, seconds=round(seconds, 6), **labels, **(details or {}))
+
+    @contextmanager
+    def stage(self, stage, **labels):
+        """Bloğun süresini ölç; hata fırlatılırsa outcome="error" etiketiyle kaydedilir."""
+        timer = _StageTimer()
+        outcome = "ok"
+        try:
+            yield timer
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            timer.seconds = time.perf_counter() - timer.started
+            self.record_stage(stage, timer.seconds, outcome=outcome, **labels)
+
+    # --- dışa aktarım ------------------------------------------------------------
+
+    def snapshot(self):
+        """Aşama başına {count, sum} ve sayaçlar (çalıştırma özetleri için)."""
+        with self._lock:
+            stages = {}
+            for (name, labels), hist in self._histograms.items():
+                if name != STAGE_METRIC:
+                    continue
+                stage = dict(labels).get("stage")
+                entry = stages.setdefault(stage, {"count": 0, "sum": 0.0})
+                entry["count"] += hist.count
+                entry["sum"] += hist.sum
+            counters = {f"{name}{_format_labels(labels)}": value for (name, labels), value in self._counters.items()}
+        return {"stages": stages, "counters": counters}
+
+    def render(self):
+        """Prometheus text exposition formatı (0.0.4)."""
+        with self._lock:
+            histograms = sorted(
+                (name, labels, list(h.counts), h.sum, h.count) for (name, labels), h in self._histograms.items()
+            )
+            counters = sorted(self._counters.items())
+        lines = []
+        seen = set()
+        for name, labels, counts, total, count in histograms:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        self.set_log_path(None)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port=METRICS_PORT, host="127.0.0.1", registry=None):
+    """/metrics uç noktasını arka planda başlat; sunucuyu döndür (port None ise None)."""
+    if port is None:
+        return None
+    server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry or get_metrics()
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Proje geneli paylaşılan ölçüm deposunu döndür."""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = MetricsRegistry(log_path=config.METRICS_LOG_PATH)
+        return _default_registry
+
+
+def summarize_log(path):
+    """Log'daki aşama satırlarını [(aşama, adet, toplam, p50, p95, max), ...] olarak, toplam süreye göre sırala."""
+    durations = {}
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("event") == "stage" and record.get("seconds") is not None:
+                durations.setdefault(record["stage"], []).append(record["seconds"])
+    rows = []
+    for stage, values in durations.items():
+        values.sort()
+        rows.append(
+            (
+                stage,
+                len(values),
+                sum(values),
+                values[len(values) // 2],
+                values[min(len(values) - 1, int(len(values) * 0.95))],
+                values[-1],
+            )
+        )
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Aşama ölçümleri araçları")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_summary = sub.add_parser("summary", help="JSON-lines log'undaki aşamaları toplam süreye göre listele")
+    p_summary.add_argument("path", nargs="?", default=METRICS_LOG_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "summary":
+        rows = summarize_log(args.path)
+        print(f"{'aşama':<18} {'adet':>7} {'toplam sn':>11} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+        for stage, count, total, p50, p95, peak in rows:
+            print(f"{stage:<18} {count:>7} {total:>11.2f} {p50 * 1000:>9.1f} {p95 * 1000:>9.1f} {peak * 1000:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
@@ -0,0 +1,388 @@
+# pipeline.py
+# İki aşamalı indirme pipeline'ı:
+#   I/O aşaması (ağ, indirme)  ->  sınırlı kuyruk  ->  dönüştürme aşaması (CPU, ffmpeg)
+# Her aşamanın kendi iş parçacığı sayısı vardır. Kuyruk dolduğunda indiriciler bekler
+# (backpressure); böylece ffmpeg çekirdekleri doldururken ağ boşta kalmaz, ağ yavaşken
+# de diskte dönüştürülmeyi bekleyen ham dosyalar birikmez.
+import collections
+import heapq
+import itertools
+import queue
+import sys
+import threading
+import time
+import traceback
+
+from config import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_TRANSCODE_WORKERS,
+    TRANSCODE_QUEUE_SIZE,
+    CANCEL_GRACE_SECONDS,
+)
+
+
+class RetryLater:
+    """download_fn dönüş değeri: öğeyi delay saniye sonra, kuyruğun sonundan tekrar dene."""
+
+    __slots__ = ("delay",)
+
+    def __init__(self, delay):
+        self.delay = max(0.0, float(delay))
+
+
+class FairQueue:
+    """Öncelikli, gruplar arası adil (round-robin) giriş kuyruğu; queue.Queue yerine kullanılır.
+
+    Öğeler group_fn(item) ile gruplanır (ör. playlist). get() her zaman önceliği en yüksek
+    boş olmayan gruplardan birini seçer; aynı öncelikteki gruplar sırayla birer öğe verir.
+    Böylece binlerce öğelik bir playlist, sonradan eklenen küçük ama acil bir playlist'i
+    aç bırakmaz. Grup içi sıra (ör. en uzun önce) korunur. Thread-safe'tir.
+    """
+
+    def __init__(self, group_fn):
+        self.group_fn = group_fn
+        self._cond = threading.Condition()
+        self._groups = {}  # grup -> deque
+        self._priority = {}
+        # Round-robin sırası: en son hizmet alan grup sona taşınır
+        self._order = collections.OrderedDict()
+
+    def set_priority(self, group, priority):
+        with self._cond:
+            self._priority[group] = priority
+            self._order.setdefault(group, None)
+
+    def priority(self, group):
+        with self._cond:
+            return self._priority.get(group, 0)
+
+    def remove_group(self, group):
+        """Grubun kuyruktaki öğelerini çıkarıp döndür (ör. tek bir playlist'in iptali)."""
+        with self._cond:
+            items = list(self._groups.pop(group, ()))
+            self._order.pop(group, None)
+            self._priority.pop(group, None)
+            return items
+
+    def put(self, item, block=True, timeout=None):
+        group = self.group_fn(item)
+        with self._cond:
+            self._groups.setdefault(group, collections.deque()).append(item)
+            self._order.setdefault(group, None)
+            self._cond.notify()
+
+    def _pop(self):
+        best = None
+        for group in self._order:
+            if self._groups.get(group) and (best is None or self._priority.get(group, 0) > self._priority.get(best, 0)):
+                best = group
+        if best is None:
+            raise queue.Empty
+        items = self._groups[best]
+        item = items.popleft()
+        if not items:
+            del self._groups[best]
+        self._order.move_to_end(best)
+        return item
+
+    def get(self, block=True, timeout=None):
+        with self._cond:
+            if not block:
+                return self._pop()
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                try:
+                    return self._pop()
+                except queue.Empty:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise
+                    self._cond.wait(remaining)
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def qsize(self):
+        with self._cond:
+            return sum(len(items) for items in self._groups.values())
+
+
+class DownloadPipeline:
+    """İndirme ve dönüştürme aşamalarını ayrı havuzlarda çalıştırır.
+
+    download_fn(item) -> payload | None | RetryLater
+        Ham dosyayı indirir. None dönerse öğe bitmiş sayılır (atlandı veya hata).
+        RetryLater dönerse öğe bekleme süresi dolana kadar ertelenir; worker boşa
+        beklemez, öğe süresi dolunca giriş kuyruğunun sonuna eklenir.
+    transcode_fn(item, payload) -> bool | RetryLater
+        Ham dosyayı dönüştürür. True: öğe bitti. False: öğe yeniden indirilmek
+        üzere hemen I/O aşamasına geri gönderilir. RetryLater: yeniden indirme,
+        download_fn'deki gibi bekleme süresi dolana kadar ertelenir.
+    on_item_done(item)
+        Her öğe kesin olarak bittiğinde (başarılı, atlandı, hata veya iptal) çağrılır.
+    on_cancelled(item, payload)
+        İptal nedeniyle hiç işlenmeden bitirilen öğeler için çağrılır; payload,
+        öğe dönüştürme kuyruğundaysa indirilen veridir, aksi halde None.
+    on_error(item, ex, stage)
+        download_fn/transcode_fn beklenmeyen bir istisna fırlatırsa ("download" veya
+        "transcode" aşamasıyla) çağrılır; öğe ardından bitmiş sayılır. Verilmezse
+        traceback stderr'e yazılır, öğe yine de sessizce kaybolmaz.
+    cancel_event (threading.Event)
+        Stage fonksiyonlarına da verilerek aktif aktarımların kesilmesi için kullanılır.
+    download_limit (concurrency.AdjustableLimit)
+        Verilirse download_workers üst sınırdır; aynı anda kaç indirme yapılacağını
+        çalışma sırasında değişebilen bu sınır belirler.
+    input_queue
+        Verilirse giriş kuyruğu olarak kullanılır (ör. FairQueue); varsayılan FIFO.
+    open_ended
+        True ise run() tüm worker'ları başlatır ve çalışırken submit() ile öğe eklenebilir
+        (birden çok playlist'in paylaştığı havuz).
+    """
+
+    def __init__(
+        self,
+        download_fn,
+        transcode_fn,
+        download_workers=DEFAULT_MAX_WORKERS,
+        transcode_workers=DEFAULT_TRANSCODE_WORKERS,
+        queue_size=TRANSCODE_QUEUE_SIZE,
+        on_item_done=None,
+        on_cancelled=None,
+        cancel_event=None,
+        cancel_grace=CANCEL_GRACE_SECONDS,
+        download_limit=None,
+        input_queue=None,
+        on_error=None,
+        open_ended=False,
+    ):
+        self.download_fn = download_fn
+        self.transcode_fn = transcode_fn
+        self.download_workers = max(1, int(download_workers))
+        self.transcode_workers = max(1, int(transcode_workers))
+        self.on_item_done = on_item_done
+        self.on_cancelled = on_cancelled
+        self.on_error = on_error
+        self.cancel_event = cancel_event or threading.Event()
+        self.cancel_grace = cancel_grace
+        self.download_limit = download_limit
+        self.cancel_requested_at = None
+        # İptal isteğinden tüm worker'ların durmasına kadar geçen süre (saniye)
+        self.quiesce_seconds = None
+        self.open_ended = open_ended
+        self._input = input_queue if input_queue is not None else queue.Queue()
+        self._transcode_queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._done = threading.Event()
+        # (hazır olma zamanı, sıra, öğe) min-heap'i
+        self._deferred = []
+        self._deferred_seq = itertools.count()
+        self.deferred_total = 0
+
+    def _finish(self, item):
+        if self.on_item_done:
+            try:
+                self.on_item_done(item)
+            except Exception:
+                pass
+        with self._lock:
+            self._pending -= 1
+            if self._pending <= 0:
+                self._done.set()
+
+    def _finish_cancelled(self, item, payload=None):
+        if self.on_cancelled:
+            try:
+                self.on_cancelled(item, payload)
+            except Exception:
+                pass
+        self._finish(item)
+
+    def _stage_failed(self, item, ex, stage):
+        """Aşama fonksiyonundan kaçan istisnayı bildir; öğe çağıran tarafından bitirilir."""
+        if self.on_error:
+            try:
+                self.on_error(item, ex, stage)
+                return
+            except Exception:
+                pass
+        traceback.print_exception(type(ex), ex, ex.__traceback__, file=sys.stderr)
+
+    def _defer(self, item, delay):
+        with self._lock:
+            heapq.heappush(self._deferred, (time.monotonic() + delay, next(self._deferred_seq), item))
+            self.deferred_total += 1
+
+    def _release_due(self):
+        """Bekleme süresi dolan ertelenmiş öğeleri giriş kuyruğuna geri koy."""
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            while self._deferred and self._deferred[0][0] <= now:
+                due.append(heapq.heappop(self._deferred)[2])
+        for item in due:
+            self._input.put(item)
+
+    def _drain(self):
+        """Henüz başlamamış öğeleri (kuyruklarda ve ertelenmişlerde) işlemeden bitir."""
+        with self._lock:
+            deferred = [entry[2] for entry in self._deferred]
+            self._deferred = []
+        for item in deferred:
+            self._finish_cancelled(item)
+        while True:
+            try:
+                item = self._input.get_nowait()
+            except queue.Empty:
+                break
+            self._finish_cancelled(item)
+        while True:
+            try:
+                item, payload = self._transcode_queue.get_nowait()
+            except queue.Empty:
+                break
+            self._finish_cancelled(item, payload)
+
+    def cancel(self):
+        """Kuyruktaki öğeleri hemen iptal et; aktif işler cancel_event ile kesilir."""
+        if self.cancel_requested_at is None:
+            self.cancel_requested_at = time.monotonic()
+        self.cancel_event.set()
+        self._drain()
+
+    def cancel_group(self, group):
+        """FairQueue girişinde tek bir grubun henüz başlamamış öğelerini iptal edilmiş say.
+
+        Kuyruktaki ve ertelenmiş öğeler worker almadan on_cancelled + on_item_done ile
+        bitirilir; diğer gruplar çalışmaya devam eder. Bitirilen öğe sayısını döndürür.
+        """
+        items = self._input.remove_group(group)
+        with self._lock:
+            kept = []
+            for entry in self._deferred:
+                if self._input.group_fn(entry[2]) == group:
+                    items.append(entry[2])
+                else:
+                    kept.append(entry)
+            heapq.heapify(kept)
+            self._deferred = kept
+        for item in items:
+            self._finish_cancelled(item)
+        return len(items)
+
+    def _download_loop(self):
+        while not self._done.is_set():
+            try:
+                item = self._input.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if self.cancel_event.is_set():
+                self._finish_cancelled(item)
+                continue
+            if self.download_limit is not None and not self.download_limit.acquire(self.cancel_event):
+                self._finish_cancelled(item)
+                continue
+            try:
+                payload = self.download_fn(item)
+            except Exception as ex:
+                self._stage_failed(item, ex, "download")
+                payload = None
+            finally:
+                if self.download_limit is not None:
+                    self.download_limit.release()
+            if payload is None:
+                self._finish(item)
+                continue
+            if isinstance(payload, RetryLater):
+                if self.cancel_event.is_set():
+                    self._finish_cancelled(item)
+                else:
+                    self._defer(item, payload.delay)
+                continue
+            # Kuyruk doluysa dönüştürücüler yetişene kadar bekle (backpressure)
+            while True:
+                if self.cancel_event.is_set():
+                    self._finish_cancelled(item, payload)
+                    break
+                try:
+                    self._transcode_queue.put((item, payload), timeout=0.1)
+                    break
+                except queue.Full:
+                    if self._done.is_set():
+                        return
+
+    def _transcode_loop(self):
+        while not self._done.is_set():
+            try:
+                item, payload = self._transcode_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if self.cancel_event.is_set():
+                self._finish_cancelled(item, payload)
+                continue
+            try:
+                finished = self.transcode_fn(item, payload)
+            except Exception as ex:
+                self._stage_failed(item, ex, "transcode")
+                finished = True
+            if self.cancel_event.is_set():
+                self._finish(item)
+            elif isinstance(finished, RetryLater):
+                self._defer(item, finished.delay)
+            elif finished:
+                self._finish(item)
+            else:
+                self._input.put(item)
+
+    def submit(self, items):
+        """Çalışan (open_ended) pipeline'a öğe ekle; pipeline bitmişse False döner."""
+        items = list(items)
+        with self._lock:
+            if self._done.is_set() or self.cancel_event.is_set():
+                return False
+            self._pending += len(items)
+        for item in items:
+            self._input.put(item)
+        return True
+
+    def run(self, items):
+        """Tüm öğeleri işle; hepsi bitene veya iptal sonrası bekleme süresi dolana kadar bloklar."""
+        items = list(items)
+        if not items:
+            return
+        self._done.clear()
+        with self._lock:
+            # submit() ile run'dan önce eklenmiş öğeler de sayılır
+            self._pending += len(items)
+        for item in items:
+            self._input.put(item)
+
+        # open_ended'da sonradan eklenecek öğeler için havuz baştan tam boyutta açılır
+        count = None if self.open_ended else len(items)
+        threads = [
+            threading.Thread(target=self._download_loop, name=f"download-{i}", daemon=True)
+            for i in range(min(self.download_workers, count or self.download_workers))
+        ]
+        threads += [
+            threading.Thread(target=self._transcode_loop, name=f"transcode-{i}", daemon=True)
+            for i in range(min(self.transcode_workers, count or self.transcode_workers))
+        ]
+        for t in threads:
+            t.start()
+
+        while not self._done.wait(0.1):
+            if not self.cancel_event.is_set():
+                self._release_due()
+                continue
+            if self.cancel_requested_at is None:
+                self.cancel_requested_at = time.monotonic()
+            self._drain()
+            # Kesilemeyen bir çağrı (ör. yanıt bekleyen extract isteği) varsa sonsuza dek bekleme;
+            # daemon thread'ler biter bitmez kendiliğinden çıkar, sonuçları yok sayılır.
+            if time.monotonic() - self.cancel_requested_at > self.cancel_grace:
+                break
+        self._done.set()
+        for t in threads:
+            t.join(timeout=0.2)
+        if self.cancel_requested_at is not None:
+            self.quiesce_seconds = time.monotonic() - self.cancel_requested_at
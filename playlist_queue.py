@@ -0,0 +1,265 @@
+# playlist_queue.py
+# Birden çok playlist'in tek bir paylaşılan worker havuzunda işlenmesi. Her playlist kendi
+# DownloadRun'ı ile (kendi klasörü, manifest'i, ilerleme takibi) kuyruğa eklenir; öğeleri
+# ise tek bir DownloadPipeline'a FairQueue üzerinden verilir:
+#   - önceliği yüksek playlist'lerin öğeleri önce alınır,
+#   - aynı öncelikteki playlist'ler round-robin ile sırayla birer öğe alır.
+# Böylece 2000 öğelik bir playlist, sonradan eklenen 10 öğelik acil bir playlist'i
+# bekletmez. Çalışırken yeni playlist eklenebilir, öncelik değiştirilebilir.
+import itertools
+import threading
+
+from config import DEFAULT_MAX_WORKERS, DEFAULT_TRANSCODE_WORKERS, TRANSCODE_QUEUE_SIZE
+from pipeline import DownloadPipeline, FairQueue
+
+PRIORITY_LOW = -1
+PRIORITY_NORMAL = 0
+PRIORITY_HIGH = 1
+
+# Kuyruktaki playlist'in durumu (on_playlist_state ile bildirilir)
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+CANCELLED = "cancelled"
+
+_ids = itertools.count(1)
+
+
+class QueuedPlaylist:
+    """Kuyruktaki bir playlist: DownloadRun, öncelik ve bitene kadar kalan öğe sayısı."""
+
+    def __init__(self, run, priority=PRIORITY_NORMAL):
+        self.id = next(_ids)
+        self.run = run
+        self.priority = priority
+        self.state = QUEUED
+        self.remaining = None
+        self.summary = None
+        # start() sonrası pipeline'a verilecek (entry, item) çiftleri
+        self.items = None
+
+    @property
+    def title(self):
+        return self.run.playlist_title or self.run.output_dir
+
+
+class PlaylistQueue:
+    """Playlist kuyruğu ve paylaşılan indirme/dönüştürme havuzu.
+
+    on_playlist_state(entry) -- playlist kuyruğa girince, başlayınca ve bitince çağrılır
+    (worker veya kuyruk thread'inden).
+
+    Paylaşılan havuzda DownloadRun'ların adaptive paralellik denetleyicisi kullanılmaz;
+    toplam paralellik max_workers/transcode_workers ile belirlenir.
+    """
+
+    def __init__(
+        self,
+        max_workers=DEFAULT_MAX_WORKERS,
+        transcode_workers=DEFAULT_TRANSCODE_WORKERS,
+        on_playlist_state=None,
+    ):
+        self.max_workers = max_workers
+        self.transcode_workers = transcode_workers
+        self.on_playlist_state = on_playlist_state
+        self.entries = []
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        self._waiting = []
+        self._pipeline = None
+        self._fair = None
+        self._running = False
+
+    # --- bildirim ----------------------------------------------------------------
+
+    def _set_state(self, entry, state):
+        entry.state = state
+        if self.on_playlist_state:
+            try:
+                self.on_playlist_state(entry)
+            except Exception:
+                pass
+
+    # --- dış API -----------------------------------------------------------------
+
+    def add(self, run, priority=PRIORITY_NORMAL):
+        """DownloadRun'ı kuyruğa ekle; kuyruk çalışıyorsa öğeleri hemen havuza katılır."""
+        entry = QueuedPlaylist(run, priority)
+        with self._lock:
+            self.entries.append(entry)
+            self._waiting.append(entry)
+            pipeline = self._pipeline
+        self._set_state(entry, QUEUED)
+        if pipeline is not None:
+            self._admit_waiting(pipeline)
+        return entry
+
+    def set_priority(self, entry, priority):
+        entry.priority = priority
+        fair = self._fair
+        if fair is not None:
+            fair.set_priority(entry, priority)
+
+    def cancel_playlist(self, entry):
+        """Tek bir playlist'i iptal et; diğerleri devam eder."""
+        with self._lock:
+            waiting = entry in self._waiting
+            if waiting:
+                self._waiting.remove(entry)
+        entry.run.cancel()
+        if waiting:
+            entry.summary = entry.run.summary()
+            self._set_state(entry, CANCELLED)
+            return
+        pipeline = self._pipeline
+        if pipeline is not None:
+            # Sıradaki öğeleri worker'lara uğratmadan bitir; remaining ve özet bunlarla kapanır
+            pipeline.cancel_group(entry)
+
+    def cancel(self):
+        """Tüm kuyruğu iptal et."""
+        self.cancel_event.set()
+        for entry in list(self.entries):
+            self.cancel_playlist(entry)
+        pipeline = self._pipeline
+        if pipeline is not None:
+            pipeline.cancel()
+
+    @property
+    def running(self):
+        return self._running
+
+    def ensure_running(self):
+        """Kuyruk çalışmıyorsa arka planda başlat."""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        threading.Thread(target=self._loop, name="playlist-queue", daemon=True).start()
+
+    def run(self):
+        """Kuyruk boşalana kadar (çalışırken eklenenler dahil) işle; özetleri döndür."""
+        with self._lock:
+            self._running = True
+        self._loop()
+        return [entry.summary for entry in self.entries if entry.summary is not None]
+
+    # --- havuz -------------------------------------------------------------------
+
+    def _prepare(self, entry):
+        """Playlist'i başlat; pipeline'a verilecek öğeleri döndür (boşsa hemen bitirir)."""
+        if entry.items is None:
+            items = entry.run.start()
+            entry.remaining = len(items)
+            entry.items = [(entry, item) for item in items]
+            self._set_state(entry, RUNNING)
+            if not items:
+                self._finish_entry(entry)
+        if entry.items:
+            self._fair.set_priority(entry, entry.priority)
+        return entry.items
+
+    def _admit_waiting(self, pipeline):
+        with self._lock:
+            waiting, self._waiting = self._waiting, []
+        rejected = []
+        for entry in waiting:
+            items = self._prepare(entry)
+            if items and not pipeline.submit(items):
+                rejected.append(entry)
+        if rejected:
+            # Havuz bu arada bittiyse playlist'ler bir sonraki turda yeni havuzla işlenir
+            with self._lock:
+                self._waiting[:0] = rejected
+            self.ensure_running()
+
+    def _loop(self):
+        try:
+            while True:
+                with self._lock:
+                    waiting, self._waiting = self._waiting, []
+                    if not waiting or self.cancel_event.is_set():
+                        self._running = False
+                        return
+                fair = FairQueue(group_fn=lambda wrapped: wrapped[0])
+                pipeline = DownloadPipeline(
+                    self._download,
+                    self._transcode,
+                    download_workers=self.max_workers,
+                    transcode_workers=self.transcode_workers,
+                    queue_size=TRANSCODE_QUEUE_SIZE,
+                    on_item_done=self._item_done,
+                    on_cancelled=self._item_cancelled,
+                    on_error=self._item_error,
+                    cancel_event=self.cancel_event,
+                    input_queue=fair,
+                    open_ended=True,
+                )
+                self._fair = fair
+                initial = []
+                for entry in waiting:
+                    initial.extend(self._prepare(entry))
+                if not initial:
+                    continue
+                with self._lock:
+                    self._pipeline = pipeline
+                # Havuz kurulurken eklenenler de bu turda işlensin
+                self._admit_waiting(pipeline)
+                try:
+                    pipeline.run(initial)
+                finally:
+                    with self._lock:
+                        self._pipeline = None
+        except BaseException:
+            with self._lock:
+                self._running = False
+            raise
+
+    def _download(self, wrapped):
+        entry, item = wrapped
+        return entry.run._download_stage(item)
+
+    def _transcode(self, wrapped, payload):
+        entry, item = wrapped
+        return entry.run._transcode_stage(item, payload)
+
+    def _item_cancelled(self, wrapped, payload):
+        entry, item = wrapped
+        entry.run._on_cancelled(item, payload)
+
+    def _item_error(self, wrapped, ex, stage):
+        entry, item = wrapped
+        entry.run._on_stage_error(item, ex, stage)
+
+    def _item_done(self, wrapped):
+        entry, item = wrapped
+        entry.run._on_item_done(item)
+        with self._lock:
+            entry.remaining -= 1
+            last = entry.remaining == 0
+        if last:
+            self._finish_entry(entry)
+
+    def _finish_entry(self, entry):
+        entry.summary = entry.run.finish()
+        self._set_state(entry, CANCELLED if entry.run.cancelled else FINISHED)
+
+    def snapshot(self):
+        """Playlist başına ilerleme özeti: [{id, title, priority, state, total, finished, ...}]."""
+        rows = []
+        for entry in list(self.entries):
+            tracker = entry.run.tracker
+            snap = tracker.snapshot() if tracker is not None else {}
+            rows.append(
+                {
+                    "id": entry.id,
+                    "title": entry.title,
+                    "output_dir": entry.run.output_dir,
+                    "priority": entry.priority,
+                    "state": entry.state,
+                    "total": len(entry.run.items),
+                    "finished": snap.get("items_finished", 0),
+                    "bytes_downloaded": snap.get("bytes_downloaded", 0),
+                }
+            )
+        return rows
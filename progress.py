@@ -0,0 +1,286 @@
+# progress.py
+# Bayt düzeyinde ilerleme, anlık/ortalama hız, dönüştürme süreleri ve çalıştırma geneli ETA.
+# download_audio'nun yt-dlp progress hook verileri ve dönüştürme aşamasının başlangıç/bitiş
+# olayları burada toplanır; GUI özet satırı snapshot() ile, makine tarafından okunabilir
+# akış ise JSON-lines olay dosyası (JsonLinesSink) ile beslenir.
+import json
+import threading
+import time
+from collections import deque
+
+from config import PROGRESS_ROLLING_WINDOW_SECONDS, PROGRESS_EVENT_INTERVAL_SECONDS
+
+
+def format_bytes(n) -> str:
+    n = float(n or 0)
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+def format_duration(seconds) -> str:
+    if seconds is None:
+        return "--:--"
+    seconds = int(max(0, seconds))
+    hours, rem = divmod(seconds, 3600)
+    minutes, secs = divmod(rem, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes:02d}:{secs:02d}"
+
+
+class JsonLinesSink:
+    """İlerleme olaylarını satır başına bir JSON nesnesi olarak dosyaya (veya akışa) yazar."""
+
+    def __init__(self, path=None, stream=None):
+        self._lock = threading.Lock()
+        self._owns = stream is None
+        self._fh = stream if stream is not None else open(path, "a", encoding="utf-8")
+
+    def __call__(self, event):
+        line = json.dumps(event, ensure_ascii=False)
+        with self._lock:
+            self._fh.write(line + "\n")
+            self._fh.flush()
+
+    def close(self):
+        with self._lock:
+            if self._owns:
+                self._fh.close()
+
+
+class _ItemProgress:
+    __slots__ = (
+        "title",
+        "state",
+        "downloaded_bytes",
+        "total_bytes",
+        "speed",
+        "download_started",
+        "download_seconds",
+        "transcode_started",
+        "transcode_seconds",
+        "last_event",
+    )
+
+    def __init__(self, title):
+        self.title = title
+        self.state = "pending"
+        self.downloaded_bytes = 0
+        self.total_bytes = None
+        self.speed = None
+        self.download_started = None
+        self.download_seconds = None
+        self.transcode_started = None
+        self.transcode_seconds = None
+        self.last_event = 0.0
+
+
+class ProgressTracker:
+    """Bir indirme çalıştırmasının öğe başına ve toplam ilerlemesini izler. Thread-safe'tir."""
+
+    def __init__(
+        self,
+        total_items,
+        transcode_workers=1,
+        sink=None,
+        window=PROGRESS_ROLLING_WINDOW_SECONDS,
+        event_interval=PROGRESS_EVENT_INTERVAL_SECONDS,
+    ):
+        self.total_items = total_items
+        self.transcode_workers = max(1, int(transcode_workers))
+        self.sink = sink
+        self.window = window
+        self.event_interval = event_interval
+        self.started_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._items = {}
+        self._bytes_total = 0
+        self._samples = deque([(self.started_at, 0)])
+        self._finished = 0
+        self._downloads_done = 0
+        self._transcodes_done = 0
+        self._transcode_seconds = 0.0
+        self._last_snapshot_event = 0.0
+
+    def _item(self, key, title=None):
+        item = self._items.get(key)
+        if item is None:
+            item = self._items[key] = _ItemProgress(title)
+        elif title and not item.title:
+            item.title = title
+        return item
+
+    def _emit(self, event_type, **fields):
+        if self.sink is None:
+            return
+        try:
+            self.sink({"ts": time.time(), "event": event_type, **fields})
+        except Exception:
+            pass
+
+    def record_event(self, event_type, **fields):
+        """Öğe dışı olayları (ör. paralellik ayarı) aynı JSON-lines akışına yaz."""
+        self._emit(event_type, **fields)
+
+    def download_started(self, key, title=None):
+        with self._lock:
+            item = self._item(key, title)
+            item.state = "downloading"
+            item.download_started = time.monotonic()
+            # Retry: önceki denemenin baytları toplamdan düşülmez, yeni deneme sıfırdan sayılır
+            item.downloaded_bytes = 0
+            item.speed = None
+        self._emit("download_started", item=key, title=title)
+
+    def download_progress(self, key, d):
+        """yt-dlp progress hook sözlüğünü (downloaded_bytes, total_bytes, speed...) işle."""
+        now = time.monotonic()
+        emit = None
+        with self._lock:
+            item = self._item(key)
+            downloaded = d.get("downloaded_bytes") or 0
+            delta = downloaded - item.downloaded_bytes
+            if delta > 0:
+                self._bytes_total += delta
+            item.downloaded_bytes = downloaded
+            item.total_bytes = d.get("total_bytes") or d.get("total_bytes_estimate") or item.total_bytes
+            item.speed = d.get("speed")
+            self._samples.append((now, self._bytes_total))
+            while len(self._samples) > 2 and now - self._samples[0][0] > self.window:
+                self._samples.popleft()
+            if now - item.last_event >= self.event_interval:
+                item.last_event = now
+                emit = {
+                    "item": key,
+                    "downloaded_bytes": downloaded,
+                    "total_bytes": item.total_bytes,
+                    "speed": item.speed,
+                }
+        if emit:
+            self._emit("download_progress", **emit)
+        self._maybe_emit_snapshot(now)
+
+    def download_finished(self, key):
+        with self._lock:
+            item = self._item(key)
+            item.state = "downloaded"
+            item.speed = None
+            if item.total_bytes is None:
+                item.total_bytes = item.downloaded_bytes
+            if item.download_started is not None:
+                item.download_seconds = time.monotonic() - item.download_started
+            self._downloads_done += 1
+            fields = {
+                "item": key,
+                "bytes": item.downloaded_bytes,
+                "seconds": item.download_seconds,
+            }
+        self._emit("download_finished", **fields)
+
+    def transcode_started(self, key):
+        with self._lock:
+            item = self._item(key)
+            item.state = "transcoding"
+            item.transcode_started = time.monotonic()
+        self._emit("transcode_started", item=key)
+
+    def transcode_finished(self, key):
+        with self._lock:
+            item = self._item(key)
+            if item.transcode_started is not None:
+                item.transcode_seconds = time.monotonic() - item.transcode_started
+                self._transcode_seconds += item.transcode_seconds
+                self._transcodes_done += 1
+            seconds = item.transcode_seconds
+        self._emit("transcode_finished", item=key, seconds=seconds)
+
+    def item_finished(self, key, state):
+        """Öğe kesin olarak bitti: 'done', 'skipped', 'failed' veya 'cancelled'."""
+        with self._lock:
+            item = self._item(key)
+            item.state = state
+            item.speed = None
+            self._finished += 1
+        self._emit("item_finished", item=key, state=state)
+        self._maybe_emit_snapshot(time.monotonic(), force=True)
+
+    def item_snapshot(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            return {
+                "state": item.state,
+                "downloaded_bytes": item.downloaded_bytes,
+                "total_bytes": item.total_bytes,
+                "speed": item.speed,
+                "download_seconds": item.download_seconds,
+                "transcode_seconds": item.transcode_seconds,
+            }
+
+    def snapshot(self):
+        """Toplam ilerleme: bayt, anlık/ortalama hız, dönüştürme süreleri ve ETA."""
+        now = time.monotonic()
+        with self._lock:
+            elapsed = now - self.started_at
+            current_bps = sum(i.speed or 0 for i in self._items.values() if i.state == "downloading")
+            oldest_t, oldest_bytes = self._samples[0]
+            span = now - oldest_t
+            rolling_bps = (self._bytes_total - oldest_bytes) / span if span > 0 else 0.0
+
+            known_sizes = [i.total_bytes for i in self._items.values() if i.total_bytes]
+            avg_size = sum(known_sizes) / len(known_sizes) if known_sizes else None
+            remaining_bytes = 0
+            unknown_remaining = self.total_items - len(self._items)
+            for i in self._items.values():
+                if i.state in ("pending", "downloading"):
+                    if i.total_bytes:
+                        remaining_bytes += max(0, i.total_bytes - i.downloaded_bytes)
+                    else:
+                        unknown_remaining += 1
+            eta = None
+            if avg_size is not None and rolling_bps > 0:
+                remaining_bytes += unknown_remaining * avg_size
+                download_eta = remaining_bytes / rolling_bps
+                avg_transcode = self._transcode_seconds / self._transcodes_done if self._transcodes_done else 0.0
+                remaining_transcodes = self.total_items - self._finished
+                transcode_eta = remaining_transcodes * avg_transcode / self.transcode_workers
+                # İki aşama üst üste çalışır; en yavaşı belirleyicidir, son öğenin dönüşümü eklenir
+                eta = max(download_eta + avg_transcode, transcode_eta) if remaining_transcodes else 0.0
+
+            return {
+                "items_total": self.total_items,
+                "items_finished": self._finished,
+                "downloads_finished": self._downloads_done,
+                "bytes_downloaded": self._bytes_total,
+                "current_bps": current_bps,
+                "rolling_bps": rolling_bps,
+                "average_bps": self._bytes_total / elapsed if elapsed > 0 else 0.0,
+                "transcode_seconds_total": self._transcode_seconds,
+                "transcodes_finished": self._transcodes_done,
+                "elapsed_seconds": elapsed,
+                "eta_seconds": eta,
+            }
+
+    def _maybe_emit_snapshot(self, now, force=False):
+        if self.sink is None:
+            return
+        with self._lock:
+            if not force and now - self._last_snapshot_event < self.event_interval:
+                return
+            self._last_snapshot_event = now
+        self._emit("snapshot", **self.snapshot())
+
+    def summary_text(self):
+        """GUI için tek satırlık özet."""
+        snap = self.snapshot()
+        return (
+            f"{snap['items_finished']}/{snap['items_total']} tamamlandı · "
+            f"{format_bytes(snap['bytes_downloaded'])} · "
+            f"{format_bytes(snap['current_bps'])}/sn (ort. {format_bytes(snap['rolling_bps'])}/sn) · "
+            f"dönüştürme {snap['transcode_seconds_total']:.0f} sn · "
+            f"kalan ~{format_duration(snap['eta_seconds'])}"
+        )
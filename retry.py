@@ -0,0 +1,121 @@
+# retry.py
+# Hata kategorisine (downloader.classify_error) göre tekrar deneme politikası ve
+# tüm çalıştırma için ortak devre kesici (circuit breaker).
+#
+# - Kalıcı hatalar (silinmiş video, ffmpeg yok, disk/izin) hiç tekrar denenmez.
+# - Geçici hatalar üstel bekleme + tam jitter ile ertelenir; bekleme sırasında worker
+#   boşa beklemez, öğe pipeline'ın ertelenmiş kuyruğuna alınır.
+# - Çok sayıda öğe art arda geçici hata alırsa devre açılır; yeni indirmeler bir süre
+#   durur, ardından tek bir deneme (half-open) devam edilip edilmeyeceğine karar verir.
+import random
+import threading
+import time
+
+from config import (
+    RETRY_BASE_DELAY_SECONDS,
+    RETRY_THROTTLE_BASE_DELAY_SECONDS,
+    RETRY_MAX_DELAY_SECONDS,
+    CIRCUIT_BREAKER_THRESHOLD,
+    CIRCUIT_BREAKER_COOLDOWN_SECONDS,
+)
+from downloader import ERROR_THROTTLED, PERMANENT_ERRORS
+
+
+class RetryPolicy:
+    """Bir hatanın tekrar denenip denenmeyeceğini ve ne kadar bekleneceğini belirler."""
+
+    def __init__(
+        self,
+        base_delay=RETRY_BASE_DELAY_SECONDS,
+        throttle_base_delay=RETRY_THROTTLE_BASE_DELAY_SECONDS,
+        max_delay=RETRY_MAX_DELAY_SECONDS,
+        rng=None,
+    ):
+        self.base_delay = base_delay
+        self.throttle_base_delay = throttle_base_delay
+        self.max_delay = max_delay
+        self._rng = rng or random.Random()
+
+    def should_retry(self, category, attempts, max_retries):
+        if category in PERMANENT_ERRORS:
+            return False
+        return attempts < max_retries
+
+    def delay(self, category, attempts):
+        """attempts. denemeden sonraki bekleme: [0, min(max, base * 2^(attempts-1))] aralığında rastgele."""
+        base = self.throttle_base_delay if category == ERROR_THROTTLED else self.base_delay
+        cap = min(self.max_delay, base * (2 ** max(0, attempts - 1)))
+        return self._rng.uniform(0, cap)
+
+
+class CircuitBreaker:
+    """Art arda geçici hatalarda yeni indirmeleri geçici olarak durduran devre kesici.
+
+    closed -> (threshold ardışık hata) -> open -> (cooldown) -> half_open -> tek deneme:
+    başarılıysa closed, hatalıysa tekrar open.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold=CIRCUIT_BREAKER_THRESHOLD, cooldown=CIRCUIT_BREAKER_COOLDOWN_SECONDS, on_change=None):
+        self.threshold = max(1, int(threshold))
+        self.cooldown = cooldown
+        self.on_change = on_change
+        self.state = self.CLOSED
+        self.trips = 0
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    def _set_state(self, state):
+        old, self.state = self.state, state
+        if old != state and self.on_change:
+            try:
+                self.on_change(old, state)
+            except Exception:
+                pass
+
+    def allow(self):
+        """Yeni bir indirme başlatılabilir mi? half_open durumunda sadece tek deneme geçer."""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown:
+                    return False
+                self._set_state(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def remaining(self):
+        """Devre açıksa kalan bekleme süresi (saniye); değilse kısa bir yoklama aralığı."""
+        with self._lock:
+            if self.state == self.OPEN:
+                return max(0.0, self.cooldown - (time.monotonic() - self._opened_at))
+            return 1.0
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            if self.state != self.CLOSED:
+                self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            probe_failed = self.state == self.HALF_OPEN
+            self._probe_in_flight = False
+            if probe_failed or (self.state == self.CLOSED and self._failures >= self.threshold):
+                self._opened_at = time.monotonic()
+                self.trips += 1
+                self._set_state(self.OPEN)
+
+    def release_probe(self):
+        """half_open denemesi sonuç üretmeden bittiyse (ör. kalıcı hata, iptal) yeni denemeye izin ver."""
+        with self._lock:
+            self._probe_in_flight = False
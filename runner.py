@@ -0,0 +1,708 @@
+# runner.py
+# Bir playlist'in (veya seçili videolarının) indirilmesini yöneten, arayüzden bağımsız motor.
+# GUI (app.py) ve başsız komut satırı (cli.py) aynı DownloadRun'ı kullanır; arayüze özel
+# kısımlar (etiketler, renkler, log) on_item_state / on_status / on_progress geri
+# çağrılarıyla dışarıda kalır.
+#
+# Akış: manifest ile atlama -> DownloadPipeline (indirme -> dönüştürme) -> retry,
+# her öğenin durumu kalıcı iş deposuna (jobs.py) ve ilerleme takibine (progress.py) yazılır.
+import os
+import sys
+import threading
+import time
+import traceback
+
+import jobs
+from config import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_TRANSCODE_WORKERS,
+    MAX_RETRIES,
+    VERBOSE_LOGGING,
+    TRANSCODE_QUEUE_SIZE,
+    PROGRESS_LOG_ENABLED,
+    PROGRESS_LOG_FILENAME,
+    ADAPTIVE_CONCURRENCY,
+    ADAPTIVE_MIN_WORKERS,
+    ADAPTIVE_MAX_WORKERS,
+    OUTPUT_FORMAT,
+    SCHEDULE_LONGEST_FIRST,
+    SCRATCH_DIR,
+    DISK_SPACE_RETRY_SECONDS,
+    DOWNLOAD_ENGINE,
+)
+from bandwidth import get_bandwidth_limiter
+from concurrency import AdjustableLimit, AdaptiveConcurrency
+from downloader import (
+    download_audio,
+    finalize_audio,
+    audio_output_path,
+    audio_format_selector,
+    fragment_count,
+    output_bitrate,
+    output_extension,
+    output_extensions,
+    library_tag,
+    FORMAT_ORIGINAL,
+    describe_error,
+    classify_error,
+    DownloadCancelled,
+    ERROR_CANCELLED,
+    ERROR_THROTTLED,
+    PERMANENT_ERRORS,
+)
+from jobs import get_job_store
+from library import get_library
+from manifest import get_manifest
+from metrics import get_metrics
+from pipeline import DownloadPipeline, RetryLater
+from progress import ProgressTracker, JsonLinesSink, format_bytes
+from retry import RetryPolicy, CircuitBreaker
+from staging import DiskSpaceGuard, estimate_item_bytes, remove_if_empty, scratch_dir_for
+
+# on_item_state ile bildirilen öğe durumları
+DOWNLOADING = "downloading"
+WAITING_TRANSCODE = "waiting_transcode"
+TRANSCODING = "transcoding"
+DONE = "done"
+SKIPPED = "skipped"
+LINKED = "linked"  # global kütüphanede vardı, indirmeden bağlandı
+RETRYING = "retrying"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+# _prepare_download sonucu: öğe şimdi indirilmeli
+_DOWNLOAD = object()
+
+# Çalıştırma motorları (DOWNLOAD_ENGINE, cli.py --engine)
+ENGINE_THREADS = "threads"
+ENGINE_ASYNCIO = "asyncio"
+ENGINES = (ENGINE_THREADS, ENGINE_ASYNCIO)
+
+
+def run_class(engine=DOWNLOAD_ENGINE):
+    """Motora göre çalıştırma sınıfı: DownloadRun veya async_engine.AsyncDownloadRun.
+
+    İkisi aynı yapıcı parametrelerini ve run()/cancel()/summary() API'sini sunar.
+    """
+    if engine == ENGINE_ASYNCIO:
+        from async_engine import AsyncDownloadRun
+
+        return AsyncDownloadRun
+    if engine != ENGINE_THREADS:
+        raise ValueError(f"Bilinmeyen indirme motoru: {engine!r} ({', '.join(ENGINES)})")
+    return DownloadRun
+
+
+def schedule_longest_first(items, durations):
+    """Öğeleri süresi en uzun olandan başlayarak sırala (en uzun işlem önce, LPT).
+
+    Uzun bir mix sona kalırsa diğer worker'lar boşta beklerken tek başına çalışır;
+    önce başlatılınca kısa öğeler onun yanında paralel akar ve çalıştırmanın kuyruğu
+    kısalır. Süresi bilinmeyen öğeler bilinenlerin medyanı kadar sayılır; eşit
+    sürelilerde playlist sırası korunur.
+    """
+    known = sorted(d for d in (durations.get(item[0]) for item in items) if d)
+    if not known:
+        return list(items)
+    typical = known[len(known) // 2]
+    return sorted(items, key=lambda item: -(durations.get(item[0]) or typical))
+
+
+class DownloadRun:
+    """Tek bir çıktı klasörüne yönelik indirme çalıştırması.
+
+    items: (orig_index, order_index, video_id, title, url) listesi. orig_index arayüzdeki
+    satırı, order_index ise dosya adındaki sıra numarasını (N.) belirler.
+
+    Geri çağrılar (hepsi opsiyonel, worker thread'lerinden çağrılır):
+      on_item_state(item, state, detail)  -- detail: dict (attempts, error, friendly, filepath, bayt bilgisi...)
+      on_status(text, level)              -- level: "info" | "success" | "error"
+      on_progress(tracker)                -- ProgressTracker; hız/ETA özetleri için
+
+    max_retries ve verbose nitelikleri çalışma sırasında değiştirilebilir.
+
+    adaptive=True ise max_workers başlangıç değeridir; paralel indirme sayısı
+    ADAPTIVE_MIN_WORKERS..ADAPTIVE_MAX_WORKERS arasında AdaptiveConcurrency ile ayarlanır.
+
+    rate_limiter verilmezse global bandwidth.get_bandwidth_limiter() kullanılır; sınır
+    çalışma sırasında değiştirilebilir.
+
+    output_format: "mp3" | "m4a" | "opus" | "original" (bkz. downloader.OUTPUT_FORMATS).
+    Manifest'teki dosya sadece bu biçimin uzantısındaysa "zaten indirildi" sayılır.
+
+    durations: {orig_index: saniye} (playlist bilgisinden). longest_first=True ise öğeler
+    en uzundan başlanarak indirilir; FRAGMENTED_DOWNLOAD_MIN_SECONDS'i aşan öğeler
+    eşzamanlı fragment'lerle çekilir.
+
+    scratch_dir: ara dosyaların (ham akış, .part, ffmpeg çıktısı) üretildiği kök klasör;
+    tamamlanan dosyalar output_dir'e atomik taşınır. None ise ara dosyalar output_dir'de
+    üretilir. Disk alanı öğe başına süreden tahmin edilip ayrılır; yer azaldıkça yeni
+    indirmeler bekletilir.
+
+    Bu sınıf thread havuzlu pipeline ile çalışır; aynı API'nin asyncio sürümü için bkz.
+    async_engine.AsyncDownloadRun (run_class).
+    """
+
+    engine = ENGINE_THREADS
+
+    def __init__(
+        self,
+        items,
+        output_dir,
+        playlist_title=None,
+        max_workers=DEFAULT_MAX_WORKERS,
+        transcode_workers=DEFAULT_TRANSCODE_WORKERS,
+        max_retries=MAX_RETRIES,
+        verbose=VERBOSE_LOGGING,
+        on_item_state=None,
+        on_status=None,
+        on_progress=None,
+        progress_sink=None,
+        adaptive=ADAPTIVE_CONCURRENCY,
+        rate_limiter=None,
+        output_format=OUTPUT_FORMAT,
+        durations=None,
+        longest_first=SCHEDULE_LONGEST_FIRST,
+        scratch_dir=SCRATCH_DIR,
+    ):
+        self.items = list(items)
+        self.durations = dict(durations or {})
+        self.longest_first = longest_first
+        self.output_dir = output_dir
+        self.playlist_title = playlist_title
+        self.max_workers = max_workers
+        self.transcode_workers = transcode_workers
+        self.max_retries = max_retries
+        self.verbose = verbose
+        self.on_item_state = on_item_state
+        self.on_status = on_status
+        self.on_progress = on_progress
+        self.progress_sink = progress_sink
+        self.adaptive = adaptive
+        self.output_format = output_format
+        self.controller = None
+        # Tüm worker'ların (ve aynı süreçteki diğer çalıştırmaların) paylaştığı hız sınırı
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_bandwidth_limiter()
+        # Playlist'ler arası paylaşılan, içerik adresli depo (LIBRARY_DIR None ise kapalı)
+        self.library = get_library()
+        # Ara dosyalar bu çalıştırmaya özel scratch klasöründe üretilir (None = output_dir)
+        self.scratch_dir = scratch_dir_for(output_dir, scratch_dir)
+        self.disk_guard = DiskSpaceGuard(
+            [self.scratch_dir, output_dir, self.library.directory if self.library is not None else None]
+        )
+        # Aşama süreleri ve sayaçlar (Prometheus uç noktası + JSON-lines çalıştırma log'u)
+        self.metrics = get_metrics()
+        # Hata kategorisine göre bekleme/erteleme ve çalıştırma geneli devre kesici
+        self.retry_policy = RetryPolicy()
+        self.breaker = CircuitBreaker(on_change=self._on_breaker_change)
+        # Aktif indirmeleri (progress hook) ve ffmpeg süreçlerini kesmek için paylaşılan sinyal
+        self.cancel_event = threading.Event()
+        self.pipeline = None
+        self.tracker = None
+        self.failed = []
+        # Öğenin pipeline'dan çıkarkenki son durumu: done/skipped/failed/cancelled
+        self.final_state = {}
+        self._attempts = {}
+        self._job_store = None
+        self._own_sink = None
+        self._started = None
+        self._run_label = os.path.basename(os.path.normpath(output_dir))
+
+    # --- bildirim yardımcıları -------------------------------------------------
+
+    def _log(self, *args):
+        if self.verbose:
+            print(*args)
+
+    def _state(self, item, state, **detail):
+        if self.on_item_state:
+            self.on_item_state(item, state, detail)
+
+    def _status(self, text, level="info"):
+        if self.on_status:
+            self.on_status(text, level)
+
+    def _progress(self):
+        if self.on_progress:
+            self.on_progress(self.tracker)
+
+    def _record_job(self, order_index, state, **fields):
+        if self._job_store is None:
+            return
+        try:
+            self._job_store.update(self.output_dir, order_index, state, **fields)
+        except Exception as ex:
+            self._log("Job store error:", ex)
+
+    # --- durum geçişleri -------------------------------------------------------
+
+    def _mark_cancelled(self, item, raw_path=None):
+        orig_index, order_index = item[0], item[1]
+        # İnmiş ham dosya korunur; sürdürüldüğünde tekrar indirilmeden dönüştürülür
+        if raw_path and os.path.exists(raw_path):
+            self._record_job(order_index, jobs.DOWNLOADED, raw_path=raw_path)
+        else:
+            self._record_job(order_index, jobs.CANCELLED)
+        self.final_state[orig_index] = CANCELLED
+        self._state(item, CANCELLED)
+
+    def _handle_failure(self, item, ex, attempts, network=True):
+        """Hatayı kaydet ve bildir; tekrar denenecekse bekleme süresini (saniye), değilse None döndür.
+
+        network=False (dönüştürme hataları) devre kesiciyi ve paralellik denetleyicisini etkilemez.
+        """
+        orig_index, order_index, _video_id, title, _url = item
+        category = classify_error(ex)
+        if category == ERROR_CANCELLED or self.cancel_event.is_set():
+            self.breaker.release_probe()
+            self._mark_cancelled(item)
+            return None
+        self._log("Download error:", f"[{category}]", ex)
+        self.metrics.inc("ytmp3_errors_total", category=category, stage="download" if network else "transcode")
+        if network:
+            if self.controller is not None:
+                self.controller.record_error(throttled=category == ERROR_THROTTLED)
+            # Kalıcı hatalar devre kesiciyi tetiklemez
+            if category in PERMANENT_ERRORS:
+                self.breaker.release_probe()
+            else:
+                self.breaker.record_failure()
+        friendly = describe_error(ex)
+        if self.retry_policy.should_retry(category, attempts, self.max_retries):
+            delay = self.retry_policy.delay(category, attempts)
+            self.metrics.inc("ytmp3_retries_total", category=category)
+            self._record_job(order_index, jobs.PENDING, attempts=attempts, last_error=str(ex))
+            self._state(item, RETRYING, attempts=attempts, error=str(ex), friendly=friendly, category=category, delay=delay)
+            self._status(
+                f"İndirme hatası, {delay:.0f} sn sonra tekrar denenecek (deneme {attempts}): {title}\n{friendly}",
+                "error",
+            )
+            return delay
+        self._record_job(order_index, jobs.FAILED, attempts=attempts, last_error=str(ex))
+        self.final_state[orig_index] = FAILED
+        self.failed.append((orig_index, title, ex))
+        self._state(item, FAILED, attempts=attempts, error=str(ex), friendly=friendly, category=category)
+        self._status(f"İndirme başarısız ({attempts} deneme): {title}\n{friendly}", "error")
+        return None
+
+    def _on_breaker_change(self, old, new):
+        self.tracker.record_event("circuit_breaker", old=old, new=new)
+        self._log(f"Circuit breaker {old} -> {new}")
+        if new == CircuitBreaker.OPEN:
+            self._status(
+                f"Art arda çok sayıda hata: yeni indirmeler {self.breaker.cooldown:.0f} sn duraklatıldı.", "error"
+            )
+        elif new == CircuitBreaker.CLOSED:
+            self._status("İndirmeler devam ediyor.")
+
+    # --- pipeline aşamaları ----------------------------------------------------
+
+    def _download_stage(self, item):
+        """I/O aşaması: ham sesi indir; dönüştürme aşamasına (raw_path, info, manifest) ver."""
+        # Bu öğe için yazılan ölçüm log satırları çalıştırma/öğe bilgisiyle etiketlenir
+        with self.metrics.context(run=self._run_label, item=item[1], video_id=item[2]):
+            return self._download_item(item)
+
+    def _download_item(self, item):
+        outcome, manifest = self._prepare_download(item)
+        if outcome is not _DOWNLOAD:
+            return outcome
+        orig_index = item[0]
+        try:
+            self._download_started(item)
+            raw_path, info = download_audio(
+                item[4],
+                self.scratch_dir or self.output_dir,
+                progress_callback=None,
+                verbose=self.verbose,
+                video_id=item[2],
+                cancel_event=self.cancel_event,
+                stats_callback=lambda d, it=item: self._on_download_stats(it, d),
+                rate_limiter=self.rate_limiter,
+                format_selector=audio_format_selector(self.output_format),
+                concurrent_fragments=fragment_count(self.durations.get(orig_index)),
+            )
+            return self._download_succeeded(item, raw_path, info, manifest)
+        except Exception as ex:
+            return self._download_failed(item, ex)
+
+    def _prepare_download(self, item):
+        """İndirme öncesi adımlar: iptal, manifest/kütüphane ile atlama, sürdürme, disk alanı, devre kesici.
+
+        (sonuç, manifest) döndürür. sonuç _DOWNLOAD ise deneme sayılmıştır ve öğe şimdi
+        indirilmelidir; aksi halde aşamanın dönüş değeridir (None, RetryLater veya
+        dönüştürülecek payload). asyncio motoru (async_engine.py) aynı adımları kullanır.
+        """
+        orig_index, order_index, video_id, title, _url = item
+        if self.cancel_event.is_set():
+            # Paylaşılan havuzda pipeline bu çalıştırmanın iptalini bilmez; öğe burada kapatılır
+            self._mark_cancelled(item)
+            return None, None
+
+        # Önce manifest'e bak: bu video (id veya aynı sıra numarası ile) zaten indirilmiş mi?
+        try:
+            manifest = get_manifest(self.output_dir)
+            existing = orig_index not in self._attempts and manifest.find_existing(
+                video_id, order_index, extensions=output_extensions(self.output_format)
+            )
+            if existing:
+                self._record_job(order_index, jobs.DONE, output_path=existing)
+                self.final_state[orig_index] = SKIPPED
+                self._state(item, SKIPPED, filepath=existing)
+                self._status(f"Atlandı (zaten mevcut): {title}", "success")
+                return None, manifest
+        except Exception:
+            # Eğer burada bir hata olursa normal indirme akışına devam et
+            manifest = None
+
+        # Başka bir playlist için daha önce indirilmişse ağ/CPU harcamadan bağla
+        if self.library is not None and orig_index not in self._attempts:
+            # original biçiminde uzantı indirilen akışa bağlıdır; kütüphanede hangisi varsa o kullanılır
+            ext = None if self.output_format == FORMAT_ORIGINAL else output_extension(self.output_format)
+            stored = self.library.lookup(video_id, library_tag(self.output_format), ext)
+            if stored:
+                try:
+                    filepath = audio_output_path(
+                        self.output_dir,
+                        {"id": video_id, "title": title},
+                        order_index=order_index,
+                        title_override=title,
+                        ext=os.path.splitext(stored)[1][1:],
+                    )
+                    self.library.materialize(stored, filepath)
+                    if manifest is not None:
+                        manifest.record(video_id, filepath, order_index=order_index, title=title)
+                    self._record_job(order_index, jobs.DONE, output_path=filepath)
+                    self.final_state[orig_index] = LINKED
+                    self._state(item, LINKED, filepath=filepath)
+                    self._status(f"Kütüphaneden bağlandı: {os.path.basename(filepath)}", "success")
+                    return None, manifest
+                except OSError as ex:
+                    self._log("Library link error:", ex)
+
+        # Önceki çalıştırmada indirilip dönüştürülemeden kalmış ham dosya varsa doğrudan dönüştür
+        job = self._job_store.get(self.output_dir, order_index) if self._job_store is not None else None
+        if job and job["state"] in (jobs.DOWNLOADED, jobs.TRANSCODING) and job["raw_path"]:
+            if os.path.exists(job["raw_path"]):
+                self._attempts.setdefault(orig_index, job["attempts"] or 1)
+                self._state(item, WAITING_TRANSCODE)
+                raw_ext = os.path.splitext(job["raw_path"])[1][1:]
+                return (job["raw_path"], {"id": video_id, "title": title, "ext": raw_ext}, manifest), manifest
+
+        # Disk alanı: öğenin tahmini ihtiyacı ayrılır; yer yoksa denemeyi harcamadan ertele
+        need = estimate_item_bytes(self.durations.get(orig_index), output_bitrate(self.output_format))
+        try:
+            if not self.disk_guard.try_reserve(orig_index, need):
+                self._status(f"Disk alanı azaldı, indirme bekletiliyor: {title}")
+                return RetryLater(DISK_SPACE_RETRY_SECONDS), manifest
+        except OSError as ex:
+            attempts = self._attempts.get(orig_index, 0) + 1
+            self._attempts[orig_index] = attempts
+            delay = self._handle_failure(item, ex, attempts, network=False)
+            return (RetryLater(delay) if delay is not None else None), manifest
+
+        # Devre açıksa denemeyi harcamadan ertele; ayrılan alan bekleme boyunca tutulmaz
+        # (aksi halde açık devrede her ertelenen öğe ayrım biriktirip disk korumasını tetikler)
+        if not self.breaker.allow():
+            self.disk_guard.release(orig_index)
+            return RetryLater(self.breaker.remaining()), manifest
+
+        # Her çağrıda tek deneme; geçici hatada öğe beklemeyle kuyruğun sonuna ertelenir
+        self._attempts[orig_index] = self._attempts.get(orig_index, 0) + 1
+        return _DOWNLOAD, manifest
+
+    def _download_started(self, item):
+        orig_index, order_index, _video_id, title, _url = item
+        attempts = self._attempts[orig_index]
+        self._record_job(order_index, jobs.DOWNLOADING, attempts=attempts)
+        self.tracker.download_started(order_index, title)
+        self._state(item, DOWNLOADING, attempts=attempts)
+        self._status(f"{order_index + 1}/{len(self.items)} indiriliyor (deneme {attempts}): {title}")
+
+    def _download_succeeded(self, item, raw_path, info, manifest):
+        """İndirme bitti: dönüştürme aşamasına verilecek payload'u döndür."""
+        self.tracker.download_finished(item[1])
+        self.breaker.record_success()
+        if self.controller is not None:
+            self.controller.record_success()
+        self._record_job(item[1], jobs.DOWNLOADED, raw_path=raw_path)
+        self._state(item, WAITING_TRANSCODE)
+        return raw_path, info, manifest
+
+    def _download_failed(self, item, ex):
+        """İndirme hatası: RetryLater (tekrar denenecek) veya None (öğe bitti)."""
+        # Yarım indirme temizlendi (veya iptalde korunur); ayrılan alan tekrar denemede yeniden alınır
+        self.disk_guard.release(item[0])
+        delay = self._handle_failure(item, ex, self._attempts.get(item[0], 1))
+        return RetryLater(delay) if delay is not None else None
+
+    def _on_download_stats(self, item, d):
+        self.tracker.download_progress(item[1], d)
+        if d.get("status") == "downloading":
+            self._state(
+                item,
+                DOWNLOADING,
+                downloaded_bytes=d.get("downloaded_bytes"),
+                total_bytes=d.get("total_bytes") or d.get("total_bytes_estimate"),
+                speed=d.get("speed"),
+            )
+        self._progress()
+
+    def _transcode_stage(self, item, payload):
+        """CPU aşaması: ham dosyayı output_format'a dönüştür/remux et. RetryLater dönerse öğe yeniden indirilir."""
+        with self.metrics.context(run=self._run_label, item=item[1], video_id=item[2]):
+            return self._transcode_item(item, payload)
+
+    def _transcode_item(self, item, payload):
+        raw_path, info, manifest = payload
+        try:
+            self._transcode_started(item)
+            filepath = finalize_audio(
+                raw_path,
+                info,
+                self.output_dir,
+                order_index=item[1],
+                title_override=item[3],
+                video_id=item[2],
+                manifest=manifest,
+                verbose=self.verbose,
+                cancel_event=self.cancel_event,
+                library=self.library,
+                output_format=self.output_format,
+                scratch_dir=self.scratch_dir,
+            )
+            return self._transcode_succeeded(item, filepath)
+        except Exception as ex:
+            return self._transcode_failed(item, raw_path, ex)
+
+    def _transcode_started(self, item):
+        self._record_job(item[1], jobs.TRANSCODING)
+        self.tracker.transcode_started(item[1])
+        self._state(item, TRANSCODING)
+
+    def _transcode_succeeded(self, item, filepath):
+        orig_index, order_index = item[0], item[1]
+        self.tracker.transcode_finished(order_index)
+        self._record_job(order_index, jobs.DONE, output_path=filepath, last_error=None)
+        self.final_state[orig_index] = DONE
+        self._state(item, DONE, filepath=filepath)
+        self._status(f"Tamamlandı: {os.path.basename(filepath)}", "success")
+        return True
+
+    def _transcode_failed(self, item, raw_path, ex):
+        """Dönüştürme hatası: True (öğe bitti) veya RetryLater (bekledikten sonra yeniden indir)."""
+        if isinstance(ex, DownloadCancelled) or self.cancel_event.is_set():
+            self._mark_cancelled(item, raw_path)
+            return True
+        attempts = self._attempts.get(item[0], 1)
+        if os.path.exists(raw_path):
+            try:
+                os.remove(raw_path)
+            except OSError:
+                pass
+        delay = self._handle_failure(item, ex, attempts, network=False)
+        return RetryLater(delay) if delay is not None else True
+
+    def _on_item_done(self, item):
+        self.disk_guard.release(item[0])
+        state = self.final_state.get(item[0], FAILED)
+        self.metrics.inc("ytmp3_items_total", state=state)
+        self.tracker.item_finished(item[1], state)
+        self._progress()
+
+    def _on_concurrency_adjust(self, old, new, reason, metrics):
+        self.tracker.record_event("concurrency_adjusted", old=old, new=new, reason=reason, **metrics)
+        self._log(
+            f"Concurrency {old} -> {new} ({reason}): {metrics['total_bps'] / 1024:.0f} KB/s total, "
+            f"{metrics['per_worker_bps'] / 1024:.0f} KB/s per worker, {metrics['errors']} errors, "
+            f"cpu {metrics['cpu_load'] if metrics['cpu_load'] is not None else '-'}"
+        )
+        self._status(f"Paralel indirme sayısı: {old} → {new} ({reason})")
+
+    def _on_cancelled(self, item, payload):
+        self._mark_cancelled(item, payload[0] if payload else None)
+
+    def _on_stage_error(self, item, ex, stage):
+        """Aşama fonksiyonundan kaçan beklenmeyen istisna (kod hatası): öğeyi kalıcı hatalı kaydet."""
+        orig_index, order_index, _video_id, title, _url = item
+        print(f"Unexpected {stage} error ({title}):", file=sys.stderr)
+        traceback.print_exception(type(ex), ex, ex.__traceback__, file=sys.stderr)
+        self.breaker.release_probe()
+        self.metrics.inc("ytmp3_errors_total", category=classify_error(ex), stage=stage)
+        self._record_job(order_index, jobs.FAILED, attempts=self._attempts.get(orig_index, 0), last_error=str(ex))
+        self.final_state[orig_index] = FAILED
+        self.failed.append((orig_index, title, ex))
+        friendly = describe_error(ex)
+        self._state(item, FAILED, error=str(ex), friendly=friendly, category=classify_error(ex))
+        self._status(f"Beklenmeyen hata: {title}\n{friendly}", "error")
+
+    # --- dış API ---------------------------------------------------------------
+
+    def cancel(self):
+        """Kuyruktakileri hemen, aktif indirme/dönüştürmeleri birkaç yüz ms içinde iptal et."""
+        self.cancel_event.set()
+        if self.pipeline is not None:
+            self.pipeline.cancel()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def _preflight_disk(self):
+        """Tüm öğelerin tahmini disk ihtiyacını boş alanla karşılaştır; yetmiyorsa uyar.
+
+        Çalıştırma durdurulmaz: zaten indirilmiş/kütüphanede olan öğeler alan harcamaz,
+        ve alan azaldıkça indirmeler DiskSpaceGuard ile sırayla bekletilir.
+        """
+        bitrate = output_bitrate(self.output_format)
+        required = sum(estimate_item_bytes(self.durations.get(item[0]), bitrate) for item in self.items)
+        free = self.disk_guard.free()
+        self.metrics.log("disk_preflight", run=self._run_label, required_bytes=required, free_bytes=free)
+        if free is not None and required + self.disk_guard.reserve_bytes > free:
+            self._status(
+                f"Disk alanı yetmeyebilir: tahmini {format_bytes(required)} gerekli, {format_bytes(free)} boş. "
+                "Yer azaldıkça indirmeler bekletilecek.",
+                "error",
+            )
+
+    def start(self):
+        """Çalıştırmayı hazırla (iş deposu, progress log'u, disk ön kontrolü); öğeleri işlenecek sırayla döndür.
+
+        run() bunu kendi pipeline'ından önce çağırır. Birden çok playlist'in paylaştığı
+        havuzda (bkz. playlist_queue) öğeler dışarıdan _download_stage/_transcode_stage ile
+        işlenir, her öğe bitince _on_item_done çağrılır ve sonunda finish() ile kapatılır.
+        """
+        self._started = time.monotonic()
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        # Her öğenin durumu kalıcı iş deposuna yazılır; süreç ölürse açılışta sürdürülebilir
+        try:
+            self._job_store = get_job_store()
+            self._job_store.enqueue(
+                self.output_dir,
+                [(order_idx, video_id, title, url) for (_o, order_idx, video_id, title, url) in self.items],
+                playlist_title=self.playlist_title,
+            )
+        except Exception as ex:
+            self._log("Job store error:", ex)
+            self._job_store = None
+
+        # Bayt düzeyinde ilerleme/hız/ETA; olaylar ayrıca JSON-lines olarak klasöre yazılır
+        sink = self.progress_sink
+        if sink is None and PROGRESS_LOG_ENABLED:
+            try:
+                sink = self._own_sink = JsonLinesSink(os.path.join(self.output_dir, PROGRESS_LOG_FILENAME))
+            except OSError as ex:
+                self._log("Progress log error:", ex)
+        self.tracker = ProgressTracker(len(self.items), transcode_workers=self.transcode_workers, sink=sink)
+        self._preflight_disk()
+        self.metrics.log("run_started", run=self._run_label, items=len(self.items), workers=self.max_workers)
+
+        items = self.items
+        if self.longest_first and self.durations:
+            items = schedule_longest_first(items, self.durations)
+        return items
+
+    def _close(self):
+        self._progress()
+        if self._own_sink is not None:
+            self._own_sink.close()
+            self._own_sink = None
+        # Sürdürülecek ham dosya kalmadıysa scratch klasörünü topla
+        remove_if_empty(self.scratch_dir)
+
+    def finish(self):
+        """Progress log'unu kapat, özeti üret ve döndür."""
+        self._close()
+        if self.cancelled and self.pipeline is not None and self.pipeline.quiesce_seconds is not None:
+            self._log(f"Cancel quiesced in {self.pipeline.quiesce_seconds:.2f}s")
+        summary = self.summary(time.monotonic() - self._started)
+        self.metrics.log(
+            "run_finished",
+            run=self._run_label,
+            **{k: summary[k] for k in ("total", "done", "skipped", "linked", "failed", "cancelled", "elapsed_seconds")},
+        )
+        return summary
+
+    def _download_concurrency(self):
+        """(indirme worker sayısı, AdjustableLimit | None); adaptive ise denetleyiciyi de kurar."""
+        if not self.adaptive:
+            return self.max_workers, None
+        download_limit = AdjustableLimit(min(max(self.max_workers, ADAPTIVE_MIN_WORKERS), ADAPTIVE_MAX_WORKERS))
+        self.controller = AdaptiveConcurrency(
+            download_limit,
+            lambda: self.tracker.snapshot()["bytes_downloaded"],
+            on_adjust=self._on_concurrency_adjust,
+        )
+        return max(ADAPTIVE_MAX_WORKERS, self.max_workers), download_limit
+
+    def run(self):
+        """Tüm öğeleri kendi pipeline'ında işle; bitince özet sözlüğü döndür."""
+        items = self.start()
+        download_workers, download_limit = self._download_concurrency()
+        self.pipeline = DownloadPipeline(
+            self._download_stage,
+            self._transcode_stage,
+            download_workers=min(download_workers, max(1, len(self.items))),
+            transcode_workers=self.transcode_workers,
+            queue_size=TRANSCODE_QUEUE_SIZE,
+            on_item_done=self._on_item_done,
+            on_cancelled=self._on_cancelled,
+            on_error=self._on_stage_error,
+            cancel_event=self.cancel_event,
+            download_limit=download_limit,
+        )
+        if self.cancel_event.is_set():
+            self.pipeline.cancel()
+        if self.controller is not None:
+            self.controller.start()
+        try:
+            self.pipeline.run(items)
+        except BaseException:
+            self._close()
+            raise
+        finally:
+            if self.controller is not None:
+                self.controller.stop()
+        return self.finish()
+
+    def summary(self, elapsed=None):
+        """Makine tarafından okunabilir çalıştırma özeti."""
+        counts = {DONE: 0, SKIPPED: 0, LINKED: 0, FAILED: 0, CANCELLED: 0}
+        for state in self.final_state.values():
+            counts[state] = counts.get(state, 0) + 1
+        snap = self.tracker.snapshot() if self.tracker else {}
+        return {
+            "output_dir": self.output_dir,
+            "playlist_title": self.playlist_title,
+            "engine": self.engine,
+            "total": len(self.items),
+            "done": counts[DONE],
+            "skipped": counts[SKIPPED],
+            "linked": counts[LINKED],
+            "failed": counts[FAILED],
+            "cancelled": counts[CANCELLED],
+            "failed_items": [
+                {
+                    "index": orig_index,
+                    "title": title,
+                    "category": classify_error(ex),
+                    "error": str(ex),
+                    "message": describe_error(ex),
+                }
+                for (orig_index, title, ex) in self.failed
+            ],
+            "bytes_downloaded": snap.get("bytes_downloaded", 0),
+            "transcode_seconds": snap.get("transcode_seconds_total", 0.0),
+            "elapsed_seconds": elapsed,
+            "quiesce_seconds": self.pipeline.quiesce_seconds if self.pipeline else None,
+            "deferred_retries": self.pipeline.deferred_total if self.pipeline else 0,
+            "breaker_trips": self.breaker.trips,
+            "download_workers": self.controller.limit.limit if self.controller else self.max_workers,
+            "concurrency_adjustments": [
+                {"ts": ts, "old": old, "new": new, "reason": reason}
+                for (ts, old, new, reason, _metrics) in self.controller.history
+            ]
+            if self.controller
+            else [],
+        }
@@ -0,0 +1,165 @@
+# staging.py
+# İndirme ve dönüştürme ara dosyaları için geçici çalışma alanı (scratch) ve disk alanı
+# denetimi. yt-dlp'nin .part dosyaları, ham akışlar ve ffmpeg çıktısı playlist klasörü
+# yerine SCRATCH_DIR altında üretilir; tamamlanan dosya nihai adına atomik olarak taşınır.
+# Böylece playlist klasöründe (ve onu tarayan os.listdir/manifest rebuild'de) yarım dosya
+# görünmez.
+#
+# Disk alanı: her öğenin ihtiyacı süre ve bit hızlarından tahmin edilir. DiskSpaceGuard
+# devam eden öğeler için bu miktarı ayırır; boş alan azaldıkça yeni indirmeler, "disk
+# dolu" hatası çalıştırmanın ortasında patlamadan önce bekletilir.
+import errno
+import hashlib
+import os
+import shutil
+import threading
+
+from config import (
+    SCRATCH_DIR,
+    DISK_RESERVE_BYTES,
+    DISK_ESTIMATE_SOURCE_BITRATE,
+    DISK_ESTIMATE_DEFAULT_SECONDS,
+)
+
+
+def scratch_dir_for(output_dir, base_dir=SCRATCH_DIR):
+    """output_dir'in ara dosyaları için scratch alt klasörü; base_dir None ise None.
+
+    Aynı adlı iki playlist klasörü çakışmasın diye ada tam yolun kısa özeti eklenir.
+    """
+    if not base_dir:
+        return None
+    path = os.path.abspath(output_dir)
+    digest = hashlib.sha1(path.encode("utf-8")).hexdigest()[:8]
+    return os.path.join(base_dir, f"{os.path.basename(path) or 'playlist'}-{digest}")
+
+
+def remove_if_empty(directory):
+    """Klasör boşsa sil (sürdürme için bekleyen ham dosyalar varsa dokunulmaz)."""
+    if not directory:
+        return
+    try:
+        os.rmdir(directory)
+    except OSError:
+        pass
+
+
+def publish_file(src_path, dst_path):
+    """src_path'i dst_path'e atomik olarak taşı; dst_path'i döndür.
+
+    Aynı dosya sisteminde tek bir os.replace yeterlidir. Scratch başka bir dosya
+    sistemindeyse (tmpfs, ayrı SSD) dosya önce hedef klasörde dst_path.part'a kopyalanır,
+    sonra os.replace ile adına taşınır; nihai ad hiçbir zaman yarım dosyayı göstermez.
+    """
+    os.makedirs(os.path.dirname(dst_path) or ".", exist_ok=True)
+    try:
+        os.replace(src_path, dst_path)
+        return dst_path
+    except OSError as ex:
+        if ex.errno != errno.EXDEV:
+            raise
+    tmp_path = dst_path + ".part"
+    try:
+        shutil.copyfile(src_path, tmp_path)
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    os.remove(src_path)
+    return dst_path
+
+
+def _bits_per_second(bitrate):
+    """'192k' / '1.5M' / 192000 -> bit/sn."""
+    if isinstance(bitrate, (int, float)):
+        return float(bitrate)
+    text = str(bitrate).strip().lower()
+    scale = {"k": 1000, "m": 1000**2}.get(text[-1:], 1)
+    return float(text[:-1] if scale != 1 else text) * scale
+
+
+def estimate_item_bytes(duration, output_bitrate=None, source_bitrate=DISK_ESTIMATE_SOURCE_BITRATE):
+    """Bir öğenin en yüksek disk ihtiyacı (bayt): ham akış + dönüştürülmüş çıktı.
+
+    Dönüştürme bitene kadar ikisi birlikte diskte durur. output_bitrate None ise
+    (original biçimi) çıktı ham dosyanın kendisidir.
+    """
+    seconds = duration or DISK_ESTIMATE_DEFAULT_SECONDS
+    bps = _bits_per_second(source_bitrate)
+    if output_bitrate:
+        bps += _bits_per_second(output_bitrate)
+    return int(seconds * bps / 8)
+
+
+def free_bytes(path):
+    """path'in bulunduğu dosya sistemindeki boş alan; path henüz yoksa en yakın üst klasörünki."""
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return shutil.disk_usage(path).free
+
+
+class DiskSpaceGuard:
+    """Devam eden öğeler için disk alanı ayırır; yer kalmadıkça yeni indirmeleri bekletir.
+
+    paths'teki (scratch, playlist klasörü, kütüphane) her dosya sisteminin boş alanı
+    kontrol edilir, en düşüğü esas alınır. Ayrılan miktar öğe bitene kadar tutulur;
+    yazılmış kısım hem boş alandan düşüp hem ayrılmış sayıldığı için hesap temkinlidir.
+    Thread-safe'tir.
+    """
+
+    def __init__(self, paths, reserve_bytes=DISK_RESERVE_BYTES, free_fn=free_bytes):
+        self.paths = [p for p in dict.fromkeys(paths) if p]
+        self.reserve_bytes = reserve_bytes or 0
+        self._free_fn = free_fn
+        self._lock = threading.Lock()
+        self._reserved = {}
+
+    def free(self):
+        """İzlenen dosya sistemlerindeki en düşük boş alan (bayt); ölçülemiyorsa None."""
+        values = []
+        for path in self.paths:
+            try:
+                values.append(self._free_fn(path))
+            except OSError:
+                continue
+        return min(values) if values else None
+
+    @property
+    def reserved(self):
+        with self._lock:
+            return sum(self._reserved.values())
+
+    def try_reserve(self, key, nbytes):
+        """Yer varsa nbytes ayır ve True döndür; diğer öğeler bitince yer açılacaksa False.
+
+        Ayrılmış başka öğe yokken bile sığmıyorsa beklemek işe yaramaz: OSError(ENOSPC).
+        Yedek payı (reserve_bytes) tek başına çalışan öğeyi engellemez; alan azaldıkça
+        indirmeler bu sayede teker teker ilerler.
+        """
+        with self._lock:
+            if key in self._reserved:
+                return True
+            free = self.free()
+            if free is not None:
+                outstanding = sum(self._reserved.values())
+                if free - outstanding - nbytes < self.reserve_bytes:
+                    if self._reserved:
+                        return False
+                    if free < nbytes:
+                        raise OSError(
+                            errno.ENOSPC,
+                            f"No space left on device: ~{nbytes} bytes needed, {free} bytes free",
+                        )
+            self._reserved[key] = nbytes
+            return True
+
+    def release(self, key):
+        with self._lock:
+            self._reserved.pop(key, None)
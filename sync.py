@@ -0,0 +1,109 @@
+# sync.py
+# Artımlı playlist senkronizasyonu. Playlist'in güncel hali, kalıcı playlist klasörünün
+# manifest'i ile video id üzerinden karşılaştırılır:
+#   - yeni videolar             -> indirilecekler listesine
+#   - sırası değişen videolar   -> klasör içinde yeniden adlandırılır (N. öneki)
+#   - listeden çıkan videolar   -> istenirse silinir, aksi halde olduğu gibi bırakılır
+# Böylece her gün yenilenen bir playlist baştan indirilmez, sadece fark indirilir.
+import os
+
+from downloader import audio_output_path
+
+# Manifest'te sıra tabanlı (id'siz) kayıtlar bu önekle tutulur; senkronizasyon bunlara dokunmaz
+_ORDER_KEY_PREFIX = "order:"
+
+
+class SyncPlan:
+    """plan_sync sonucu.
+
+    downloads: [(order_index, entry), ...]                        indirilecek yeni videolar
+    renames:   [(video_id, old_path, new_path, order_index, title)] yeri değişen videolar
+    removals:  [(video_id, path), ...]                             listeden çıkan videolar
+    unchanged: [(order_index, entry, path), ...]                   olduğu gibi kalanlar
+    """
+
+    def __init__(self):
+        self.downloads = []
+        self.renames = []
+        self.removals = []
+        self.unchanged = []
+
+    def summary(self):
+        return {
+            "new": len(self.downloads),
+            "renamed": len(self.renames),
+            "removed": len(self.removals),
+            "unchanged": len(self.unchanged),
+        }
+
+
+def plan_sync(manifest, entries, output_dir):
+    """Güncel playlist girdilerini klasörün manifest'iyle karşılaştır.
+
+    Playlist'te aynı video birden fazla kez geçiyorsa sadece ilk konumu esas alınır.
+    """
+    plan = SyncPlan()
+    records = {
+        key: record
+        for key, record in manifest.items()
+        if not key.startswith(_ORDER_KEY_PREFIX) and record.get("status") == "done" and record.get("filename")
+    }
+    seen = set()
+    for order_index, entry in enumerate(entries):
+        video_id = entry.get("id")
+        if not video_id:
+            plan.downloads.append((order_index, entry))
+            continue
+        if video_id in seen:
+            continue
+        seen.add(video_id)
+        record = records.get(video_id)
+        current = os.path.join(output_dir, record["filename"]) if record else None
+        if current is None or not os.path.exists(current):
+            plan.downloads.append((order_index, entry))
+            continue
+        # Mevcut dosyanın uzantısı korunur (biçim değişse de sync dosyayı yeniden kodlamaz)
+        ext = os.path.splitext(current)[1][1:] or "mp3"
+        desired = audio_output_path(
+            output_dir, entry, order_index=order_index, title_override=entry.get("title"), ext=ext
+        )
+        if os.path.abspath(current) == os.path.abspath(desired):
+            plan.unchanged.append((order_index, entry, current))
+        else:
+            plan.renames.append((video_id, current, desired, order_index, entry.get("title")))
+
+    for video_id, record in records.items():
+        if video_id not in seen:
+            plan.removals.append((video_id, os.path.join(output_dir, record["filename"])))
+    return plan
+
+
+def apply_sync(manifest, plan, remove_deleted=False, verbose=False):
+    """Yeniden adlandırma ve (istenirse) silme adımlarını uygula; indirme yapılmaz.
+
+    Yer değiştiren iki dosya birbirinin adını alabileceği için önce hepsi geçici
+    adlara taşınır, sonra nihai adlarına.
+    """
+    staged = []
+    for video_id, old_path, new_path, order_index, title in plan.renames:
+        tmp_path = os.path.join(os.path.dirname(old_path), f".sync-{video_id}.tmp")
+        os.replace(old_path, tmp_path)
+        staged.append((video_id, tmp_path, new_path, order_index, title))
+    for video_id, tmp_path, new_path, order_index, title in staged:
+        os.replace(tmp_path, new_path)
+        manifest.record(video_id, new_path, order_index=order_index, title=title)
+        if verbose:
+            print("[sync] Renamed:", os.path.basename(new_path))
+
+    removed = 0
+    if remove_deleted:
+        for video_id, path in plan.removals:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            manifest.remove(video_id)
+            removed += 1
+            if verbose:
+                print("[sync] Removed:", os.path.basename(path))
+    return {"renamed": len(staged), "removed": removed}
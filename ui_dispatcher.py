@@ -0,0 +1,117 @@
+# ui_dispatcher.py
+# Worker thread'lerinin UI değişikliklerini tek bir yerde toplayıp sabit hızda (ör. 10 Hz)
+# toplu olarak uygulayan dağıtıcı. Her worker'ın doğrudan page.update() çağırması,
+# çok sayıda worker ve yüzlerce öğe ile Flet oturumunu tam sayfa diff'leriyle boğar.
+# Burada aynı kontrole (anahtar) bir kare içinde gelen değişikliklerden sadece sonuncusu
+# uygulanır ve her karede en fazla bir page.update() yapılır; UI maliyeti worker
+# sayısından bağımsız kalır.
+import queue
+import threading
+import time
+
+from config import UI_FLUSH_HZ
+from metrics import get_metrics, STAGE_UI_UPDATE
+
+
+class UIDispatcher:
+    """Thread-safe UI güncelleme kuyruğu; değişiklikleri kare kare (frame) uygular."""
+
+    def __init__(self, page, fps=UI_FLUSH_HZ, on_error=None):
+        self.page = page
+        self.interval = 1.0 / max(1.0, float(fps))
+        self.on_error = on_error
+        self._queue = queue.SimpleQueue()
+        self._dirty = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self._stats = {"submitted": 0, "applied": 0, "coalesced": 0, "flushes": 0, "flush_seconds": 0.0}
+
+    def submit(self, key, fn):
+        """fn() bir sonraki karede UI thread'inde (dağıtıcıda) çalıştırılır.
+
+        Aynı key ile aynı karede gelen önceki değişiklikler atlanır (son gelen kazanır).
+        """
+        self._queue.put((key, fn))
+
+    def request_update(self):
+        """Kontrol nesneleri doğrudan değiştirildiyse sadece bir sonraki karede page.update() iste."""
+        self._dirty.set()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ui-dispatcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.flush()
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def reset_stats(self):
+        with self._stats_lock:
+            for key in self._stats:
+                self._stats[key] = 0.0 if key == "flush_seconds" else 0
+
+    def flush(self):
+        """Bekleyen değişiklikleri hemen uygula ve gerekiyorsa tek bir page.update() yap."""
+        pending = {}
+        submitted = 0
+        while True:
+            try:
+                key, fn = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            submitted += 1
+            # sıra korunur ama aynı anahtarın sadece son değişikliği kalır
+            pending.pop(key, None)
+            pending[key] = fn
+
+        if not pending and not self._dirty.is_set():
+            return
+        self._dirty.clear()
+
+        start = time.perf_counter()
+        for fn in pending.values():
+            try:
+                fn()
+            except Exception as ex:
+                if self.on_error:
+                    self.on_error(ex)
+        try:
+            self.page.update()
+        except Exception as ex:
+            if self.on_error:
+                self.on_error(ex)
+        elapsed = time.perf_counter() - start
+
+        metrics = get_metrics()
+        metrics.record_stage(STAGE_UI_UPDATE, elapsed, details={"applied": len(pending)})
+        metrics.inc("ytmp3_ui_updates_total", len(pending), result="applied")
+        metrics.inc("ytmp3_ui_updates_total", submitted - len(pending), result="coalesced")
+
+        with self._stats_lock:
+            self._stats["submitted"] += submitted
+            self._stats["applied"] += len(pending)
+            self._stats["coalesced"] += submitted - len(pending)
+            self._stats["flushes"] += 1
+            self._stats["flush_seconds"] += elapsed
+
+    def _run(self):
+        next_frame = time.monotonic()
+        while not self._stop.is_set():
+            next_frame += self.interval
+            self.flush()
+            delay = next_frame - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                # flush çerçeveden uzun sürdüyse birikmiş gecikmeyi telafi etmeye çalışma
+                next_frame = time.monotonic()
@@ -0,0 +1,109 @@
+# ydl_pool.py
+# İş parçacığı (worker) başına yeniden kullanılan, önceden yapılandırılmış YoutubeDL nesneleri.
+# Her video ve her retry için YoutubeDL oluşturup kapatmak; seçenek ayrıştırma, extractor
+# kaydı ve HTTP oturumu (TLS el sıkışmaları dahil) maliyetini her seferinde tekrar ödetir.
+# Havuz bu maliyeti worker başına bir kez öder; HTTP bağlantıları aynı worker'ın sonraki
+# indirmelerinde yeniden kullanılır.
+import threading
+from contextlib import contextmanager
+
+_MISSING = object()
+
+
+class YoutubeDLPool:
+    """Thread başına bir YoutubeDL örneği tutan havuz.
+
+    Çağrıya özel değerler (çıktı klasörü, progress hook, format vb.) session()
+    ile geçici olarak ayarlanır ve çağrı bitince eski haline döner. Progress hook'ları
+    örneği o an kullanan çağrıya yönlendirilir; bir örnek aynı anda tek thread tarafından kullanılır.
+    """
+
+    def __init__(self, base_opts=None, factory=None):
+        self.base_opts = dict(base_opts or {})
+        # YoutubeDL yerine kullanılacak sınıf (ör. benchmark'lardaki sahte extractor); None = yt_dlp
+        self.factory = factory
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._instances = []
+        self.created = 0
+
+    def get(self):
+        """Bu thread'e ait YoutubeDL örneğini döndür (ilk çağrıda oluşturulur)."""
+        ydl = getattr(self._local, "ydl", None)
+        if ydl is None:
+            factory = self.factory
+            if factory is None:
+                from yt_dlp import YoutubeDL as factory
+
+            # Hook örnek başına yönlendirilir (thread başına değil): eşzamanlı fragment
+            # indirmelerinde yt-dlp hook'u kendi fragment thread'lerinden çağırır
+            route = {}
+
+            def dispatch(d):
+                hook = route.get("hook")
+                if hook is not None:
+                    hook(d)
+
+            opts = dict(self.base_opts)
+            opts["progress_hooks"] = list(opts.get("progress_hooks") or []) + [dispatch]
+            ydl = factory(opts)
+            self._local.ydl = ydl
+            self._local.route = route
+            with self._lock:
+                self._instances.append(ydl)
+                self.created += 1
+        return ydl
+
+    @contextmanager
+    def session(self, progress_hook=None, output_dir=None, **params):
+        """Bu thread'in örneğini çağrıya özel ayarlarla ver; çıkışta ayarları geri al."""
+        ydl = self.get()
+        if output_dir is not None:
+            params["paths"] = {"home": output_dir}
+        saved = {k: ydl.params.get(k, _MISSING) for k in params}
+        ydl.params.update(params)
+        # yt-dlp format seçicisini YoutubeDL.__init__'te bir kez derler; params["format"]
+        # sonradan değişse de eski seçici kullanılır. Çağrıya özel format için yeniden derlenir.
+        saved_selector = _MISSING
+        fmt = params.get("format")
+        if fmt and hasattr(ydl, "build_format_selector"):
+            saved_selector = getattr(ydl, "format_selector", None)
+            ydl.format_selector = ydl.build_format_selector(fmt)
+        route = self._local.route
+        route["hook"] = progress_hook
+        try:
+            yield ydl
+        finally:
+            route["hook"] = None
+            if saved_selector is not _MISSING:
+                ydl.format_selector = saved_selector
+            for k, v in saved.items():
+                if v is _MISSING:
+                    ydl.params.pop(k, None)
+                else:
+                    ydl.params[k] = v
+
+    def discard(self):
+        """Bu thread'in örneğini kapat (ör. bozuk oturum); sonraki get() yenisini açar."""
+        ydl = getattr(self._local, "ydl", None)
+        if ydl is None:
+            return
+        self._local.ydl = None
+        with self._lock:
+            if ydl in self._instances:
+                self._instances.remove(ydl)
+        try:
+            ydl.close()
+        except Exception:
+            pass
+
+    def close_all(self):
+        """Tüm örnekleri kapat (run sonunda). Thread-local referanslar bir sonraki get()'te yenilenir."""
+        with self._lock:
+            instances, self._instances = self._instances, []
+        for ydl in instances:
+            try:
+                ydl.close()
+            except Exception:
+                pass
+        self._local = threading.local()